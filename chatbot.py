@@ -4,25 +4,33 @@ from streamlit.runtime.uploaded_file_manager import UploadedFile
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.documents.base import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain.prompts import PromptTemplate
 from langchain_core.runnables import Runnable
 from langchain.schema.output_parser import StrOutputParser
 from langchain.schema import Document
 
-from typing import List
+from typing import Iterable, Iterator, List
 from pathlib import Path
 import os
 import re
 import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from core.config import settings
+from index.embedding_cache import CachedEmbeddings
+from data.chunker import StructuredChunker, tokenizer_length
+from data.ingest import IngestPipeline
+from rag.context import ContextPacker
+from rag.memory import ConversationMemory
 
 ## 환경변수 불러오기
 from dotenv import load_dotenv,dotenv_values
 load_dotenv()
 
 ## 공지사항 함수 불러오기
-from notice_crawler import show_notices
+from services.notice_crawler import show_notices
 
 ############################### 0단계 : 대화 맥락 유지 관련 HISTORY 함수들 ##########################
 # 세션 히스토리 초기화
@@ -30,20 +38,27 @@ if "chat_history" not in st.session_state:
     # role: "user" | "assistant"
     st.session_state.chat_history = []
 if "summary" not in st.session_state:
-    st.session_state.summary = ""   # (선택) 요약 버퍼
+    st.session_state.summary = ""   # 오래된 대화의 요약
+    st.session_state.summarized = 0  # chat_history 앞쪽에서 summary에 합친 메시지 수
 
 # 리셋 버튼
-st.sidebar.button("대화 초기화", on_click=lambda: (st.session_state.update(chat_history=[]), st.session_state.update(summary="")))
+st.sidebar.button("대화 초기화", on_click=lambda: st.session_state.update(chat_history=[], summary="", summarized=0))
+
+## 요약용 LLM (답변 체인과 같은 모델)
+@st.cache_resource
+def get_memory() -> ConversationMemory:
+    return ConversationMemory(ChatGoogleGenerativeAI(model="gemini-2.5-flash"), keep=settings.HISTORY_KEEP_MESSAGES,
+                              fold=settings.SUMMARY_FOLD_MESSAGES, max_chars=settings.SUMMARY_MAX_CHARS)
 
 # 히스토리 포맷터
-def format_history_for_prompt(history, window_size=8):
-    """프롬프트에 넣을 수 있게 간단 문자열로 정리"""
-    recent = history[-window_size:]
-    lines = []
-    for m in recent:
-        prefix = "사용자" if m["role"] == "user" else "어시스턴트"
-        lines.append(f"{prefix}: {m['content']}")
-    return "\n".join(lines)
+def format_history_for_prompt(history):
+    """요약 + 아직 요약에 합치지 않은 최근 메시지"""
+    return get_memory().render(st.session_state.summary, history, st.session_state.summarized)
+
+def update_summary(history):
+    """오래된 메시지가 충분히 쌓였으면 요약에 합친다 (몇 턴에 한 번만 LLM 호출)"""
+    st.session_state.summary, st.session_state.summarized = get_memory().update(
+        st.session_state.summary, history, st.session_state.summarized)
 
 
 
@@ -59,80 +74,9 @@ def save_uploadedfile(uploadedfile: UploadedFile) -> str :
         f.write(uploadedfile.read()) 
     return file_path
 
-## 2: 저장된 JSON 파일을 Document로 변환
-def json_to_documents(json_files: List[str]) -> List[Document]:
-    all_documents = []
-
-    for file_path in json_files:
-        file = Path(file_path)
-        with open(file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # detail_data.json 처리
-        if "detail_data" in file.name:
-            for i, item in enumerate(data if isinstance(data, list) else [data]):
-                # description 처리
-                description = item.get("description", "")
-                description_text = ""
-                if isinstance(description, dict):
-                    parts = []
-                    for key, value in description.items():
-                        if isinstance(value, list):
-                            value_str = "\n".join([str(v) for v in value])
-                        else:
-                            value_str = str(value)
-                        parts.append(f"[{key}]\n{value_str}")
-                    description_text = "\n\n".join(parts)
-                elif isinstance(description, list):
-                    description_text = "\n".join([str(v) for v in description])
-                else:
-                    description_text = str(description)
-
-                # contact 처리
-                contact = item.get("contact", "")
-                contact_text = ""
-                if isinstance(contact, dict):
-                    parts = []
-                    for section, info in contact.items():
-                        if isinstance(info, dict):
-                            info_str = "\n".join(f"{k}: {v}" for k, v in info.items())
-                            parts.append(f"[{section}]\n{info_str}")
-                        else:
-                            parts.append(f"[{section}] {info}")
-                    contact_text = "\n\n".join(parts)
-
-                # 최종 content
-                content = description_text
-                if contact_text:
-                    content += "\n\n[연락처 정보]\n" + contact_text
-
-                # metadata
-                metadata = {
-                    "category": item.get("category", ""),
-                    "subcategory": item.get("subcategory", ""),
-                    "title": item.get("title", ""),
-                    "tab": item.get("tab", ""),
-                    "url": item.get("url", ""),
-                }
-
-                all_documents.append(Document(page_content=content, metadata=metadata))
-
-        # notices.json 처리
-        elif "notices" in file.name:
-            for item in data if isinstance(data, list) else [data]:
-                metadata = {
-                    "source": item.get("source", ""),
-                    "title": item.get("title", ""),
-                    "author": item.get("author", ""),
-                    "date": item.get("date", ""),
-                }
-                content = item.get("content", "")
-                all_documents.append(Document(page_content=content, metadata=metadata))
-
-        else:
-            print(f"알 수 없는 파일 형식: {file.name}")
-
-    return all_documents
+## 2: 저장된 JSON 파일을 Document로 변환 (src/data/ingest.py의 어댑터로 항목 단위 스트리밍)
+def json_to_documents(json_files: List[str]) -> Iterator[Document]:
+    return IngestPipeline.from_paths(json_files).iter_documents()
 
 
 # def json_to_documents(json_path:str) -> List[Document]:
@@ -164,14 +108,22 @@ def json_to_documents(json_files: List[str]) -> List[Document]:
 #     return documents
 
 
-## 3: Document를 더 작은 document로 변환
-def chunk_documents(documents: List[Document]) -> List[Document]:
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=200)
-    return text_splitter.split_documents(documents)
+## 3: Document를 더 작은 document로 변환 (섹션/연락처/문단 경계에서, 임베딩 토크나이저 기준 예산까지)
+def chunk_documents(documents: Iterable[Document], embeddings: CachedEmbeddings) -> List[Document]:
+    chunker = StructuredChunker(settings.CHUNK_MAX_TOKENS, tokenizer_length(embeddings))
+    return chunker.split_documents(documents)
 
 ## 4: Document를 벡터DB로 저장
-def save_to_vector_store(documents: List[Document]) -> None:
-    embeddings = HuggingFaceEmbeddings(model_name="jhgan/ko-sbert-nli")
+def get_embeddings() -> CachedEmbeddings:
+    # 디스크 캐시에 있는 텍스트는 모델을 다시 돌리지 않음
+    return CachedEmbeddings(
+        HuggingFaceEmbeddings(model_name="jhgan/ko-sbert-nli"),
+        model_name="jhgan/ko-sbert-nli",
+        cache_dir=settings.EMBED_CACHE_DIR,
+        max_entries=settings.EMBED_CACHE_MAX,
+    )
+
+def save_to_vector_store(documents: List[Document], embeddings: CachedEmbeddings) -> None:
     vector_store = FAISS.from_documents(documents, embedding=embeddings)
     vector_store.save_local("faiss_index")
 
@@ -180,14 +132,17 @@ def save_to_vector_store(documents: List[Document]) -> None:
 ############################### 2단계 : RAG 기능 구현과 관련된 함수들 ##########################
 
 
+## 임베딩 모델·벡터 DB는 프로세스당 한 번만 로드해 모든 세션이 공유
+@st.cache_resource(show_spinner="모델을 불러오는 중...")
+def load_vector_store() -> FAISS:
+    return FAISS.load_local("faiss_index", get_embeddings(), allow_dangerous_deserialization=True)
+
 ## 사용자 질문에 대한 RAG 처리
 @st.cache_data
 def process_question(user_question, history_text):
 
-    embeddings = HuggingFaceEmbeddings(model_name="jhgan/ko-sbert-nli")
-
     ## 벡터 DB 호출
-    new_db = FAISS.load_local("faiss_index", embeddings, allow_dangerous_deserialization=True)
+    new_db = load_vector_store()
 
     ## 관련 문서 3개를 호출하는 Retriever 생성
     retriever = new_db.as_retriever(search_kwargs={"k": 3})
@@ -196,10 +151,11 @@ def process_question(user_question, history_text):
 
     ## RAG 체인 선언
     chain = get_rag_chain()
-    ## 질문과 문맥을 넣어서 체인 결과 호출
+    ## 질문과 문맥을 넣어서 체인 결과 호출 (문장 단위로 중복을 빼고 토큰 예산까지만)
+    packer = ContextPacker(settings.CONTEXT_MAX_TOKENS, tokenizer_length(new_db.embedding_function))
     response = chain.invoke({
         "question": user_question, 
-        "context": retrieve_docs,
+        "context": packer.pack(user_question, retrieve_docs),
         "history": history_text
     })
 
@@ -211,6 +167,7 @@ def process_question(user_question, history_text):
 # 곧바로 응답결과를 말해줘
 
 
+@st.cache_resource
 def get_rag_chain() -> Runnable:
     template = """
     다음의 컨텍스트를 활용해서 질문에 답변해줘
@@ -242,13 +199,17 @@ def main():
     if not os.path.exists("faiss_index"):
         json_files = ["database/detail_data.json", "database/notices.json"]
         all_documents = json_to_documents(json_files)
-        smaller_documents = chunk_documents(all_documents)
+        embeddings = get_embeddings()
+        smaller_documents = chunk_documents(all_documents, embeddings)
         # json_file = "database/detail_data.json"
         # json_document = json_to_documents(json_file)
         # smaller_documents = chunk_documents(json_document)
-        save_to_vector_store(smaller_documents)
+        save_to_vector_store(smaller_documents, embeddings)
 
     st.set_page_config("로욜라도서관 FAQ 챗봇", layout="wide")
+    # 첫 질문 전에 미리 로드
+    load_vector_store()
+    get_rag_chain()
     st.header("로욜라도서관 FAQ 챗봇")
     
     if "chat_history" not in st.session_state:
@@ -279,7 +240,7 @@ def main():
                 message_placeholder.write("🤔 답변을 불러오는 중...")
         
         # 이 부분에 with 블록을 사용하지 않음
-        history_text = format_history_for_prompt(st.session_state.chat_history, window_size=8)
+        history_text = format_history_for_prompt(st.session_state.chat_history)
         response, context = process_question(user_question, history_text)
         
         with right_column:
@@ -294,6 +255,7 @@ def main():
             message_placeholder.write(response)
             
         st.session_state.chat_history.append({"role": "assistant", "content": response})
+        update_summary(st.session_state.chat_history)
 
 
 if __name__ == "__main__":
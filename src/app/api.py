@@ -0,0 +1,195 @@
+"""Streamlit과 분리된 HTTP 백엔드. 워커 프로세스마다 ChatService(모델·인덱스)를 한 번 올린다.
+
+    PYTHONPATH=src python -m app.api --workers 4 --port 8000
+    PYTHONPATH=src uvicorn app.api:app --workers 4
+
+POST /ask          {"question": "...", "history": [{"role": "user", "content": "..."}], "summary": "", "summarized": 0}
+POST /ask/stream   같은 본문, text/event-stream (sources → token... → summary → done)
+                   summary/summarized는 응답에 온 값을 다음 요청에 그대로 돌려보낸다 (대화 요약, rag/memory.py)
+GET  /notices      공지 목록 (limit), GET /notices/detail?url=...
+GET  /health       모델 로딩 상태 (준비 전 503)
+GET  /metrics      Prometheus 텍스트 (단계별 지연 히스토그램, 캐시 적중, LLM 토큰, 후보 수)
+GET  /stats        캐시/동시성/빌드 통계와 단계별 p50/p95 (JSON)
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import List
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from core.config import settings
+from core.metrics import metrics as registry
+from services.chat_service import ChatService, ServiceBusy
+from services.notice_repository import get_repository
+from services.warmup import get_warmup
+
+
+class ChatMessage(BaseModel):
+    role: str
+    content: str
+
+
+class AskRequest(BaseModel):
+    question: str = Field(min_length=1)
+    history: List[ChatMessage] = []
+    summary: str = ""
+    summarized: int = Field(0, ge=0)  # history 앞쪽에서 summary에 이미 합친 메시지 수
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 워커가 뜨자마자 백그라운드에서 모델을 올린다 (/health가 준비 여부를 알려 줌)
+    get_warmup()
+    yield
+
+
+app = FastAPI(title=settings.APP_TITLE, lifespan=lifespan)
+
+
+def _service() -> ChatService:
+    warmup = get_warmup()
+    if warmup.state == "failed":
+        raise HTTPException(500, f"워밍업 실패: {warmup.error}")
+    if not warmup.ready:
+        raise HTTPException(503, "모델을 불러오는 중입니다.", headers={"Retry-After": "5"})
+    return warmup.wait(0)
+
+
+def _busy(e: Exception) -> HTTPException:
+    return HTTPException(503, str(e), headers={"Retry-After": "1"})
+
+
+@app.post("/ask")
+async def ask(req: AskRequest):
+    svc = _service()
+    history = [m.model_dump() for m in req.history]
+    # 요약에 합칠 메시지는 이번 답변과 상관없는 오래된 것들이므로 답변과 동시에 갱신한다
+    summary = asyncio.ensure_future(svc.asummarize(history, req.summary, req.summarized))
+    try:
+        answer = await svc.aanswer(req.question, history, req.summary, req.summarized)
+        text, summarized = await summary
+    except ServiceBusy as e:
+        raise _busy(e)
+    except asyncio.TimeoutError:
+        raise HTTPException(504, "답변 생성 시간이 초과되었습니다.")
+    finally:
+        # 어떤 예외(클라이언트 연결 끊김 포함)로 끝나도 요약 작업을 남겨 두지 않는다
+        summary.cancel()
+    return {"answer": answer.text, "sources": [asdict(s) for s in answer.sources],
+            "summary": text, "summarized": summarized}
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/ask/stream")
+async def ask_stream(req: AskRequest):
+    svc = _service()
+    history = [m.model_dump() for m in req.history]
+    events = svc.aanswer_stream(req.question, history, req.summary, req.summarized)
+    summary = asyncio.ensure_future(svc.asummarize(history, req.summary, req.summarized))
+    started = False
+    try:
+        # 첫 이벤트(출처)까지 받아 본 뒤 응답을 시작해야 혼잡/시간 초과를 상태 코드로 돌려줄 수 있다
+        first = await events.__anext__()
+        started = True
+    except StopAsyncIteration:
+        first, started = None, True
+    except ServiceBusy as e:
+        raise _busy(e)
+    except asyncio.TimeoutError:
+        raise HTTPException(504, "답변 생성 시간이 초과되었습니다.")
+    finally:
+        # 응답을 시작하지 못했으면 정리는 여기서 (시작했으면 body()의 finally가 맡는다)
+        if not started:
+            summary.cancel()
+            await events.aclose()
+
+    async def body():
+        event = first
+        try:
+            while event is not None:
+                if event.type == "sources":
+                    yield _sse("sources", [asdict(s) for s in event.sources])
+                else:
+                    yield _sse("token", event.text)
+                try:
+                    event = await events.__anext__()
+                except StopAsyncIteration:
+                    event = None
+            text, summarized = await summary
+            yield _sse("summary", {"summary": text, "summarized": summarized})
+            yield _sse("done", {})
+        except asyncio.TimeoutError:
+            yield _sse("error", "답변 생성 시간이 초과되었습니다.")
+        finally:
+            summary.cancel()
+            await events.aclose()
+
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/notices")
+def notices(limit: int = 50):
+    df = get_repository().list_notices()
+    return df.head(limit).to_dict(orient="records")
+
+
+@app.get("/notices/detail")
+def notice_detail(url: str):
+    detail = get_repository().get_detail(url)
+    if detail is None:
+        raise HTTPException(404, "공지를 찾을 수 없습니다.")
+    return detail
+
+
+@app.get("/health")
+def health():
+    status = get_warmup().status()
+    return JSONResponse(status, status_code=200 if status["state"] == "ready" else 503)
+
+
+@app.get("/metrics")
+def metrics():
+    # 모델 로딩 중에도 긁어 갈 수 있도록 ChatService를 거치지 않는다
+    return PlainTextResponse(registry.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats")
+def stats():
+    return _service().stats()
+
+
+def _sync_index():
+    from data.ingest import IngestPipeline
+    from index.faiss_store import FaissStore
+    print("[api] 인덱스 동기화:", FaissStore().sync(IngestPipeline.from_settings().iter_documents()))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default=settings.API_HOST)
+    ap.add_argument("--port", type=int, default=settings.API_PORT)
+    ap.add_argument("--workers", type=int, default=settings.API_WORKERS)
+    args = ap.parse_args()
+    import uvicorn
+    if args.workers > 1 and settings.REFRESH_IN_PROCESS:
+        print("[api] 워커가 여럿이면 REFRESH_IN_PROCESS=False로 두고 `python -m scheduler`를 따로 띄우세요.")
+    if args.workers > 1:
+        # 워커들이 동시에 인덱스를 다시 쓰지 않도록 먼저 한 번 동기화 (모델은 짧게 뜨는 자식 프로세스에만)
+        proc = mp.get_context("spawn").Process(target=_sync_index)
+        proc.start()
+        proc.join()
+    # 워커마다 별도 프로세스 → 모델·인덱스도 워커마다 한 벌. 인덱스 파일은 읽기만 공유하고,
+    # 임베딩 캐시는 파일 잠금과 행별 키 태그로 여러 프로세스가 함께 쓴다 (index/embedding_cache.py)
+    uvicorn.run("app.api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
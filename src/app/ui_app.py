@@ -1,40 +1,73 @@
 import streamlit as st
-from services.chat_service import ChatService
+from services.warmup import get_warmup
 from services.notice_crawler import show_notices
 import warnings
 
 warnings.filterwarnings("ignore", category=FutureWarning, module="torch")
 
-@st.cache_resource
+# 프로세스 시작 직후 백그라운드에서 모델/인덱스 로딩 (세션 간 공유)
+warmup = get_warmup()
+
 def get_service():
-    return ChatService()
+    if warmup.ready:
+        return warmup.wait()
+    with st.spinner("모델을 불러오는 중입니다..."):
+        return warmup.wait()
 
 st.set_page_config("로욜라도서관 FAQ 챗봇", layout="wide")
+status = warmup.status()
+if status["state"] == "ready":
+    st.sidebar.caption(f"✅ 준비 완료 (로딩 {status['timings'].get('load_total', 0):.1f}초)")
+elif status["state"] == "failed":
+    st.sidebar.error(f"모델 로딩 실패: {status['error']}")
+else:
+    st.sidebar.caption("⏳ 모델 준비 중...")
 left, right = st.columns([1, 1])
 
 with left:
     st.header("로욜라도서관 FAQ 챗봇")
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
+    # 오래된 대화의 요약과 거기 합친 메시지 수 (최근 몇 개만 원문으로 프롬프트에 들어감)
+    if "summary" not in st.session_state:
+        st.session_state.summary = ""
+        st.session_state.summarized = 0
     if st.sidebar.button("대화 초기화"):
         st.session_state.chat_history = []
+        st.session_state.summary = ""
+        st.session_state.summarized = 0
 
     q = st.text_input("로욜라 도서관에 대해서 질문해 주세요", placeholder="방학 중 도서관 이용 시간은?")
-    if q:
-        st.session_state.chat_history.append({"role": "user", "content": q})
-        svc = get_service()
-        ans = svc.answer(q, st.session_state.chat_history)
-        st.session_state.chat_history.append({"role": "assistant", "content": ans.text})
-
     for m in st.session_state.chat_history[-12:]:
         st.chat_message("user" if m["role"]=="user" else "assistant").write(m["content"])
 
-    if q and ans.sources:
-        for s in ans.sources:
-            with st.expander("관련 문서"):
-                st.write(s.snippet)
-                if s.url:
-                    st.write(s.url)
+    if q:
+        st.session_state.chat_history.append({"role": "user", "content": q})
+        st.chat_message("user").write(q)
+        answer_box = st.chat_message("assistant")
+        sources_box = st.container()
+
+        svc = get_service()
+        events = svc.answer_stream(q, st.session_state.chat_history,
+                                   st.session_state.summary, st.session_state.summarized)
+        # 첫 이벤트는 검색 결과 → 답변 생성 전에 관련 문서부터 보여준다
+        sources = next(events).sources
+        with sources_box:
+            for s in sources:
+                with st.expander("관련 문서"):
+                    st.write(s.snippet)
+                    if s.url:
+                        st.write(s.url)
+        with answer_box:
+            text = st.write_stream(e.text for e in events)
+        st.session_state.chat_history.append({"role": "assistant", "content": text})
+        # 답변을 다 보여 준 뒤에 요약을 갱신한다 (몇 턴에 한 번만 LLM 호출)
+        st.session_state.summary, st.session_state.summarized = svc.summarize(
+            st.session_state.chat_history, st.session_state.summary, st.session_state.summarized)
+        with st.sidebar.expander("캐시 통계"):
+            st.json(svc.stats())
+        with st.sidebar.expander("시작 시간"):
+            st.json(warmup.status()["timings"])
 
 with right:
     show_notices()
@@ -0,0 +1,65 @@
+"""인덱스 빌드 임베딩 처리량(chunks/sec)을 워커 수·배치 크기별로 잰다 (임베딩 캐시는 쓰지 않음).
+
+    PYTHONPATH=src python -m bench.embed_throughput --workers 1 2 4 --batch 16 32 --limit 2000
+
+workers=1은 현재 프로세스에서 길이순 배치로, 2 이상은 ParallelEmbedder 프로세스 풀로 계산한다.
+모델 로딩 시간은 빼고 잰다.
+"""
+import argparse
+import os
+import time
+import numpy as np
+from core.config import settings
+from data.chunker import StructuredChunker, tokenizer_length
+from data.ingest import IngestPipeline
+from index.parallel_embed import ParallelEmbedder, default_threads, load_hf_embeddings
+
+
+def _in_process(model, texts: list, batch: int) -> float:
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    t = time.perf_counter()
+    for k in range(0, len(order), batch):
+        np.asarray(model.embed_documents([texts[i] for i in order[k:k + batch]]), dtype=np.float32)
+    return time.perf_counter() - t
+
+
+def _pooled(texts: list, workers: int, batch: int, threads: int) -> float:
+    with ParallelEmbedder(settings.EMBEDDING_MODEL, workers, batch, threads) as pool:
+        # 워커마다 모델을 올리는 시간은 빼기 위해 작은 배치로 먼저 깨운다
+        for _ in pool.embed(texts[:workers * batch]):
+            pass
+        t = time.perf_counter()
+        for _ in pool.embed(texts):
+            pass
+        return time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--batch", type=int, nargs="+", default=[settings.EMBED_BATCH_SIZE])
+    ap.add_argument("--threads", type=int, default=settings.EMBED_TORCH_THREADS, help="워커당 torch 스레드 (0=자동)")
+    ap.add_argument("--limit", type=int, default=0)
+    args = ap.parse_args()
+
+    model = load_hf_embeddings(settings.EMBEDDING_MODEL, max(args.batch))
+    chunker = StructuredChunker(settings.CHUNK_MAX_TOKENS, tokenizer_length(model))
+    texts = [c.page_content for c in chunker.split_documents(IngestPipeline.from_settings().iter_documents())]
+    if args.limit:
+        texts = texts[:args.limit]
+
+    print(f"model={settings.EMBEDDING_MODEL} chunks={len(texts)} cpus={os.cpu_count()}")
+    print(f"{'workers':>8}{'threads':>9}{'batch':>7}{'seconds':>10}{'chunks/s':>10}")
+    for batch in args.batch:
+        for workers in args.workers:
+            if workers == 1:
+                threads = args.threads or default_threads(1)
+                seconds = _in_process(model, texts, batch)
+            else:
+                threads = args.threads or default_threads(workers)
+                seconds = _pooled(texts, workers, batch, threads)
+            print(f"{workers:>8}{threads:>9}{batch:>7}{seconds:>10.2f}{len(texts) / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""FAISS 인덱스 종류별 recall / 검색 지연 / 메모리를 Flat 기준선과 비교한다.
+
+    PYTHONPATH=src python -m bench.index_factory --specs Flat SQ8 HNSW32 "IVF16,PQ32" --k 10
+
+질의는 database/test_data.json의 제목을 쓰고, 정답은 같은 벡터에 대한 Flat(정확) 검색 결과다.
+"""
+import argparse
+import json
+import time
+import faiss
+import numpy as np
+from core.config import settings
+from data.ingest import IngestPipeline
+from index.faiss_store import FaissStore, build_faiss_index
+
+
+def load_queries(path: str, limit: int) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    titles = [item.get("title", "") for item in data if item.get("title")]
+    return titles[:limit] if limit else titles
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--specs", nargs="+", default=["Flat", "SQ8", "HNSW32", "IVF16,PQ32"])
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", default="database/test_data.json")
+    ap.add_argument("--limit", type=int, default=0)
+    ap.add_argument("--params", default="", help='faiss 검색 파라미터, 예: "nprobe=8"')
+    args = ap.parse_args()
+    settings.INDEX_SEARCH_PARAMS = args.params
+
+    store = FaissStore()
+    chunks = store.split(IngestPipeline.from_settings().iter_documents())
+    vectors = store.embed_chunks(chunks)
+    queries = np.asarray([store.emb.embed_query(q) for q in load_queries(args.queries, args.limit)],
+                         dtype=np.float32)
+    k = min(args.k, len(vectors))
+
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    _, truth = flat.search(queries, k)
+    print(f"chunks={len(vectors)} dim={vectors.shape[1]} queries={len(queries)} k={k}")
+    print(f"{'spec':<16}{'build(s)':>10}{'recall@k':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'size(KB)':>10}")
+
+    for spec in args.specs:
+        t = time.perf_counter()
+        index = build_faiss_index(spec, vectors)
+        build_s = time.perf_counter() - t
+
+        lat = []
+        hits = 0
+        for i in range(len(queries)):
+            t = time.perf_counter()
+            _, got = index.search(queries[i:i + 1], k)
+            lat.append((time.perf_counter() - t) * 1000)
+            hits += len(set(got[0]) & set(truth[i]))
+        recall = hits / (k * len(queries))
+        size_kb = faiss.serialize_index(index).nbytes / 1024
+        p50, p95 = np.percentile(lat, [50, 95])
+        print(f"{spec:<16}{build_s:>10.3f}{recall:>10.3f}{p50:>10.3f}{p95:>10.3f}{size_kb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""공지 게시판을 흉내 내는 로컬 HTTP 서버 + 크롤러 벤치마크.
+
+database/notices.json으로 목록(/bbs/list/1?pn=N)과 상세(/bbs/content/1_<번호>) 페이지를 만들고,
+ETag/Last-Modified 조건부 요청에 304로 응답한다. --delay로 왕복 지연을 흉내 낼 수 있다.
+
+    PYTHONPATH=src python -m bench.notice_fixture --delay 30
+"""
+import argparse
+import hashlib
+import html
+import json
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import requests
+from services.notice_fetcher import HEADERS, NoticeFetcher
+
+PAGE_SIZE = 10
+LAST_MODIFIED = formatdate(usegmt=True)
+
+
+def _detail_page(n: dict) -> str:
+    body = html.escape(n["content"]).replace("\n", "<br>")
+    return (
+        "<html><body><div class='board-view'>"
+        f"<h3>{html.escape(n['title'])}</h3>"
+        f"<div class='boardContent'><p>{body}</p><img src='/files/{n['no']}.png'></div>"
+        f"<ul class='addFiles'><li><a href='/bbs/download/{n['no']}'>첨부_{n['no']}.pdf</a></li></ul>"
+        "<a href='/common/files/privacy'>개인정보/비밀번호 관리</a>"
+        "</div></body></html>"
+    )
+
+
+def _list_page(rows: list) -> str:
+    trs = "".join(
+        f"<tr><td>{n['no']}</td><td><a href='/bbs/content/1_{n['no']}'>{html.escape(n['title'])}</a></td>"
+        f"<td>{html.escape(n['author'])}</td><td>{n['date']}</td><td>0</td></tr>"
+        for n in rows
+    )
+    return f"<html><body><table><tbody>{trs}</tbody></table></body></html>"
+
+
+def load_fixture_notices(path: str = "database/notices.json") -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # 최신 글일수록 번호가 크다
+    total = len(data)
+    return [dict(item, no=str(60000 + total - i)) for i, item in enumerate(data)]
+
+
+class FixtureServer:
+    def __init__(self, notices: list, delay_ms: float = 0.0):
+        self.notices = notices
+        self.by_no = {n["no"]: n for n in notices}
+        self.delay = delay_ms / 1000
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.delay:
+                    time.sleep(server.delay)
+                url = urlparse(self.path)
+                if url.path == "/bbs/list/1":
+                    page = int(parse_qs(url.query).get("pn", ["1"])[0])
+                    rows = server.notices[(page - 1) * PAGE_SIZE: page * PAGE_SIZE]
+                    return self._send(_list_page(rows))
+                if url.path.startswith("/bbs/content/1_"):
+                    n = server.by_no.get(url.path.rsplit("_", 1)[-1])
+                    if n is None:
+                        return self.send_error(404)
+                    return self._send(_detail_page(n), conditional=True)
+                self.send_error(404)
+
+            def _send(self, text: str, conditional: bool = False):
+                data = text.encode("utf-8")
+                etag = '"' + hashlib.md5(data).hexdigest() + '"'
+                if conditional and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                if conditional:
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", LAST_MODIFIED)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def detail_urls(self) -> list:
+        return [f"{self.base_url}/bbs/content/1_{n['no']}" for n in self.notices]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--delay", type=float, default=20.0, help="요청당 인위적 지연(ms)")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=50.0, help="초당 최대 요청 수")
+    args = ap.parse_args()
+
+    server = FixtureServer(load_fixture_notices(), delay_ms=args.delay).start()
+    urls = server.detail_urls()
+    try:
+        # 1) 기존 방식: 매번 새 연결, 직렬
+        t = time.perf_counter()
+        for u in urls:
+            requests.get(u, headers=HEADERS, timeout=10).raise_for_status()
+        serial = time.perf_counter() - t
+
+        with tempfile.TemporaryDirectory() as d:
+            state = f"{d}/crawl_cache.json"
+            # 2) Session 재사용 + 동시 요청 (콜드)
+            fetcher = NoticeFetcher(server.base_url, args.workers, args.rate, state_path=state)
+            t = time.perf_counter()
+            fetcher.fetch_details(urls)
+            cold = time.perf_counter() - t
+            cold_stats = dict(fetcher.stats)
+
+            # 3) 저장된 ETag로 조건부 요청 (변경 없음 → 304)
+            fetcher = NoticeFetcher(server.base_url, args.workers, args.rate, state_path=state)
+            t = time.perf_counter()
+            fetcher.fetch_details(urls)
+            warm = time.perf_counter() - t
+            warm_stats = dict(fetcher.stats)
+    finally:
+        server.stop()
+
+    print(f"notices={len(urls)} delay={args.delay}ms workers={args.workers} rate={args.rate}/s")
+    print(f"serial requests.get : {serial:7.2f}s")
+    print(f"pooled concurrent   : {cold:7.2f}s  {cold_stats}")
+    print(f"conditional (304)   : {warm:7.2f}s  {warm_stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""공지 상세 HTML 파싱 마이크로 벤치마크: 기존 경로(bs4 파싱 + 화면에서 HTML 재파싱) vs lxml 한 번 파싱.
+
+--pages 로 저장해 둔 상세 페이지(*.html) 디렉터리를 주면 그것을, 없으면 notices.json으로 만든
+픽스처 페이지를 쓴다. 두 경로의 결과(제목/본문/첨부)가 같은지도 확인한다.
+
+    PYTHONPATH=src python -m bench.notice_parse --pages saved_notices/ --repeat 5
+"""
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from bench.notice_fixture import _detail_page, load_fixture_notices
+from services.notice_parser import BASE_URL, parse_notice_detail
+
+
+def _legacy_parse(html: str, url: str) -> dict:
+    # 변경 전 parse_notice_detail (html.parser, 원문 HTML을 결과에 실어 보냄)
+    s = BeautifulSoup(html, "html.parser")
+    content = (
+        s.select_one(".boardContent") or
+        s.select_one(".board-view .board-txt") or
+        s.select_one(".bbs_view .view_con") or
+        s.select_one(".contents") or
+        s.select_one("article") or
+        s.select_one("#content")
+    )
+    body_parts = []
+    if content:
+        for img in content.find_all("img"):
+            body_parts.append(f"![이미지]({urljoin(BASE_URL, img.get('src'))})")
+        for br in content.find_all("br"):
+            br.replace_with("\n")
+        text_only = re.sub(r'\n{3,}', '\n\n', content.get_text()).strip()
+        if text_only:
+            body_parts.append(text_only)
+
+    seen = set()
+    attachments = []
+    for a in s.select("a[href]"):
+        href = a["href"]
+        if any(k in href.lower() for k in ["download", "attach", "file", "files"]):
+            att_url = urljoin(BASE_URL, href)
+            if att_url not in seen:
+                seen.add(att_url)
+                attachments.append({"name": a.get_text(strip=True), "url": att_url})
+
+    title = (s.select_one("h3, h2, .title, .board-tit") or content)
+    return {
+        "url": url,
+        "title": title.get_text(strip=True) if title else "",
+        "body": "\n".join(body_parts),
+        "attachments": attachments,
+        "html": html,
+    }
+
+
+def _legacy_ui_files(detail: dict) -> list:
+    # 변경 전 show_notices: 상세를 볼 때마다 원문 HTML을 다시 파싱해 addFiles만 골랐다
+    soup = BeautifulSoup(detail["html"], "html.parser")
+    links = {urljoin(BASE_URL, a["href"]) for a in soup.select("ul.addFiles a[href]")}
+    return [a for a in detail["attachments"]
+            if a["url"] in links and "개인정보/비밀번호 관리" not in a["name"]]
+
+
+def _squash(text: str) -> str:
+    return " ".join(text.split())
+
+
+def load_pages(pages_dir: str = None) -> list:
+    if pages_dir:
+        return [(p.name, p.read_text(encoding="utf-8")) for p in sorted(Path(pages_dir).glob("*.html"))]
+    return [(n["no"], _detail_page(n)) for n in load_fixture_notices()]
+
+
+def _timed(fn, pages, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for name, html in pages:
+            fn(html, name)
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", default=None, help="저장된 상세 페이지(*.html) 디렉터리")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        raise SystemExit("파싱할 페이지가 없습니다")
+
+    def legacy(html, url):
+        d = _legacy_parse(html, url)
+        d["files"] = _legacy_ui_files(d)
+        return d
+
+    mismatches = 0
+    for name, html in pages:
+        old, new = legacy(html, name), parse_notice_detail(html, name)
+        # libxml2는 태그 사이 공백뿐인 텍스트를 버리므로 본문은 공백을 접어서 비교
+        if any(old[k] != new[k] for k in ("title", "attachments", "files")) or \
+                _squash(old["body"]) != _squash(new["body"]):
+            mismatches += 1
+
+    t_old = _timed(legacy, pages, args.repeat)
+    t_new = _timed(parse_notice_detail, pages, args.repeat)
+    size_old = sum(len(json.dumps(_legacy_parse(h, n), ensure_ascii=False).encode()) for n, h in pages)
+    size_new = sum(len(json.dumps(parse_notice_detail(h, n), ensure_ascii=False).encode()) for n, h in pages)
+
+    n = len(pages)
+    print(f"pages={n} repeat={args.repeat} (best)  mismatches={mismatches}")
+    print(f"bs4 + UI re-parse : {t_old * 1000 / n:7.3f} ms/page  payload {size_old / 1024:8.1f} KiB")
+    print(f"lxml single pass  : {t_new * 1000 / n:7.3f} ms/page  payload {size_new / 1024:8.1f} KiB")
+    print(f"speedup           : {t_old / t_new:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""검색 품질(recall@k, MRR)과 단계별 지연(p50/p95), 인덱스 빌드 시간/메모리를 잰다. LLM·네트워크 없이.
+
+    PYTHONPATH=src python -m bench.retrieval --k 1 4 10 20
+    PYTHONPATH=src python -m bench.retrieval --set HYBRID_WEIGHTS=0.5,0.5 --set CHUNK_MAX_TOKENS=320 \
+        --baseline bench_base.json --out bench_new.json
+
+질의는 database/test_data.json의 제목(+탭)이고 정답은 그 항목의 URL이다 (같은 질의에 URL이 여럿이면
+그중 하나만 맞혀도 정답). 말뭉치는 운영과 같은 INGEST_SOURCES이고, 정답 URL이 말뭉치에 없는 질의는
+뺀다 (test_data를 말뭉치에 넣으면 제목 찾기가 되어 버린다). 인덱스와 임베딩 캐시는 임시 폴더에 새로
+만든다 (--embed-cache로 캐시를 지정할 수 있지만 운영 캐시는 쓰지 말 것). 순위는 URL 단위로 센다
+(같은 URL의 청크가 여럿이면 처음 나온 것만).
+
+--baseline을 주면 같은 목록·k에서 recall/MRR이 --max-drop보다 떨어졌을 때 종료 코드 1로 끝난다.
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import fields
+from typing import Dict, List, Sequence, Set, Tuple
+import faiss
+import numpy as np
+from core.config import settings
+from core.metrics import metrics, span
+from data.ingest import IngestPipeline
+from index.faiss_store import FaissStore
+from retrieval.hybrid import HybridRetrieverFactory
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def load_queries(path: str, limit: int) -> List[Tuple[str, Set[str]]]:
+    """(질의, 정답 URL 집합). 제목에 탭 이름을 붙여 같은 제목의 다른 탭을 구분한다."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    expected: Dict[str, Set[str]] = defaultdict(set)
+    for item in data:
+        title, tab, url = item.get("title", ""), item.get("tab") or "", item.get("url", "")
+        if not title or not url:
+            continue
+        query = f"{title} {tab}" if tab and tab != "Unknown" else title
+        expected[query].add(url)
+    queries = list(expected.items())
+    return queries[:limit] if limit else queries
+
+
+def in_corpus(queries: List[Tuple[str, Set[str]]], urls: Set[str]) -> List[Tuple[str, Set[str]]]:
+    """정답 URL을 말뭉치에 있는 것으로 좁히고, 하나도 없으면 그 질의는 뺀다."""
+    out = []
+    for query, truth in queries:
+        truth = truth & urls
+        if truth:
+            out.append((query, truth))
+    return out
+
+
+def parse_override(raw: str):
+    """KEY=VALUE를 Settings 필드의 현재 타입에 맞게 바꾼다 (tuple은 쉼표로 구분한 숫자)."""
+    key, _, value = raw.partition("=")
+    names = {f.name for f in fields(settings)}
+    if key not in names:
+        raise SystemExit(f"알 수 없는 설정: {key}")
+    current = getattr(settings, key)
+    if isinstance(current, bool):
+        return key, value.lower() in ("1", "true", "yes", "on")
+    if isinstance(current, tuple):
+        return key, tuple(float(v) for v in value.split(","))
+    return key, type(current)(value)
+
+
+def url_ranking(docs) -> List[str]:
+    seen, out = set(), []
+    for d in docs:
+        url = d.metadata.get("url", "")
+        if url not in seen:
+            seen.add(url)
+            out.append(url)
+    return out
+
+
+def score(rankings: Sequence[List[str]], truth: Sequence[Set[str]], ks: Sequence[int]) -> dict:
+    first = np.array([next((r for r, u in enumerate(rank, 1) if u in t), 0)
+                      for rank, t in zip(rankings, truth)])
+    out = {f"recall@{k}": float(np.mean((first > 0) & (first <= k))) for k in ks}
+    out["mrr"] = float(np.mean(np.where(first > 0, 1.0 / np.maximum(first, 1), 0.0)))
+    return out
+
+
+def _max_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def build_index(sources) -> Tuple[FaissStore, dict]:
+    store = FaissStore()
+    rss0 = _max_rss_mb()
+    t = time.perf_counter()
+    store.build(IngestPipeline(sources).iter_documents())
+    seconds = time.perf_counter() - t
+    return store, {
+        "seconds": round(seconds, 3),
+        "chunks": store.vs.index.ntotal,
+        "faiss_mb": round(faiss.serialize_index(store.vs.index).nbytes / 2 ** 20, 2),
+        "peak_rss_growth_mb": round(_max_rss_mb() - rss0, 1),
+        "embed": store.embed_stats,
+    }
+
+
+def stage_latency() -> Dict[str, dict]:
+    prefix = 'rag_stage_seconds{stage="'
+    out = {}
+    for key, h in metrics.snapshot()["histograms"].items():
+        if key.startswith(prefix):
+            stage = key[len(prefix):-2]
+            out[stage] = {"count": h["count"], "p50_ms": round(h["p50"] * 1000, 3),
+                          "p95_ms": round(h["p95"] * 1000, 3)}
+    return out
+
+
+def run(queries, ks: Sequence[int], rerank: bool, sources) -> dict:
+    store, build = build_index(sources)
+    total = len(queries)
+    queries = in_corpus(queries, {d.metadata.get("url", "") for d in store.ordered_chunks()})
+    hybrid = HybridRetrieverFactory(store).create()
+    pipeline = hybrid
+    if rerank:
+        from retrieval.reranker import CrossEncoderWrapper
+        pipeline = CrossEncoderWrapper(hybrid, top_n=settings.TOP_N_RERANKED).get()
+
+    texts = [q for q, _ in queries]
+    truth = [t for _, t in queries]
+    # 1) 실제 검색 경로 그대로 돌려 단계별 지연을 모은다
+    metrics.reset()
+    final = []
+    for q in texts:
+        with span("query"):
+            final.append(url_ranking(pipeline.invoke(q)))
+    latency = stage_latency()
+
+    # 2) 희소/밀집/결합 목록을 따로 채점 (가중치·후보 수 튜닝용)
+    lists = defaultdict(list)
+    for q in texts:
+        sparse_ids, dense_ids = hybrid.search_lists(q)
+        lists["sparse"].append(url_ranking(store.get_documents(sparse_ids)))
+        lists["dense"].append(url_ranking(store.get_documents(dense_ids)))
+        lists["hybrid"].append(url_ranking(hybrid.fuse([sparse_ids, dense_ids])))
+    if rerank:
+        lists["rerank"] = final
+
+    return {
+        "queries": len(texts),
+        "queries_skipped": total - len(texts),
+        "build": build,
+        "quality": {name: score(r, truth, ks) for name, r in lists.items()},
+        "latency": latency,
+    }
+
+
+def compare(report: dict, baseline: dict, max_drop: float) -> List[str]:
+    failures = []
+    for name, now in report["quality"].items():
+        before = baseline.get("quality", {}).get(name, {})
+        for metric, value in now.items():
+            if metric in before and before[metric] - value > max_drop:
+                failures.append(f"{name} {metric}: {before[metric]:.3f} → {value:.3f}")
+    return failures
+
+
+def print_report(report: dict, ks: Sequence[int]):
+    b = report["build"]
+    print(f"chunks={b['chunks']} queries={report['queries']} (정답이 말뭉치에 없어 뺀 질의 "
+          f"{report['queries_skipped']}) build={b['seconds']:.2f}s "
+          f"faiss={b['faiss_mb']}MB peak_rss+={b['peak_rss_growth_mb']}MB "
+          f"embedded={b['embed'].get('embedded', 0)} cached={b['embed'].get('cached', 0)}")
+    cols = [f"R@{k}" for k in ks] + ["MRR"]
+    print(f"{'list':<10}" + "".join(f"{c:>8}" for c in cols))
+    for name, q in report["quality"].items():
+        vals = [q[f"recall@{k}"] for k in ks] + [q["mrr"]]
+        print(f"{name:<10}" + "".join(f"{v:>8.3f}" for v in vals))
+    print(f"{'stage':<24}{'count':>7}{'p50(ms)':>10}{'p95(ms)':>10}")
+    for stage, s in sorted(report["latency"].items()):
+        print(f"{stage:<24}{s['count']:>7}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", default="database/test_data.json")
+    ap.add_argument("--limit", type=int, default=0)
+    ap.add_argument("--k", type=int, nargs="+", default=[1, 4, 10, 20])
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Settings 덮어쓰기 (여러 번)")
+    ap.add_argument("--rerank", action="store_true", help="cross-encoder 재정렬까지 포함 (모델이 로컬에 있어야 함)")
+    ap.add_argument("--embed-cache", help="임베딩 캐시 폴더 (기본: 빈 임시 캐시, 빌드 시간에 임베딩 포함)")
+    ap.add_argument("--out", help="결과 JSON 저장 경로")
+    ap.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    ap.add_argument("--max-drop", type=float, default=0.01)
+    args = ap.parse_args()
+
+    overrides = dict(parse_override(s) for s in args.set)
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    sources = tuple(settings.INGEST_SOURCES)
+
+    tmp = tempfile.mkdtemp(prefix="bench_retrieval_")
+    settings.INDEX_DIR = f"{tmp}/index"
+    # 벤치 빌드(CHUNK_MAX_TOKENS 등을 바꾼 청크)가 운영 임베딩 캐시를 채우거나 밀어내지 않도록 기본은 임시 캐시
+    settings.EMBED_CACHE_DIR = args.embed_cache or f"{tmp}/embedding_cache"
+    try:
+        queries = load_queries(args.queries, args.limit)
+        report = run(queries, args.k, args.rerank, sources)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    report["settings"] = {k: list(v) if isinstance(v, tuple) else v for k, v in overrides.items()}
+    report["model"] = settings.EMBEDDING_MODEL
+    print_report(report, args.k)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            failures = compare(report, json.load(f), args.max_drop)
+        for line in failures:
+            print("REGRESSION", line)
+        if failures:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
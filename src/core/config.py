@@ -5,22 +5,101 @@ from pathlib import Path
 class Settings:
     APP_TITLE: str = "로욜라도서관 FAQ 챗봇"
     DATA_JSON: str = "database/detail_data.json"
+    NOTICES_JSON: str = "database/notices.json"
     INDEX_DIR: str = "faiss_index"
 
     # Embeddings
     EMBEDDING_MODEL: str = "intfloat/multilingual-e5-base"  # 또는 "BAAI/bge-m3"
+    EMBED_CACHE_DIR: str = "embedding_cache"  # 모델별 하위 폴더에 저장
+    EMBED_CACHE_MAX: int = 50000
+    EMBED_WORKERS: int = 1  # 인덱스 빌드 시 임베딩 프로세스 수 (1이면 현재 프로세스)
+    EMBED_BATCH_SIZE: int = 32
+    EMBED_TORCH_THREADS: int = 0  # 워커당 torch 스레드 (0이면 CPU 수 / 워커 수)
 
     # Retrieval
-    TOP_K_CANDIDATES: int = 20
+    TOP_K_CANDIDATES: int = 20  # RRF 결합 후 재정렬로 넘길 후보 수
     TOP_N_RERANKED: int = 4
+    SPARSE_K: int = 12
+    DENSE_K: int = 12
+    HYBRID_WEIGHTS: tuple = (0.4, 0.6)  # (희소, 밀집)
+    RRF_K: int = 60
+    HYBRID_WORKERS: int = 4
+
+    # Query routing (retrieval/router.py): FAQ만 / 공지만 / 둘 다
+    ROUTER_ENABLED: bool = True
+    ROUTER_NOTICE_THRESHOLD: float = 0.8  # p(공지)가 이 이상이면 공지만 검색
+    ROUTER_FAQ_THRESHOLD: float = 0.2  # 이 이하면 FAQ만, 그 사이면 둘 다
+    ROUTER_KEYWORD_WEIGHT: float = 1.0  # 단서 단어 하나가 더하거나 빼는 로짓
+    ROUTER_TOP_CATEGORIES: int = 0  # FAQ를 질의와 가까운 분류 상위 N개로 좁힘 (0이면 끔)
+    ROUTER_REFIT_DRIFT: float = 0.05  # 라벨(원천·분류) 비율이 마지막 학습 때보다 이만큼 움직여야 라우터를 다시 학습
+
+    # Recency (retrieval/recency.py): 공지 작성일 기준 기간 필터와 최신성 가중
+    RECENCY_WEIGHT: float = 0.3  # 결합 점수 배율 1 - w + w * 0.5^(나이/반감기) (0이면 끔, 날짜 없는 FAQ는 1)
+    RECENCY_HALF_LIFE_DAYS: float = 180.0
+    RECENCY_WINDOW: bool = True  # 질의의 기간 표현(오늘, 이번 주, 최근, 2024년, 3월 ...)으로 공지 후보를 좁힘
+    RECENCY_WINDOW_SLACK_DAYS: int = 30  # 기간 시작보다 이만큼 먼저 올라온 공지까지 포함 (미리 하는 공지)
+    RECENCY_RECENT_DAYS: int = 90  # "최근", "요즘"
+
+    # Rerank
+    RERANK_MODEL: str = "BAAI/bge-reranker-v2-m3"
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_MAX_LENGTH: int = 512  # (질의, 청크) 쌍을 이 토큰 수로 자름
+    RERANK_CACHE_SIZE: int = 4096
+    RERANK_AGREE_TOP_N: int = 3  # 희소/밀집 상위 N이 같으면 재정렬 생략 (0이면 끔)
+
+    # Answer cache (의미 유사 질문 재사용)
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.95  # 코사인 유사도
+    ANSWER_CACHE_TTL: int = 6 * 3600  # 초
+    ANSWER_CACHE_MAX: int = 1000
+
+    # Async serving (ChatService.aanswer)
+    ASYNC_MAX_CONCURRENCY: int = 16  # 동시에 처리하는 요청 수 (나머지는 대기열)
+    ASYNC_CPU_WORKERS: int = 4  # 임베딩/재정렬용 스레드 수
+    ASYNC_QUEUE_TIMEOUT: float = 10.0  # 대기열에서 기다리는 최대 시간(초)
+    ASYNC_REQUEST_TIMEOUT: float = 60.0  # 요청 하나의 최대 처리 시간(초)
+
+    # HTTP API (app/api.py)
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    API_WORKERS: int = 1
+
+    # Metrics (core/metrics.py)
+    TRACE_LOG: bool = True  # 요청마다 단계별 소요 시간을 "rag.trace" 로거에 JSON 한 줄로
 
     # LLM
     LLM_MODEL: str = "gemini-1.5-flash"
     TEMPERATURE: float = 0.2
 
-    # Chunking
-    CHUNK_SIZE: int = 800
-    CHUNK_OVERLAP: int = 100
+    # Prompt (rag/context.py, rag/memory.py)
+    CONTEXT_MAX_TOKENS: int = 1200  # 검색 컨텍스트 예산 (임베딩 토크나이저 기준, 출처 머리글 포함)
+    HISTORY_KEEP_MESSAGES: int = 4  # 요약하지 않고 그대로 넣는 최근 메시지 수
+    SUMMARY_FOLD_MESSAGES: int = 4  # 이만큼 쌓이면 한 번에 요약에 합친다 (LLM 호출 빈도)
+    SUMMARY_MAX_CHARS: int = 400
+
+    # Ingestion (어댑터 이름, 경로) — data/ingest.py
+    INGEST_SOURCES: tuple = (("detail", "database/detail_data.json"), ("notices", "database/notices.json"))
+
+    # Chunking (임베딩 모델 토크나이저 기준, 머리글 포함)
+    CHUNK_MAX_TOKENS: int = 480  # e5 최대 입력 512 토큰 안쪽
+
+    # Index (faiss index_factory 문자열: "Flat", "SQ8", "HNSW32", "IVF64,PQ16" 등)
+    INDEX_FACTORY: str = "Flat"
+    INDEX_SEARCH_PARAMS: str = ""  # 예: "nprobe=8" (IVF), "efSearch=64" (HNSW)
+    INDEX_KEEP_VERSIONS: int = 3  # faiss_index/v<N> 중 남겨 둘 최신 버전 수 (다른 프로세스가 아직 읽고 있을 수 있음)
+    INDEX_WATCH_SECONDS: float = 5.0  # CURRENT를 확인해 새 버전으로 바꾸는 주기 (0이면 끔)
+
+    # Notice crawl
+    NOTICE_RETENTION_DAYS: int = 730  # 이보다 오래된 공지는 크롤/보관하지 않음
+    NOTICE_REFRESH_MINUTES: int = 5
+    REFRESH_IN_PROCESS: bool = True  # 앱 프로세스 안에서 크롤→색인→교체 (API 워커가 여럿이면 끄고 scheduler를 따로)
+    CRAWL_WORKERS: int = 8
+    CRAWL_RATE: float = 10.0  # 초당 최대 요청 수
+    CRAWL_STATE: str = "database/crawl_state.json"
+    CRAWL_CACHE: str = "database/crawl_cache.json"  # URL별 ETag/Last-Modified + 파싱 결과
+    NOTICE_DB: str = "database/notices.db"  # UI용 공지 저장소 (프로세스 간 공유)
+    NOTICE_STALE_SECONDS: int = 300  # 이보다 오래되면 읽을 때 백그라운드 갱신
+    NOTICE_BACKFILL_BATCH: int = 50  # 스냅샷으로만 채운 공지 중 갱신 한 번에 상세(첨부)를 받아 올 수
 
     def index_path(self) -> Path:
         return Path(self.INDEX_DIR)
@@ -0,0 +1,205 @@
+"""파이프라인 단계별 지연/카운터 수집 (Prometheus 텍스트와 JSON 로그로 내보냄).
+
+    with span("retrieve.dense", k=12):
+        ...
+    metrics.inc("rag_cache_total", cache="answer", result="hit")
+
+span은 rag_stage_seconds{stage=...} 히스토그램에 기록되고, 가장 바깥 span이 끝나면 그 안의 span들을
+한 줄 JSON으로 "rag.trace" 로거에 남긴다 (TRACE_LOG가 켜져 있을 때). 스레드 풀로 넘길 때는
+contextvars.copy_context().run으로 감싸야 같은 trace에 붙는다.
+yield를 사이에 둔 구간(스트리밍)은 span 대신 직접 잰 뒤 record()로 남긴다.
+"""
+import bisect
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from core.config import settings
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+trace_log = logging.getLogger("rag.trace")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                    for k, v in items)
+    return "{" + body + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: Iterable[float], recent: int = 2048):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        # 분위수(p50/p95)용 최근 관측값
+        self.recent: deque = deque(maxlen=recent)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self, qs=(50, 95)) -> Dict[str, float]:
+        if not self.recent:
+            return {f"p{q}": 0.0 for q in qs}
+        values = np.percentile(np.fromiter(self.recent, dtype=np.float64), qs)
+        return {f"p{q}": float(v) for q, v in zip(qs, values)}
+
+
+class MetricsRegistry:
+    """카운터와 히스토그램 (라벨별). 프로세스 하나에 하나 (metrics)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._hists: Dict[str, Dict[Labels, _Histogram]] = {}
+
+    def counter(self, name: str, help: str = ""):
+        with self._lock:
+            self._help.setdefault(name, ("counter", help))
+            self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help: str = "", buckets: Iterable[float] = LATENCY_BUCKETS):
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help))
+            self._buckets.setdefault(name, tuple(buckets))
+            self._hists.setdefault(name, {})
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            self._help.setdefault(name, ("counter", ""))
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._hists.setdefault(name, {})
+            self._help.setdefault(name, ("histogram", ""))
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            hist.observe(value)
+
+    def reset(self):
+        with self._lock:
+            for series in self._counters.values():
+                series.clear()
+            for series in self._hists.values():
+                series.clear()
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help) in sorted(self._help.items()):
+                if help:
+                    lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for key, v in sorted(self._counters.get(name, {}).items()):
+                        lines.append(f"{name}{_fmt_labels(key)} {v:g}")
+                    continue
+                for key, h in sorted(self._hists.get(name, {}).items()):
+                    cum = 0
+                    for le, c in zip(h.buckets, h.counts):
+                        cum += c
+                        lines.append(f"{name}_bucket{_fmt_labels(key, (('le', f'{le:g}'),))} {cum}")
+                    lines.append(f"{name}_bucket{_fmt_labels(key, (('le', '+Inf'),))} {h.count}")
+                    lines.append(f"{name}_sum{_fmt_labels(key)} {h.sum:.6f}")
+                    lines.append(f"{name}_count{_fmt_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """JSON용: 카운터 값과 히스토그램 count/mean/p50/p95."""
+        out = {"counters": {}, "histograms": {}}
+        with self._lock:
+            for name, series in self._counters.items():
+                for key, v in series.items():
+                    out["counters"][name + _fmt_labels(key)] = v
+            for name, series in self._hists.items():
+                for key, h in series.items():
+                    out["histograms"][name + _fmt_labels(key)] = {
+                        "count": h.count,
+                        "mean": h.sum / h.count if h.count else 0.0,
+                        **h.quantiles(),
+                    }
+        return out
+
+
+metrics = MetricsRegistry()
+metrics.histogram("rag_stage_seconds", "파이프라인 단계별 소요 시간(초)")
+metrics.histogram("rag_candidates", "단계별 후보 문서 수", COUNT_BUCKETS)
+metrics.counter("rag_cache_total", "캐시 조회 결과 (cache=answer|rerank|embedding, result=hit|miss)")
+metrics.counter("rag_llm_tokens_total", "LLM 토큰 수 (kind=input|output)")
+metrics.counter("rag_rerank_skipped_total", "희소/밀집 상위가 같아 재정렬을 건너뛴 질의 수")
+
+# 현재 trace: (trace id, 이 trace에서 끝난 span 목록)
+_trace: contextvars.ContextVar[Optional[Tuple[str, list]]] = contextvars.ContextVar("rag_trace", default=None)
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """stage 소요 시간을 기록한다. 블록 안에서 attrs에 값을 더 넣을 수 있다 (예: 후보 수)."""
+    current = _trace.get()
+    token = None
+    if current is None:
+        current = (uuid.uuid4().hex[:16], [])
+        token = _trace.set(current)
+    t0 = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        seconds = time.perf_counter() - t0
+        record(stage, seconds, **attrs)
+        if token is not None:
+            _trace.reset(token)
+            if settings.TRACE_LOG and trace_log.isEnabledFor(logging.INFO):
+                trace_log.info(json.dumps({"trace": current[0], "root": stage, "ms": round(seconds * 1000, 3),
+                                           "spans": current[1]}, ensure_ascii=False, default=str))
+
+
+def record(stage: str, seconds: float, **attrs):
+    """직접 잰 시간을 기록한다. 진행 중인 trace가 있으면 거기에도 붙는다."""
+    metrics.observe("rag_stage_seconds", seconds, stage=stage)
+    current = _trace.get()
+    if current is not None:
+        current[1].append({"stage": stage, "ms": round(seconds * 1000, 3), **attrs})
+
+
+def cache_result(cache: str, hit: bool, n: int = 1):
+    if n:
+        metrics.inc("rag_cache_total", n, cache=cache, result="hit" if hit else "miss")
+
+
+def observe_candidates(stage: str, n: int):
+    metrics.observe("rag_candidates", n, stage=stage)
+
+
+def count_tokens(usage: Optional[dict]):
+    """LLM 응답의 usage_metadata(input_tokens/output_tokens)를 누적한다. 없으면 무시."""
+    for kind in ("input", "output"):
+        n = (usage or {}).get(f"{kind}_tokens")
+        if n:
+            metrics.inc("rag_llm_tokens_total", n, kind=kind)
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict
 
 @dataclass
@@ -12,4 +12,10 @@ class Answer:
     text: str
     sources: List[Source]
 
+@dataclass
+class StreamEvent:
+    type: str  # "sources" | "token"
+    text: str = ""
+    sources: List[Source] = field(default_factory=list)
+
 Message = Dict[str, str]  # {"role": "user"|"assistant", "content": str}
@@ -0,0 +1,159 @@
+import math
+import re
+from functools import lru_cache
+from typing import Callable, List, Tuple
+from langchain_core.documents import Document
+
+# "[기능 및 특징]", "[연락처 정보]" 처럼 한 줄 전체가 대괄호인 줄은 섹션 제목
+_HEADING = re.compile(r"^\[[^\]\n]+\]$")
+_HEADER_KEYS = ("[제목]", "[분류]", "[작성일]")
+_BLOCKS = re.compile(r"\n[ \t\r\xa0]*\n")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+Section = Tuple[str, List[str]]  # (제목 줄, 문단 리스트)
+
+
+def _tokenizer(inner):
+    # langchain-huggingface는 버전에 따라 SentenceTransformer를 client 또는 _client에 둔다
+    client = getattr(inner, "client", None) or getattr(inner, "_client", None)
+    tokenizer = getattr(client, "tokenizer", None)
+    if tokenizer is None:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(inner.model_name)
+    return tokenizer
+
+
+def tokenizer_length(embeddings) -> Callable[[str], int]:
+    """임베딩 모델 자신의 토크나이저로 센 토큰 수 (CachedEmbeddings/HuggingFaceEmbeddings 모두 가능)."""
+    inner = getattr(embeddings, "inner", embeddings)
+    tokenizer = _tokenizer(inner)
+
+    @lru_cache(maxsize=65536)
+    def length(text: str) -> int:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    return length
+
+
+def doc_header(doc: Document) -> Tuple[str, str]:
+    """(머리글, 본문). 본문 앞에 [제목]/[분류] 줄이 있으면 그대로 쓰고, 없으면 메타데이터로 만든다."""
+    text = doc.page_content.replace("\r", "").strip()
+    lines = text.split("\n")
+    n = 0
+    while n < len(lines) and lines[n].startswith(_HEADER_KEYS):
+        n += 1
+    if n:
+        return "\n".join(lines[:n]), "\n".join(lines[n:]).strip()
+
+    m = doc.metadata
+    header = [f"[제목] {m['title']}"] if m.get("title") else []
+    if m.get("category"):
+        header.append(f"[분류] {m['category']}>{m.get('subcategory', '')}")
+    elif m.get("date"):
+        header.append(f"[작성일] {m['date']}")
+    return "\n".join(header), text
+
+
+def split_sections(body: str) -> List[Section]:
+    """빈 줄로 나눈 블록을 섹션으로 묶는다.
+
+    제목 줄로 시작하는 블록이 새 섹션을 열고, 제목 없는 블록은 앞 섹션에 이어 붙인다.
+    (공지처럼 제목이 하나도 없으면 문단 하나하나가 섹션)
+    """
+    sections: List[Section] = []
+    for block in _BLOCKS.split(body):
+        lines = [ln.strip() for ln in block.split("\n")]
+        lines = [ln for ln in lines if ln and ln != "\xa0"]
+        if not lines:
+            continue
+        heading = []
+        while lines and _HEADING.match(lines[0]):
+            heading.append(lines.pop(0))
+        if heading:
+            sections.append((" ".join(heading), ["\n".join(lines)] if lines else []))
+        elif sections and sections[-1][0]:
+            sections[-1][1].append("\n".join(lines))
+        else:
+            sections.append(("", ["\n".join(lines)]))
+    return [(h, paras) for h, paras in sections if paras]
+
+
+class StructuredChunker:
+    """FAQ/공지 문서를 섹션(description 항목, 연락처 블록, 공지 문단) 경계에서 자른다.
+
+    섹션을 통째로 토큰 예산(max_tokens)까지 채워 담고, 모든 청크 앞에 제목/분류 머리글을 붙인다.
+    한 섹션이 예산보다 크면 문단 → 줄 → 문장 순서로 나누고 섹션 제목을 반복한다. 겹침(overlap)은 없다.
+    """
+
+    def __init__(self, max_tokens: int, token_len: Callable[[str], int]):
+        self.max_tokens = max_tokens
+        self.token_len = token_len
+
+    def split_documents(self, docs: List[Document]) -> List[Document]:
+        chunks = []
+        for doc in docs:
+            for text in self.split_text(doc):
+                chunks.append(Document(page_content=text, metadata=dict(doc.metadata)))
+        return chunks
+
+    def split_text(self, doc: Document) -> List[str]:
+        header, body = doc_header(doc)
+        budget = max(self.max_tokens - self.token_len(header), self.max_tokens // 4)
+        sep = self.token_len("\n\n")
+        blocks = []
+        for heading, paras in split_sections(body):
+            blocks.extend(self._fit_section(heading, paras, budget))
+        if not blocks:
+            return [header] if header else []
+
+        packed, current, used = [], [], 0
+        for text, n in blocks:
+            if current and used + sep + n > budget:
+                packed.append(current)
+                current, used = [], 0
+            used += n + (sep if current else 0)
+            current.append(text)
+        packed.append(current)
+        prefix = header + "\n\n" if header else ""
+        return [prefix + "\n\n".join(group) for group in packed]
+
+    def _fit_section(self, heading: str, paras: List[str], budget: int) -> List[Tuple[str, int]]:
+        # (렌더링된 블록, 토큰 수) 리스트. 예산 안이면 섹션 하나가 블록 하나
+        text = "\n".join([heading] + paras) if heading else "\n".join(paras)
+        n = self.token_len(text)
+        if n <= budget:
+            return [(text, n)]
+
+        head_n = self.token_len(heading) if heading else 0
+        room = max(budget - head_n, 1)
+        pieces = []
+        for para in paras:
+            for line in para.split("\n"):
+                pieces.extend(self._split_line(line, room))
+
+        out, current, used = [], [], 0
+        for piece, m in pieces:
+            if current and used + m > room:
+                out.append((current, used))
+                current, used = [], 0
+            current.append(piece)
+            used += m
+        out.append((current, used))
+        lead = [heading] if heading else []
+        return [("\n".join(lead + group), head_n + used) for group, used in out]
+
+    def _split_line(self, line: str, room: int) -> List[Tuple[str, int]]:
+        n = self.token_len(line)
+        if n <= room:
+            return [(line, n)]
+        out = []
+        for sent in _SENTENCE.split(line):
+            m = self.token_len(sent)
+            if m <= room:
+                out.append((sent, m))
+                continue
+            # 문장 하나가 예산보다 길면 글자 수로 균등 분할
+            parts = math.ceil(m / room)
+            step = math.ceil(len(sent) / parts)
+            out.extend((sent[i:i + step], self.token_len(sent[i:i + step])) for i in range(0, len(sent), step))
+        return out
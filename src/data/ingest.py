@@ -0,0 +1,236 @@
+"""JSON 원천(detail_data / notices / test_data)을 하나의 경로로 Document 스트림으로 바꾼다.
+
+파일 전체를 json.load 하지 않고 항목 단위로 읽어(ijson이 있으면 ijson, 없으면 표준 라이브러리
+증분 디코더, .jsonl은 줄 단위) 어댑터가 Document로 바꾼다. 청킹/임베딩은 색인(FaissStore) 쪽에서
+전체 청크를 모아 한다.
+"""
+import hashlib
+import json
+import re
+import warnings
+from abc import ABC, abstractmethod
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from langchain_core.documents import Document
+from core.config import settings
+from core.text_utils import normalize
+
+try:
+    import ijson
+except ImportError:  # 선택 의존성
+    ijson = None
+
+_READ_SIZE = 1 << 16
+_SKIP = " \t\r\n,"
+
+
+def _iter_array(f, read_size: int = _READ_SIZE) -> Iterator[dict]:
+    # 최상위 배열을 원소 하나씩 디코드 (버퍼에 원소가 다 들어오지 않았으면 더 읽는다)
+    decoder = json.JSONDecoder()
+    buf, pos, eof = f.read(read_size), 0, False
+    buf = buf.lstrip("\ufeff \t\r\n")
+    if not buf.startswith("["):
+        raise ValueError("최상위가 JSON 배열이 아닙니다")
+    pos = 1
+    while True:
+        while pos < len(buf) and buf[pos] in _SKIP:
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            if pos == len(buf):
+                raise json.JSONDecodeError("need more data", buf, pos)
+            item, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield item
+
+
+def _top_is_array(path: Path) -> bool:
+    # 처음 나오는 공백 아닌 문자로 최상위 값의 종류를 본다
+    with open(path, "r", encoding="utf-8-sig") as f:
+        while chunk := f.read(256):
+            head = chunk.lstrip(" \t\r\n")
+            if head:
+                return head.startswith("[")
+    return False
+
+
+def iter_json_records(path: str) -> Iterator[dict]:
+    """JSON 배열(.json) 또는 JSON Lines(.jsonl)의 항목을 하나씩 돌려준다.
+
+    최상위가 배열이 아닌 .json은 (ijson 유무와 상관없이) 그 값 하나를 항목으로 본다.
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif not _top_is_array(path):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            yield json.load(f)
+    elif ijson is not None:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, "item", use_float=True)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from _iter_array(f)
+
+
+def stable_id(*parts: str) -> str:
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _lines(value) -> str:
+    # 항목 안의 줄 구분은 살리고 줄마다 정규화 (청커가 줄/섹션 경계에서 자른다)
+    if isinstance(value, list):
+        return "\n".join(normalize(v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)) for v in value)
+    if isinstance(value, dict):
+        return "\n".join(f"{k}: {normalize(str(v))}" for k, v in value.items())
+    return normalize(str(value))
+
+
+class SourceAdapter(ABC):
+    """원천 항목(dict) 하나를 Document로 바꾼다. 쓸 내용이 없으면 None."""
+
+    name = ""
+
+    @abstractmethod
+    def document(self, item: dict) -> Optional[Document]:
+        ...
+
+
+ADAPTERS: Dict[str, SourceAdapter] = {}
+
+
+def register_adapter(cls):
+    ADAPTERS[cls.name] = cls()
+    return cls
+
+
+@register_adapter
+class DetailAdapter(SourceAdapter):
+    """detail_data.json: description(dict/list/str) 항목과 contact 블록을 섹션으로."""
+
+    name = "detail"
+    source_type = "faq"
+
+    def document(self, item: dict) -> Optional[Document]:
+        content = item.get("description") or ""
+        if isinstance(content, dict):
+            sections = [f"[{k}]\n{_lines(v)}" for k, v in content.items()]
+        elif isinstance(content, list):
+            sections = [_lines(c) for c in content]
+        else:
+            sections = [_lines(content)]
+
+        contact = item.get("contact") or {}
+        if isinstance(contact, dict) and contact:
+            flat = {k: v for k, v in contact.items() if not isinstance(v, dict)}
+            if flat:
+                sections.append("[연락처 정보]\n" + _lines(flat))
+            # 부서별로 묶인 연락처는 블록마다 한 섹션
+            sections.extend(f"[연락처 정보]\n[{k}]\n{_lines(v)}" for k, v in contact.items() if isinstance(v, dict))
+
+        meta = {
+            "category": item.get("category", ""),
+            "subcategory": item.get("subcategory", ""),
+            "title": item.get("title", ""),
+            "tab": item.get("tab", "") or "",
+            "url": item.get("url", ""),
+        }
+        if not meta["title"] and not meta["url"]:
+            return None
+        meta["doc_id"] = stable_id(self.name, meta["url"], meta["title"], meta["tab"])
+        meta["source_type"] = self.source_type
+        body = "\n\n".join(s for s in sections if s.strip())
+        header = f"[제목] {meta['title']}\n[분류] {meta['category']}>{meta['subcategory']}"
+        return Document(page_content=f"{header}\n\n{body}", metadata=meta)
+
+
+@register_adapter
+class TestDataAdapter(DetailAdapter):
+    """test_data.json: detail과 같은 구조 (description은 문장 리스트, contact는 대개 null)."""
+
+    name = "test_data"
+
+
+@register_adapter
+class NoticeAdapter(SourceAdapter):
+    """notices.json: 본문을 문단(빈 줄) 단위로 정규화하고 제목/작성일 머리글을 붙인다."""
+
+    name = "notices"
+    source_type = "notice"
+
+    def document(self, item: dict) -> Optional[Document]:
+        url = item.get("source", "")
+        if not url:
+            return None
+        paras = []
+        for block in re.split(r"\n[ \t\r\xa0]*\n", (item.get("content") or "").replace("\r", "")):
+            lines = [normalize(ln) for ln in block.split("\n")]
+            lines = [ln for ln in lines if ln]
+            if lines:
+                paras.append("\n".join(lines))
+        meta = {
+            "title": item.get("title", ""),
+            "author": item.get("author", ""),
+            "date": item.get("date", ""),
+            "url": url,
+            "doc_id": stable_id(self.name, url),
+            "source_type": self.source_type,
+        }
+        header = f"[제목] {meta['title']}\n[작성일] {meta['date']}"
+        return Document(page_content=header + "\n\n" + "\n\n".join(paras), metadata=meta)
+
+
+def adapter_for(path: str) -> str:
+    # 파일 이름으로 어댑터 추정 (detail_data.json → detail)
+    name = Path(path).stem
+    for key in ("test_data", "notices", "detail"):
+        if key in name:
+            return key
+    raise ValueError(f"알 수 없는 파일 형식: {path}")
+
+
+class IngestPipeline:
+    """(어댑터 이름, 경로) 목록의 항목을 하나씩 읽어 Document를 돌려준다."""
+
+    def __init__(self, sources: Iterable[Tuple[str, str]]):
+        self.sources = list(sources)
+        self.stats: Counter = Counter()
+
+    @classmethod
+    def from_settings(cls) -> "IngestPipeline":
+        return cls(settings.INGEST_SOURCES)
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str]) -> "IngestPipeline":
+        return cls([(adapter_for(p), p) for p in paths])
+
+    def iter_documents(self) -> Iterator[Document]:
+        seen: Counter = Counter()
+        for name, path in self.sources:
+            if not Path(path).exists():
+                warnings.warn(f"원천 파일이 없어 건너뜁니다: {path}")
+                continue
+            adapter = ADAPTERS[name]
+            for item in iter_json_records(path):
+                doc = adapter.document(item) if isinstance(item, dict) else None
+                if doc is None:
+                    self.stats[f"{name}.skipped"] += 1
+                    continue
+                # 같은 키(url/제목/탭)가 여러 번 나오면 (표의 행 등) 등장 순번을 붙인다
+                base = doc.metadata["doc_id"]
+                if seen[base]:
+                    doc.metadata["doc_id"] = stable_id(base, str(seen[base]))
+                seen[base] += 1
+                self.stats[name] += 1
+                yield doc
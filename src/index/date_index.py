@@ -0,0 +1,105 @@
+"""청크 작성일 색인: chunk_id 순으로 정렬한 id 배열과 같은 순서의 작성일(1970-01-01부터 일 수).
+
+작성일 문자열은 청크가 색인에 들어올 때 한 번만 읽는다 (부분 갱신은 바뀐 청크만). 버전 폴더에
+dates.npz로 함께 저장하므로 불러올 때는 파싱하지 않는다. 날짜가 없는 청크(FAQ)는 NO_DATE.
+"""
+import re
+from datetime import date
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+import numpy as np
+from langchain_core.documents import Document
+
+DATES_FILE = "dates.npz"
+NO_DATE = np.iinfo(np.int32).min
+_DATE_RE = re.compile(r"(\d{4})\D(\d{1,2})\D(\d{1,2})")
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def parse_day(raw: Optional[str]) -> int:
+    m = _DATE_RE.search(raw or "")
+    if not m:
+        return NO_DATE
+    try:
+        return date(*map(int, m.groups())).toordinal() - _EPOCH
+    except ValueError:
+        return NO_DATE
+
+
+def to_day(d: date) -> int:
+    return d.toordinal() - _EPOCH
+
+
+class DateIndex:
+    def __init__(self, ids: np.ndarray, days: np.ndarray):
+        self.ids = ids  # 정렬된 chunk_id
+        self.days = days  # ids와 같은 순서 (int32)
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Document]) -> "DateIndex":
+        return cls.empty().apply(list(docs), [])
+
+    @classmethod
+    def empty(cls) -> "DateIndex":
+        return cls(np.empty(0, dtype=str), np.empty(0, dtype=np.int32))
+
+    def apply(self, added: List[Document], removed: Sequence[str]) -> "DateIndex":
+        """바뀐 청크만 반영한 새 색인 (이 객체는 그대로 두므로 서빙 중인 사본과 공유해도 된다)."""
+        drop = set(removed) | {d.metadata["chunk_id"] for d in added}
+        keep = np.fromiter((i not in drop for i in self.ids), dtype=bool, count=len(self.ids))
+        new_ids = np.asarray([d.metadata["chunk_id"] for d in added], dtype=str)
+        new_days = np.fromiter((parse_day(d.metadata.get("date")) for d in added), dtype=np.int32, count=len(added))
+        ids = np.concatenate([self.ids[keep], new_ids]) if len(new_ids) else self.ids[keep]
+        days = np.concatenate([self.days[keep], new_days])
+        order = np.argsort(ids, kind="stable")
+        return DateIndex(ids[order], days[order])
+
+    def lookup(self, ids: Sequence[str]) -> np.ndarray:
+        """ids의 작성일 (없는 id나 날짜 없는 청크는 NO_DATE). 정렬 배열 위 이진 탐색."""
+        ids = np.asarray(ids, dtype=str)
+        if not len(self.ids) or not len(ids):
+            return np.full(len(ids), NO_DATE, dtype=np.int32)
+        pos = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return np.where(self.ids[pos] == ids, self.days[pos], NO_DATE).astype(np.int32)
+
+    def save(self, path: Path):
+        np.savez(path / DATES_FILE, ids=self.ids, days=self.days)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["DateIndex"]:
+        if not (path / DATES_FILE).exists():
+            return None
+        with np.load(path / DATES_FILE) as f:
+            return cls(f["ids"], f["days"])
+
+
+class DatePositions:
+    """인덱스 위치별 작성일 (FAISS와 희소 인덱스는 같은 위치를 쓴다). 기간 조회는 작성일 순으로 정렬한 위치에서 이진 탐색."""
+
+    def __init__(self, days: np.ndarray, order: Optional[np.ndarray] = None):
+        self.days = days  # 위치 순서
+        if order is None:
+            dated = np.flatnonzero(days != NO_DATE)
+            order = dated[np.argsort(days[dated], kind="stable")]
+        self.order = order
+        self.sorted_days = days[self.order]
+        self.undated = np.flatnonzero(days == NO_DATE)
+
+    def apply(self, removed: np.ndarray, added_days: np.ndarray) -> "DatePositions":
+        """removed 위치를 빼고 작성일이 added_days인 청크를 끝에 붙인 새 객체 (다시 정렬하지 않고 끼워 넣음)."""
+        keep = np.ones(len(self.days), dtype=bool)
+        keep[removed] = False
+        shift = np.cumsum(~keep)
+        n = len(self.days) - len(removed)
+        days = np.concatenate([self.days[keep], np.asarray(added_days, dtype=np.int32)])
+        live = keep[self.order]
+        order = self.order[live] - shift[self.order[live]]
+        new = n + np.flatnonzero(days[n:] != NO_DATE)
+        new = new[np.argsort(days[new], kind="stable")]
+        at = np.searchsorted(self.sorted_days[live], days[new], side="right")
+        return DatePositions(days, np.insert(order, at, new))
+
+    def window(self, start: int, end: int) -> np.ndarray:
+        """작성일이 [start, end]인 위치 (정렬된 int64)."""
+        lo, hi = np.searchsorted(self.sorted_days, [start, end + 1])
+        return np.sort(self.order[lo:hi]).astype(np.int64)
@@ -0,0 +1,278 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from core.metrics import cache_result
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 행 태그 검사만
+    fcntl = None
+
+KEYS_FILE = "keys.json"
+VECTORS_FILE = "vectors.f32"
+TAGS_FILE = "tags.u64"  # 행마다 그 행에 든 키의 해시 (0이면 빈 행)
+LOCK_FILE = ".lock"
+QUERY_FLUSH_SECONDS = 30.0  # 질의 임베딩으로 늘어난 행을 keys.json에 적는 주기 (요청 경로 밖)
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^0-9A-Za-z._-]+", "__", model_name)
+
+
+def _tag(key: str) -> int:
+    return int(key[:16], 16) or 1
+
+
+class CachedEmbeddings(Embeddings):
+    """임베딩 결과를 디스크(memmap float32 행렬 + 키 인덱스)에 저장해 재사용하는 래퍼.
+
+    키는 (모델 이름, 문서/질의 구분, 공백 정규화한 텍스트)의 해시이고,
+    max_entries를 넘으면 가장 오래 쓰지 않은 행부터 덮어쓴다.
+
+    같은 폴더를 여러 프로세스(API 워커, Streamlit, scheduler, bench)가 함께 쓴다. 쓰기(행 배정 + keys.json)는
+    파일 잠금 안에서 다른 프로세스가 쓴 keys.json을 다시 읽어 합친 뒤 하고, 행마다 키 해시(tags.u64)를
+    같이 적어 두어 읽을 때 다른 텍스트의 벡터가 든 행은 캐시 미스로 본다.
+    질의 임베딩은 행에만 바로 쓰고, keys.json은 QUERY_FLUSH_SECONDS마다 백그라운드 스레드와 종료 시에 적는다.
+    """
+
+    def __init__(self, inner: Embeddings, model_name: str, cache_dir: str, max_entries: int = 50000):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.dir = Path(cache_dir) / _slug(model_name)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._rows: "OrderedDict[str, int]" = OrderedDict()  # key -> 행 번호 (LRU 순서)
+        self._dim = 0
+        self._mm: np.memmap | None = None
+        self._tags: np.memmap | None = None
+        self._keys_mtime = 0  # 마지막으로 읽거나 쓴 keys.json의 mtime (다른 프로세스가 바꿨는지 확인용)
+        self._dirty = 0
+        with self._file_lock():
+            self._open()
+        # atexit에 인스턴스를 직접 걸면 끝까지 붙잡히므로 약한 참조 목록으로 (_flush_all)
+        _live.add(self)
+
+    @contextmanager
+    def _file_lock(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.dir / LOCK_FILE, "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_keys(self):
+        keys_path = self.dir / KEYS_FILE
+        with open(keys_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._keys_mtime = os.stat(keys_path).st_mtime_ns
+        return data
+
+    def _open(self):
+        # 파일 잠금 안에서 호출
+        if not all((self.dir / f).exists() for f in (KEYS_FILE, VECTORS_FILE, TAGS_FILE)):
+            return
+        data = self._read_keys()
+        if data.get("capacity") != self.max_entries:
+            # 용량이 바뀌면 행 배치가 달라지므로 새로 시작
+            return
+        self._dim = data["dim"]
+        self._rows = OrderedDict((k, r) for k, r in data["rows"])
+        self._mm = np.memmap(self.dir / VECTORS_FILE, dtype=np.float32, mode="r+",
+                             shape=(self.max_entries, self._dim))
+        self._tags = np.memmap(self.dir / TAGS_FILE, dtype=np.uint64, mode="r+", shape=(self.max_entries,))
+
+    def _reload(self):
+        """다른 프로세스가 keys.json을 바꿨으면 그쪽 행 목록에 아직 안 적은 내 행을 합친다 (파일 잠금 안)."""
+        keys_path = self.dir / KEYS_FILE
+        if not keys_path.exists() or os.stat(keys_path).st_mtime_ns == self._keys_mtime:
+            return
+        data = self._read_keys()
+        if data.get("capacity") != self.max_entries or data.get("dim") != self._dim:
+            return
+        merged = OrderedDict((k, r) for k, r in data["rows"])
+        for k, r in self._rows.items():
+            merged.setdefault(k, r)
+        self._rows = merged
+
+    def _create(self, dim: int):
+        # 파일 잠금 안에서 호출. 그새 다른 프로세스가 만들어 두었으면 그것을 연다
+        self._open()
+        if self._mm is not None and self._dim == dim:
+            return
+        self._dim = dim
+        self._rows.clear()
+        # 이미 열어 둔 프로세스가 있을 수 있으므로 제자리에서 자르지 않고 새 파일로 바꿔 끼운다
+        tmp = f".{os.getpid()}.tmp"
+        np.memmap(self.dir / (VECTORS_FILE + tmp), dtype=np.float32, mode="w+", shape=(self.max_entries, dim)).flush()
+        np.memmap(self.dir / (TAGS_FILE + tmp), dtype=np.uint64, mode="w+", shape=(self.max_entries,)).flush()
+        os.replace(self.dir / (VECTORS_FILE + tmp), self.dir / VECTORS_FILE)
+        os.replace(self.dir / (TAGS_FILE + tmp), self.dir / TAGS_FILE)
+        self._mm = np.memmap(self.dir / VECTORS_FILE, dtype=np.float32, mode="r+", shape=(self.max_entries, dim))
+        self._tags = np.memmap(self.dir / TAGS_FILE, dtype=np.uint64, mode="r+", shape=(self.max_entries,))
+        self._write_keys()
+
+    def _key(self, kind: str, text: str) -> str:
+        norm = " ".join(text.split())
+        raw = f"{self.model_name}\x00{kind}\x00{norm}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        if self._mm is None:
+            return found
+        for k in keys:
+            row = self._rows.get(k)
+            if row is None or k in found:
+                continue
+            if self._tags[row] != _tag(k):
+                # 다른 프로세스가 이 행을 다른 키로 덮어썼다
+                del self._rows[k]
+                continue
+            self._rows.move_to_end(k)
+            found[k] = self._mm[row].tolist()
+        return found
+
+    def _store(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        dim = len(next(iter(items.values())))
+        with self._file_lock():
+            if self._mm is None or dim != self._dim:
+                self._create(dim)
+            self._reload()
+            free = iter(np.flatnonzero(self._tags == 0).tolist())
+            for k, vec in items.items():
+                tag = _tag(k)
+                row = self._rows.pop(k, None)
+                if row is None or self._tags[row] != tag:
+                    row = next(free, None)
+                    if row is None:
+                        _, row = self._rows.popitem(last=False)  # LRU 행 재사용
+                self._mm[row] = vec
+                self._tags[row] = tag
+                self._rows[k] = row
+        self._dirty += len(items)
+
+    def _write_keys(self):
+        # 파일 잠금 안에서 호출. 태그가 맞는 행만 적는다
+        rows = [(k, r) for k, r in self._rows.items() if self._tags[r] == _tag(k)]
+        tmp = self.dir / f"{KEYS_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"capacity": self.max_entries, "dim": self._dim, "rows": rows}, f)
+        os.replace(tmp, self.dir / KEYS_FILE)
+        self._keys_mtime = os.stat(self.dir / KEYS_FILE).st_mtime_ns
+
+    def _embed(self, kind: str, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(kind, t) for t in texts]
+        with self._lock:
+            found = self._lookup(keys)
+            missing = {}
+            for k, t in zip(keys, texts):
+                if k not in found and k not in missing:
+                    missing[k] = t
+            self.hits += len(texts) - sum(1 for k in keys if k in missing)
+            self.misses += len(missing)
+        cache_result("embedding", True, len(texts) - sum(1 for k in keys if k in missing))
+        cache_result("embedding", False, len(missing))
+        if missing:
+            if kind == "query":
+                vecs = [self.inner.embed_query(t) for t in missing.values()]
+            else:
+                vecs = self.inner.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vecs))
+            with self._lock:
+                self._store(computed)
+            found.update(computed)
+        return [found[k] for k in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        out = self._embed("doc", texts)
+        self.flush()
+        return out
+
+    def lookup_documents(self, texts: List[str]) -> Dict[int, np.ndarray]:
+        """캐시에 있는 문서 벡터만 {texts 안의 위치: 벡터}로. 나머지는 호출자가 계산해 store_documents로 넣는다."""
+        keys = [self._key("doc", t) for t in texts]
+        with self._lock:
+            found = self._lookup(keys)
+            self.hits += sum(1 for k in keys if k in found)
+        cache_result("embedding", True, len(found))
+        return {i: np.asarray(found[k], dtype=np.float32) for i, k in enumerate(keys) if k in found}
+
+    def store_documents(self, texts: List[str], vectors: np.ndarray):
+        with self._lock:
+            self.misses += len(texts)
+        cache_result("embedding", False, len(texts))
+        with self._lock:
+            self._store({self._key("doc", t): v for t, v in zip(texts, vectors)})
+
+    def embed_query(self, text: str) -> List[float]:
+        # keys.json 기록(파일 잠금)은 요청 경로에서 하지 않고 백그라운드 스레드와 종료 시에 한다
+        out = self._embed("query", [text])[0]
+        if self._dirty:
+            _ensure_flusher()
+        return out
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty or self._mm is None:
+                return
+            with self._file_lock():
+                self._mm.flush()
+                self._tags.flush()
+                self._reload()
+                self._write_keys()
+            self._dirty = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._rows)}
+
+
+_live: "weakref.WeakSet[CachedEmbeddings]" = weakref.WeakSet()
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_all():
+    for emb in list(_live):
+        try:
+            emb.flush()
+        except Exception as e:
+            print(f"[embedding_cache] 저장 실패: {e}")
+
+
+def _flush_loop():
+    while True:
+        time.sleep(QUERY_FLUSH_SECONDS)
+        _flush_all()
+
+
+def _ensure_flusher():
+    # 프로세스마다 하나. fork한 자식에는 스레드가 없으므로 처음 필요할 때 다시 띄운다
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_loop, name="embedding-cache-flush", daemon=True)
+            _flusher.start()
+
+
+atexit.register(_flush_all)
@@ -1,30 +1,503 @@
+import hashlib
+import json
+import shutil
+import time
+import warnings
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import faiss
+import numpy as np
 from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import List
 from langchain_core.documents import Document
 from core.config import settings
+from core.metrics import span
+from data.chunker import StructuredChunker, tokenizer_length
+from index import versions
+from index.date_index import DATES_FILE, DateIndex
+from index.embedding_cache import CachedEmbeddings
+from index.parallel_embed import ParallelEmbedder
+from index.sparse_index import SparseIndex, SparseRetriever
+
+MANIFEST_FILE = "manifest.json"
+DOC_MANIFEST_FILE = "doc_manifest.json"  # 원문 문서 단위 해시 (부분 갱신용)
+SPARSE_DIR = "sparse"
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.jsonl"  # pickle 대신 JSON Lines (FAISS 위치 순서)
+META_FILE = "index_meta.json"
+
+
+def _content_hash(doc: Document) -> str:
+    meta = {k: v for k, v in doc.metadata.items() if k != "chunk_id"}
+    raw = doc.page_content + "\x00" + json.dumps(meta, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _doc_key(m: dict) -> str:
+    return m.get("doc_id") or "|".join([m.get("url") or m.get("source", ""), m.get("title", ""), m.get("tab", "")])
+
+
+def build_faiss_index(spec: str, vectors: np.ndarray) -> faiss.Index:
+    """faiss index_factory 문자열(Flat, SQ8, HNSW32, IVF64,PQ16 ...)로 인덱스를 만들고 벡터를 넣는다."""
+    dim = vectors.shape[1]
+    index = faiss.index_factory(dim, spec)
+    if not index.is_trained:
+        try:
+            index.train(vectors)
+        except RuntimeError as e:
+            # 학습에 벡터가 모자라면 (IVF nlist > 청크 수 등) Flat으로 대체
+            warnings.warn(f"{spec} 학습 실패, Flat 인덱스로 대체합니다: {e}")
+            index = faiss.index_factory(dim, "Flat")
+    _apply_search_params(index)
+    index.add(vectors)
+    return index
+
+
+def built_spec(index: faiss.Index, spec: str) -> str:
+    """실제로 만들어진 인덱스 종류 (학습 실패로 Flat으로 대체됐으면 "Flat")."""
+    return "Flat" if spec != "Flat" and isinstance(faiss.downcast_index(index), faiss.IndexFlat) else spec
+
+
+def _apply_search_params(index: faiss.Index):
+    if settings.INDEX_SEARCH_PARAMS:
+        faiss.ParameterSpace().set_index_parameters(index, settings.INDEX_SEARCH_PARAMS)
+
+
+def filtered_search(index: faiss.Index, vec: np.ndarray, k: int,
+                    allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """allowed 위치(정렬된 int64)만 보고 검색한다. 필터는 IDSelector로 검색 전에 건다.
+
+    IDSelector를 못 받는 인덱스 종류면 넉넉히 찾은 뒤 걸러낸다.
+    """
+    if allowed is None:
+        return index.search(vec, k)
+    k = min(k, len(allowed))
+    if k == 0:
+        return np.empty((len(vec), 0), dtype=np.float32), np.empty((len(vec), 0), dtype=np.int64)
+    sel = faiss.IDSelectorBatch(allowed)
+    base = faiss.downcast_index(index)
+    # 검색 파라미터 객체를 넘기면 인덱스에 설정한 nprobe/efSearch 대신 이 값이 쓰이므로 옮겨 준다
+    if isinstance(base, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=sel, nprobe=base.nprobe)
+    elif isinstance(base, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=sel, efSearch=base.hnsw.efSearch)
+    elif isinstance(base, faiss.IndexFlatCodes):
+        params = faiss.SearchParameters(sel=sel)
+    else:
+        # 질의(행)마다 따로 거르고, k개가 안 되는 행은 faiss처럼 -1로 채운다
+        dist, idx = index.search(vec, min(index.ntotal, k * 4))
+        fill = -np.inf if index.metric_type == faiss.METRIC_INNER_PRODUCT else np.inf
+        out_d = np.full((len(vec), k), fill, dtype=dist.dtype)
+        out_i = np.full((len(vec), k), -1, dtype=idx.dtype)
+        for row in range(len(vec)):
+            keep = np.flatnonzero(np.isin(idx[row], allowed))[:k]
+            out_d[row, :len(keep)] = dist[row, keep]
+            out_i[row, :len(keep)] = idx[row, keep]
+        return out_d, out_i
+    return index.search(vec, k, params=params)
+
+
+def _supports_remove(index: faiss.Index) -> bool:
+    # Flat/SQ/PQ 계열은 remove_ids 후 위치가 당겨져 LangChain의 위치→id 매핑과 맞는다
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlatCodes)
+
 
 class FaissStore:
-    def __init__(self):
-        self.emb = HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
+    def __init__(self, emb: Optional[CachedEmbeddings] = None):
+        # emb를 넘기면 모델을 새로 올리지 않고 공유한다 (갱신 작업·사본용)
+        self.emb = emb or CachedEmbeddings(
+            HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL),
+            model_name=settings.EMBEDDING_MODEL,
+            cache_dir=settings.EMBED_CACHE_DIR,
+            max_entries=settings.EMBED_CACHE_MAX,
+        )
+        self.chunker = StructuredChunker(settings.CHUNK_MAX_TOKENS, tokenizer_length(self.emb))
         self.vs: FAISS | None = None
+        self.sparse: SparseIndex | None = None
+        # chunk_id -> 작성일 (공지 최신성, retrieval/recency.py)
+        self.dates: Optional[DateIndex] = None
+        # chunk_id(docstore id) -> 내용 해시
+        self.manifest: Dict[str, str] = {}
+        # doc_id -> {"type": source_type, "hash": 원문 해시}
+        self.doc_manifest: Dict[str, dict] = {}
+        # 읽거나 쓴 인덱스 버전 (faiss_index/v<N>, 버전 도입 전 폴더면 None)
+        self.version: Optional[int] = None
+        self._dir: Optional[Path] = None
+        # 실제로 만든 인덱스 종류 (INDEX_FACTORY 학습 실패 시 Flat)
+        self.factory = settings.INDEX_FACTORY
+        # 전체 재빌드 횟수 (답변 캐시 무효화 기준). 메타에 저장해 다른 프로세스가 불러온 버전과도 비교된다
+        self.generation = 0
+        # 마지막 임베딩 처리량 (chunks/sec 등)
+        self.embed_stats: dict = {}
 
-    def build(self, docs: List[Document]):
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-        )
-        chunks = splitter.split_documents(docs)
-        self.vs = FAISS.from_documents(chunks, embedding=self.emb)
-        self.vs.save_local(settings.INDEX_DIR)
+    def split(self, docs: Iterable[Document]) -> List[Document]:
+        chunks = self.chunker.split_documents(docs)
+        # 같은 원문에서 나온 청크는 순번으로 구분 → 재실행해도 동일한 id
+        ordinal = defaultdict(int)
+        for c in chunks:
+            m = c.metadata
+            key = _doc_key(m)
+            n = ordinal[key]
+            ordinal[key] += 1
+            m["chunk_id"] = hashlib.sha1(f"{key}#{n}".encode("utf-8")).hexdigest()[:16]
+        return chunks
+
+    def iter_embeddings(self, chunks: List[Document]) -> Iterator[Tuple[List[int], np.ndarray]]:
+        """(chunks 안의 위치 리스트, 벡터) 배치를 끝나는 대로 돌려준다.
+
+        캐시에 있는 벡터를 먼저 한 번에 내고, 나머지는 길이순 배치로 EMBED_WORKERS개 프로세스
+        (1이면 현재 프로세스)에서 계산한다. 처리량은 embed_stats에 남긴다.
+        """
+        texts = [c.page_content for c in chunks]
+        t0 = time.perf_counter()
+        cached = self.emb.lookup_documents(texts)
+        if cached:
+            yield list(cached), np.vstack(list(cached.values()))
+        missing = [i for i in range(len(texts)) if i not in cached]
+        workers = settings.EMBED_WORKERS
+        # 몇 배치 안 되는 증분 추가는 프로세스를 띄우는 비용이 더 크다
+        if workers > 1 and len(missing) >= workers * settings.EMBED_BATCH_SIZE:
+            with ParallelEmbedder(settings.EMBEDDING_MODEL, workers, settings.EMBED_BATCH_SIZE,
+                                  settings.EMBED_TORCH_THREADS) as pool:
+                for idx, vecs in pool.embed([texts[i] for i in missing]):
+                    pos = [missing[j] for j in idx]
+                    self.emb.store_documents([texts[p] for p in pos], vecs)
+                    yield pos, vecs
+        else:
+            workers = 1
+            missing.sort(key=lambda i: len(texts[i]), reverse=True)
+            step = settings.EMBED_BATCH_SIZE
+            for k in range(0, len(missing), step):
+                pos = missing[k:k + step]
+                vecs = np.asarray(self.emb.inner.embed_documents([texts[p] for p in pos]), dtype=np.float32)
+                self.emb.store_documents([texts[p] for p in pos], vecs)
+                yield pos, vecs
+        self.emb.flush()
+        seconds = time.perf_counter() - t0
+        self.embed_stats = {
+            "chunks": len(texts),
+            "cached": len(cached),
+            "embedded": len(missing),
+            "workers": workers,
+            "seconds": round(seconds, 3),
+            "chunks_per_sec": round(len(missing) / seconds, 1) if missing and seconds else 0.0,
+        }
+
+    def embed_chunks(self, chunks: List[Document]) -> np.ndarray:
+        out = None
+        for pos, vecs in self.iter_embeddings(chunks):
+            if out is None:
+                out = np.empty((len(chunks), vecs.shape[1]), dtype=np.float32)
+            out[pos] = vecs
+        return out if out is not None else np.zeros((0, 0), dtype=np.float32)
+
+    def _create_vs(self, chunks: List[Document]):
+        # 학습이 필요 없는 인덱스(Flat/HNSW/SQ 등)는 끝난 배치부터 바로 인덱스에 쓴다
+        ids = [c.metadata["chunk_id"] for c in chunks]
+        index, order = None, []
+        batches = self.iter_embeddings(chunks)
+        for pos, vecs in batches:
+            if index is None:
+                index = faiss.index_factory(vecs.shape[1], settings.INDEX_FACTORY)
+                if not index.is_trained:
+                    # IVF/PQ 등은 전체 벡터가 모인 뒤 학습하고 한 번에 넣는다
+                    full = np.empty((len(chunks), vecs.shape[1]), dtype=np.float32)
+                    full[pos] = vecs
+                    for rest, more in batches:
+                        full[rest] = more
+                    index = build_faiss_index(settings.INDEX_FACTORY, full)
+                    order = list(range(len(chunks)))
+                    break
+                _apply_search_params(index)
+            index.add(vecs)
+            order.extend(pos)
+        if index is None:
+            raise ValueError("색인할 청크가 없습니다")
+        self.factory = built_spec(index, settings.INDEX_FACTORY)
+        self.vs = FAISS(self.emb, index, InMemoryDocstore(dict(zip(ids, chunks))),
+                        {n: ids[i] for n, i in enumerate(order)})
+
+    @staticmethod
+    def _track(docs: Iterable[Document], seen: Dict[str, dict]) -> Iterator[Document]:
+        # 스트림을 흘려보내면서 문서 단위 해시를 모은다
+        for d in docs:
+            seen[_doc_key(d.metadata)] = {"type": d.metadata.get("source_type", ""), "hash": _content_hash(d)}
+            yield d
+
+    def build(self, docs: Iterable[Document]):
+        with span("index.build") as s:
+            seen: Dict[str, dict] = {}
+            with span("index.split"):
+                chunks = self.split(self._track(docs, seen))
+            s["chunks"] = len(chunks)
+            self.doc_manifest = seen
+            with span("index.embed"):
+                self._create_vs(chunks)
+            self.manifest = {c.metadata["chunk_id"]: _content_hash(c) for c in chunks}
+            with span("index.sparse"):
+                # 희소 인덱스 위치는 FAISS 위치와 같게 (부분 인덱스·작성일 위치를 같이 쓴다)
+                self.sparse = SparseIndex.build(self.ordered_chunks())
+            self.dates = DateIndex.from_documents(chunks)
+            self.generation = self._stored_generation() + 1
+            self._publish()
+
+    def sync(self, docs: Iterable[Document]) -> Dict[str, int]:
+        """바뀐 청크만 다시 임베딩해 인덱스를 갱신한다. 인덱스/매니페스트가 없으면 전체 빌드."""
+        with span("index.sync") as s:
+            result = self._sync(docs)
+            s.update(result)
+        return result
+
+    def _sync(self, docs: Iterable[Document]) -> Dict[str, int]:
+        if not self._index_current():
+            self.build(docs)
+            return {"added": len(self.manifest), "removed": 0, "unchanged": 0}
+
+        self.load()
+        seen: Dict[str, dict] = {}
+        with span("index.split"):
+            chunks = self.split(self._track(docs, seen))
+        current = {c.metadata["chunk_id"]: _content_hash(c) for c in chunks}
+        added, removed = self._diff(current)
+        if not added and not removed:
+            path = self._dir
+            if not all((path / f).exists() for f in (SPARSE_DIR, DOC_MANIFEST_FILE, DATES_FILE)):
+                # 희소 인덱스/문서 매니페스트/작성일 색인이 없던 예전 인덱스 → 임베딩 없이 채워 넣는다
+                self.sparse = SparseIndex.build(self.ordered_chunks())
+                self.doc_manifest = seen
+                self.dates = DateIndex.from_documents(chunks)
+                self._publish()
+            return {"added": 0, "removed": 0, "unchanged": len(current)}
+
+        added_ids = set(added)
+        self._apply_delta([c for c in chunks if c.metadata["chunk_id"] in added_ids], removed)
+        self.doc_manifest = seen
+        self._publish()
+        return {
+            "added": len(added),
+            "removed": len(removed),
+            "unchanged": len(current) - len(added),
+        }
+
+    def can_update(self) -> bool:
+        """update_source로 부분 갱신할 수 있는지 (현재 설정의 인덱스와 문서 매니페스트가 있어야 함)."""
+        return self._index_current() and (versions.current_dir(settings.index_path()) / DOC_MANIFEST_FILE).exists()
+
+    def update_source(self, docs: Iterable[Document], source_type: str) -> Dict[str, int]:
+        """source_type 하나의 문서 전체를 받아 바뀐 문서만 청킹·임베딩해 반영한다.
+
+        나머지 원천은 건드리지 않으므로 비용이 말뭉치 크기가 아니라 바뀐 문서 수에 비례한다
+        (저장은 예외).
+        """
+        with span("index.update", source=source_type) as s:
+            result = self._update_source(docs, source_type)
+            s.update(result)
+        return result
+
+    def _update_source(self, docs: Iterable[Document], source_type: str) -> Dict[str, int]:
+        self.load()
+        seen: Dict[str, dict] = {}
+        changed = [d for d in self._track(docs, seen)
+                   if self.doc_manifest.get(_doc_key(d.metadata)) != seen[_doc_key(d.metadata)]]
+        gone = [k for k, v in self.doc_manifest.items() if v["type"] == source_type and k not in seen]
+        result = {"docs_changed": len(changed), "docs_removed": len(gone), "added": 0, "removed": 0}
+        if not changed and not gone:
+            return result
+
+        with span("index.split"):
+            chunks = self.split(changed)
+        stale_docs = {_doc_key(d.metadata) for d in changed} | set(gone)
+        current = {c.metadata["chunk_id"]: _content_hash(c) for c in chunks}
+        old_ids = [cid for cid, d in self.vs.docstore._dict.items() if _doc_key(d.metadata) in stale_docs]
+        removed = [cid for cid in old_ids if current.get(cid) != self.manifest.get(cid)]
+        added = [c for c in chunks if self.manifest.get(c.metadata["chunk_id"]) != current[c.metadata["chunk_id"]]]
+        self._apply_delta(added, removed)
+        for k in gone:
+            self.doc_manifest.pop(k, None)
+        self.doc_manifest.update(seen)
+        self._publish()
+        result.update(added=len(added), removed=len(removed))
+        return result
+
+    def ordered_chunks(self) -> List[Document]:
+        """FAISS 위치 순서의 청크."""
+        return [self.vs.docstore.search(cid) for cid in self.position_ids()]
+
+    def position_ids(self) -> List[str]:
+        """FAISS 위치 순서의 chunk_id (희소 인덱스도 같은 순서)."""
+        vs = self.load()
+        return [vs.index_to_docstore_id[i] for i in range(vs.index.ntotal)]
+
+    def _apply_delta(self, added: List[Document], removed: List[str]):
+        # 내용이 바뀐 청크는 removed와 added 양쪽에 들어 있다 (삭제 후 재추가)
+        sparse = self.load_sparse()  # FAISS를 고치기 전 위치 기준으로 읽어 둔다
+        if removed and not _supports_remove(self.vs.index):
+            # IVF/HNSW는 제자리 삭제가 안 되므로 캐시된 벡터로 다시 조립
+            drop = set(removed)
+            keep = [d for d in self.ordered_chunks() if d.metadata["chunk_id"] not in drop]
+            with span("index.embed"):
+                self._create_vs(keep + added)
+        else:
+            if removed:
+                self.vs.delete(removed)
+            if added:
+                with span("index.embed"):
+                    vectors = self.embed_chunks(added)
+                self.vs.add_embeddings(list(zip([c.page_content for c in added], vectors)),
+                                       metadatas=[c.metadata for c in added],
+                                       ids=[c.metadata["chunk_id"] for c in added])
+        for cid in removed:
+            self.manifest.pop(cid, None)
+        self.manifest.update({c.metadata["chunk_id"]: _content_hash(c) for c in added})
+        # 희소 인덱스는 바뀐 청크만 토큰화한다. 제자리 삭제가 안 돼 FAISS를 다시 조립했으면 위치만 맞춘다
+        with span("index.sparse"):
+            self.sparse = self._aligned(sparse.update(removed, added))
+        # 작성일은 바뀐 청크만 읽는다
+        dates = self.load_dates()
+        self.dates = dates.apply(added, removed)
+
+    def vectors(self) -> np.ndarray:
+        """FAISS 위치 순서의 벡터. 복원이 안 되는 인덱스(PQ 등)면 임베딩 캐시에서 읽는다."""
+        vs = self.load()
+        try:
+            return vs.index.reconstruct_n(0, vs.index.ntotal)
+        except RuntimeError:
+            # 캐시된 벡터는 모델을 다시 돌리지 않는다
+            texts = [d.page_content for d in self.ordered_chunks()]
+            return np.asarray(self.emb.embed_documents(texts), dtype=np.float32)
+
+    def fork(self) -> "FaissStore":
+        """서빙용 사본. 임베딩 모델은 공유하고 FAISS 인덱스와 docstore는 복사한다
+        (이 객체를 계속 갱신해도 사본으로 검색 중인 요청에는 영향이 없다)."""
+        vs = self.load()
+        other = FaissStore(emb=self.emb)
+        index = faiss.clone_index(vs.index)
+        _apply_search_params(index)
+        other.vs = FAISS(self.emb, index, InMemoryDocstore(dict(vs.docstore._dict)), dict(vs.index_to_docstore_id))
+        # 희소 인덱스는 갱신 때마다 새로 만들어지므로 공유해도 된다
+        other.sparse = self.load_sparse()
+        other.dates = self.load_dates()
+        other.manifest = dict(self.manifest)
+        other.doc_manifest = dict(self.doc_manifest)
+        other.version, other._dir = self.version, self._dir
+        other.generation = self.generation
+        other.factory = self.factory
+        return other
+
+    def _diff(self, current: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        # 내용이 바뀐 청크는 삭제 후 재추가
+        added = [cid for cid, h in current.items() if self.manifest.get(cid) != h]
+        removed = [cid for cid, h in self.manifest.items() if current.get(cid) != h]
+        return added, removed
+
+    def _index_current(self) -> bool:
+        # 인덱스 종류나 임베딩 모델이 바뀌었으면 전체 재빌드
+        path = versions.current_dir(settings.index_path())
+        if not all((path / f).exists() for f in (MANIFEST_FILE, INDEX_FILE, DOCSTORE_FILE, META_FILE)):
+            return False
+        with open(path / META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        # requested: 설정했던 종류 (Flat으로 대체된 인덱스를 매번 다시 빌드하지 않도록 이것과 비교)
+        requested = meta.get("requested", meta.get("factory"))
+        return requested == settings.INDEX_FACTORY and meta.get("model") == settings.EMBEDDING_MODEL
+
+    def _stored_generation(self) -> int:
+        # 지금 올라가 있는 버전의 generation (없으면 이 객체가 아는 값)
+        path = versions.current_dir(settings.index_path()) / META_FILE
+        if not path.exists():
+            return self.generation
+        with open(path, "r", encoding="utf-8") as f:
+            return max(self.generation, json.load(f).get("generation", 0))
+
+    def _publish(self):
+        with span("index.publish"):
+            self._write_index()
+
+    def _write_index(self):
+        # 새 버전 폴더에 다 쓴 뒤 CURRENT만 바꾼다. 이전 버전을 읽고 있는 프로세스는 그대로 쓴다
+        root = settings.index_path()
+        tmp = versions.staging_dir(root)
+        faiss.write_index(self.vs.index, str(tmp / INDEX_FILE))
+        with open(tmp / DOCSTORE_FILE, "w", encoding="utf-8") as f:
+            for i in range(self.vs.index.ntotal):
+                cid = self.vs.index_to_docstore_id[i]
+                d = self.vs.docstore.search(cid)
+                f.write(json.dumps({"id": cid, "page_content": d.page_content, "metadata": d.metadata},
+                                   ensure_ascii=False) + "\n")
+        with open(tmp / META_FILE, "w", encoding="utf-8") as f:
+            json.dump({"factory": self.factory, "requested": settings.INDEX_FACTORY,
+                       "model": settings.EMBEDDING_MODEL, "ntotal": self.vs.index.ntotal,
+                       "generation": self.generation}, f)
+        with open(tmp / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        with open(tmp / DOC_MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(self.doc_manifest, f, ensure_ascii=False)
+        if self.sparse is not None:
+            self.sparse.save(tmp / SPARSE_DIR)
+        if self.dates is not None:
+            self.dates.save(tmp)
+        self.version = versions.commit(root, tmp)
+        self._dir = versions.version_dir(root, self.version)
+        if (root / META_FILE).exists():
+            # 버전 도입 전 레이아웃(root에 바로 저장)은 첫 버전을 쓴 뒤 정리
+            for name in (INDEX_FILE, DOCSTORE_FILE, META_FILE, MANIFEST_FILE, DOC_MANIFEST_FILE, DATES_FILE):
+                (root / name).unlink(missing_ok=True)
+            shutil.rmtree(root / SPARSE_DIR, ignore_errors=True)
+        versions.gc(root, settings.INDEX_KEEP_VERSIONS, protect=[self.version])
 
     def load(self) -> FAISS:
         if self.vs:
             return self.vs
-        self.vs = FAISS.load_local(settings.INDEX_DIR, self.emb, allow_dangerous_deserialization=True)
+        root = settings.index_path()
+        self.version = versions.current_version(root)
+        self._dir = path = root if self.version is None else versions.version_dir(root, self.version)
+        index = faiss.read_index(str(path / INDEX_FILE))
+        _apply_search_params(index)
+        ids, docs = [], []
+        with open(path / DOCSTORE_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                ids.append(row["id"])
+                docs.append(Document(page_content=row["page_content"], metadata=row["metadata"]))
+        self.vs = FAISS(self.emb, index, InMemoryDocstore(dict(zip(ids, docs))), dict(enumerate(ids)))
+        with open(path / META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.factory = meta.get("factory", settings.INDEX_FACTORY)
+        self.generation = meta.get("generation", 0)
+        with open(path / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if (path / DOC_MANIFEST_FILE).exists():
+            with open(path / DOC_MANIFEST_FILE, "r", encoding="utf-8") as f:
+                self.doc_manifest = json.load(f)
+        self.dates = DateIndex.load(path)
         return self.vs
 
-    def mmr_retriever(self, k: int = 8, fetch_k: int = 30):
-        store = self.load()
-        return store.as_retriever(search_type="mmr", search_kwargs={"k": k, "fetch_k": fetch_k, "lambda_mult": 0.5})
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        vs = self.load()
+        docs = [vs.docstore.search(i) for i in ids]
+        return [d for d in docs if isinstance(d, Document)]
+
+    def load_sparse(self) -> SparseIndex:
+        if self.sparse is None:
+            if self._dir is None:
+                self.load()  # 희소 인덱스도 FAISS와 같은 버전에서 읽는다
+            self.sparse = self._aligned(SparseIndex.load(self._dir / SPARSE_DIR))
+        return self.sparse
+
+    def _aligned(self, sparse: SparseIndex) -> SparseIndex:
+        # 위치가 FAISS와 다르면 (예전 버전은 청킹 순서로 만들었음) FAISS 순서로 옮긴다
+        ids = self.position_ids()
+        return sparse if sparse.ids == ids else sparse.reorder(ids)
+
+    def load_dates(self) -> DateIndex:
+        if self.dates is None:
+            self.load()
+            if self.dates is None:
+                # 작성일 색인이 없던 예전 버전 → 청크 메타데이터에서 한 번 만든다
+                self.dates = DateIndex.from_documents(self.ordered_chunks())
+        return self.dates
+
+    def sparse_retriever(self, k: int = 12) -> SparseRetriever:
+        return SparseRetriever(index=self.load_sparse(), lookup=self.get_documents, k=k)
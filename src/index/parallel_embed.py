@@ -0,0 +1,99 @@
+"""인덱스 빌드용 다중 프로세스 임베딩.
+
+워커 프로세스마다 모델을 한 벌씩 올리고 torch intra-op 스레드 수를 나눠 준다.
+텍스트는 길이순으로 정렬해 배치를 만들고(패딩 최소화), 끝난 배치부터 (원래 위치, 벡터)로 돌려준다.
+"""
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Iterator, List, Tuple
+import numpy as np
+
+_model = None
+
+
+def load_hf_embeddings(model_name: str, batch_size: int):
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": batch_size})
+
+
+def _init_worker(loader: Callable, model_name: str, batch_size: int, threads: int):
+    # torch를 import하기 전에 스레드 수를 고정해야 OpenMP/MKL 풀이 그 크기로 만들어진다
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+    global _model
+    _model = loader(model_name, batch_size)
+
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    return np.asarray(_model.embed_documents(texts), dtype=np.float32)
+
+
+def default_threads(workers: int) -> int:
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+class ParallelEmbedder:
+    """ProcessPoolExecutor 위의 배치 임베딩. with 블록 안에서 embed()를 여러 번 부를 수 있다."""
+
+    def __init__(self, model_name: str, workers: int, batch_size: int = 32, threads: int = 0,
+                 loader: Callable = load_hf_embeddings):
+        self.model_name = model_name
+        self.workers = workers
+        self.batch_size = batch_size
+        self.threads = threads or default_threads(workers)
+        self.loader = loader
+        self.stats = {"chunks": 0, "batches": 0, "seconds": 0.0, "chunks_per_sec": 0.0}
+        self._pool: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> "ParallelEmbedder":
+        # spawn: 부모(Streamlit 등)의 스레드/모델 상태를 fork로 복사하지 않는다
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.loader, self.model_name, self.batch_size, self.threads),
+        )
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.shutdown(cancel_futures=True)
+        self._pool = None
+
+    def batches(self, texts: List[str]) -> List[List[int]]:
+        # 긴 것부터: 비슷한 길이끼리 묶이고, 무거운 배치가 먼저 나가 꼬리 지연이 줄어든다
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+    def embed(self, texts: List[str]) -> Iterator[Tuple[List[int], np.ndarray]]:
+        """(texts 안의 위치 리스트, 벡터 행렬)을 끝나는 순서대로. 동시에 걸어 두는 배치는 워커 수의 2배까지."""
+        pending = iter(self.batches(texts))
+        running = {}
+        t0 = time.perf_counter()
+
+        def submit():
+            idx = next(pending, None)
+            if idx is not None:
+                running[self._pool.submit(_embed_batch, [texts[i] for i in idx])] = idx
+
+        for _ in range(self.workers * 2):
+            submit()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx = running.pop(fut)
+                vecs = fut.result()
+                submit()
+                self.stats["chunks"] += len(idx)
+                self.stats["batches"] += 1
+                yield idx, vecs
+        self.stats["seconds"] += time.perf_counter() - t0
+        if self.stats["seconds"]:
+            self.stats["chunks_per_sec"] = round(self.stats["chunks"] / self.stats["seconds"], 1)
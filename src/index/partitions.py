@@ -0,0 +1,81 @@
+"""원천(source_type)·분류(category)별 부분 인덱스: 메타데이터 값 → 인덱스 안 위치 (정렬된 int64).
+
+FAISS는 IDSelector로, 희소 인덱스는 점수 배열에서 이 위치만 보고 상위 k를 고른다. 벡터나 postings를
+따로 복사하지 않으므로 문서 목록에서 바로 만들고, 부분 갱신된 버전은 apply로 바뀐 청크만 반영한다.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.documents import Document
+
+FIELDS = ("source_type", "category")
+
+
+class Partitions:
+    def __init__(self, docs: List[Document]):
+        groups: Dict[Tuple[str, str], list] = defaultdict(list)
+        _collect(groups, docs, 0)
+        self._set(len(docs), {key: np.asarray(pos, dtype=np.int64) for key, pos in groups.items()})
+
+    def _set(self, n: int, groups: Dict[Tuple[str, str], np.ndarray]):
+        self.n = n
+        self.groups = groups
+        # 필드 값이 없는 문서 (공지의 category 등)
+        self.missing = {}
+        for field in FIELDS:
+            has = np.zeros(self.n, dtype=bool)
+            for (f, _), pos in self.groups.items():
+                if f == field:
+                    has[pos] = True
+            self.missing[field] = np.flatnonzero(~has)
+
+    def apply(self, removed: np.ndarray, added: List[Document]) -> "Partitions":
+        """removed 위치(정렬된 int64)를 빼고 added를 끝에 붙인 새 부분 인덱스.
+
+        FAISS 부분 갱신과 같은 위치 규칙이라 인덱스 버전이 바뀔 때 바뀐 청크만 반영하면 된다.
+        """
+        n = self.n - len(removed)
+        groups = {}
+        for key, pos in self.groups.items():
+            kept = np.setdiff1d(pos, removed, assume_unique=True)
+            if len(kept):
+                groups[key] = kept - np.searchsorted(removed, kept)
+        extra: Dict[Tuple[str, str], list] = defaultdict(list)
+        _collect(extra, added, n)
+        for key, pos in extra.items():
+            groups[key] = np.concatenate([groups.get(key, np.empty(0, dtype=np.int64)),
+                                          np.asarray(pos, dtype=np.int64)])
+        out = Partitions.__new__(Partitions)
+        out._set(n + len(added), groups)
+        return out
+
+    def values(self, field: str) -> List[str]:
+        return sorted(v for f, v in self.groups if f == field)
+
+    def sizes(self) -> Dict[str, int]:
+        return {f"{f}={v}": len(pos) for (f, v), pos in sorted(self.groups.items())}
+
+    def select(self, filters: Dict[str, Sequence[str]]) -> Optional[np.ndarray]:
+        """조건에 맞는 위치. 필드끼리는 AND, 한 필드의 값끼리는 OR.
+
+        그 필드가 없는 문서는 조건을 통과한다 ({"category": [...]}로 FAQ 분류를 좁혀도 공지는 남음).
+        조건이 없거나 전체가 걸리면 None (필터 없이 검색).
+        """
+        mask = None
+        for field, allowed in filters.items():
+            if not allowed:
+                continue
+            parts = [self.groups.get((field, v), np.empty(0, dtype=np.int64)) for v in allowed]
+            pos = np.union1d(np.concatenate(parts), self.missing.get(field, np.empty(0, dtype=np.int64)))
+            mask = pos if mask is None else np.intersect1d(mask, pos, assume_unique=True)
+        if mask is None or len(mask) == self.n:
+            return None
+        return mask
+
+
+def _collect(groups: Dict[Tuple[str, str], list], docs: List[Document], start: int):
+    for i, d in enumerate(docs, start):
+        for field in FIELDS:
+            value = d.metadata.get(field)
+            if value:
+                groups[(field, value)].append(i)
@@ -0,0 +1,179 @@
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+_TOKEN_RE = re.compile(r"[가-힣]+|[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """한글은 문자 bigram, 영문/숫자는 단어 단위로 자른다.
+
+    '도서관이', '도서관을'처럼 조사가 붙어도 '도서'/'서관' bigram은 공유된다.
+    """
+    tokens = []
+    for w in _TOKEN_RE.findall(text.lower()):
+        if "가" <= w[0] <= "힣":
+            if len(w) == 1:
+                tokens.append(w)
+            else:
+                tokens.extend(w[i:i + 2] for i in range(len(w) - 1))
+        else:
+            tokens.append(w)
+    return tokens
+
+
+class SparseIndex:
+    """BM25 역색인. postings는 CSR 형태 NumPy 배열로 저장하고 mmap으로 읽는다.
+
+    위치별로는 chunk_id만 들고 있다 (본문은 FAISS docstore에 한 벌만, 위치도 FAISS와 같음).
+    """
+
+    def __init__(self, vocab: Dict[str, int], indptr: np.ndarray, post_docs: np.ndarray,
+                 post_tf: np.ndarray, idf: np.ndarray, norm: np.ndarray,
+                 ids: List[str], k1: float, b: float = 0.75):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.post_docs = post_docs
+        self.post_tf = post_tf
+        self.idf = idf
+        self.norm = norm  # k1 * (1 - b + b * dl / avgdl), 문서별로 미리 계산
+        self.ids = ids  # 위치 -> chunk_id
+        self.k1 = k1
+        self.b = b
+
+    @staticmethod
+    def _postings(docs: List[Document], vocab: Dict[str, int], start: int = 0):
+        # (단어 id, 문서 위치, tf) 목록. vocab에 없는 단어는 새 id를 붙인다
+        terms, doc_ids, tfs = [], [], []
+        for i, d in enumerate(docs, start):
+            for t, c in Counter(tokenize(d.page_content)).items():
+                terms.append(vocab.setdefault(t, len(vocab)))
+                doc_ids.append(i)
+                tfs.append(c)
+        return (np.asarray(terms, dtype=np.int64), np.asarray(doc_ids, dtype=np.int32),
+                np.asarray(tfs, dtype=np.uint16))
+
+    @classmethod
+    def _from_postings(cls, vocab: Dict[str, int], terms: np.ndarray, doc_ids: np.ndarray, tfs: np.ndarray,
+                       ids: List[str], k1: float, b: float) -> "SparseIndex":
+        df = np.bincount(terms, minlength=len(vocab))
+        if np.count_nonzero(df == 0) * 2 > len(vocab):
+            # 지워진 청크에만 있던 단어가 절반을 넘으면 어휘를 정리한다
+            alive = df > 0
+            remap = np.cumsum(alive) - 1
+            vocab = {t: int(remap[i]) for t, i in vocab.items() if alive[i]}
+            terms = remap[terms]
+            df = df[alive]
+        order = np.argsort(terms, kind="stable")
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        n = max(len(ids), 1)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        doc_len = np.bincount(doc_ids, weights=tfs, minlength=len(ids)).astype(np.float32)
+        avgdl = float(doc_len.mean()) if len(ids) else 1.0
+        norm = (k1 * (1 - b + b * doc_len / max(avgdl, 1e-6))).astype(np.float32)
+        return cls(vocab, indptr, doc_ids[order], tfs[order], idf, norm, ids, k1, b)
+
+    @classmethod
+    def build(cls, docs: List[Document], k1: float = 1.5, b: float = 0.75) -> "SparseIndex":
+        vocab: Dict[str, int] = {}
+        terms, doc_ids, tfs = cls._postings(docs, vocab)
+        return cls._from_postings(vocab, terms, doc_ids, tfs, [d.metadata["chunk_id"] for d in docs], k1, b)
+
+    def update(self, removed: Sequence[str], added: List[Document]) -> "SparseIndex":
+        """removed 청크를 빼고 added를 끝에 붙인 새 색인 (FAISS 부분 갱신과 같은 위치 규칙).
+
+        토큰화는 added만 하고 남는 postings는 배열 연산으로 옮긴다. 이 객체는 그대로 두므로
+        서빙 중인 사본과 공유해도 된다.
+        """
+        drop = set(removed)
+        keep = np.fromiter((cid not in drop for cid in self.ids), dtype=bool, count=len(self.ids))
+        new_pos = (np.cumsum(keep) - 1).astype(np.int32)
+        terms = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+        live = keep[self.post_docs]
+        vocab = dict(self.vocab)
+        add_terms, add_docs, add_tfs = self._postings(added, vocab, start=int(keep.sum()))
+        ids = [cid for cid, k in zip(self.ids, keep) if k] + [d.metadata["chunk_id"] for d in added]
+        return self._from_postings(
+            vocab,
+            np.concatenate([terms[live], add_terms]),
+            np.concatenate([new_pos[self.post_docs[live]], add_docs]),
+            np.concatenate([self.post_tf[live], add_tfs]),
+            ids, self.k1, self.b,
+        )
+
+    def reorder(self, ids: List[str]) -> "SparseIndex":
+        """같은 청크 집합을 ids 순서의 위치로 옮긴 새 색인 (postings 값만 바꾸고 다시 토큰화하지 않음)."""
+        target = {cid: i for i, cid in enumerate(ids)}
+        perm = np.fromiter((target[cid] for cid in self.ids), dtype=np.int32, count=len(self.ids))
+        norm = np.empty_like(self.norm)
+        norm[perm] = self.norm
+        return SparseIndex(self.vocab, self.indptr, perm[self.post_docs], self.post_tf, self.idf, norm,
+                           list(ids), self.k1, self.b)
+
+    def save(self, path: Path):
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ("indptr", "post_docs", "post_tf", "idf", "norm"):
+            np.save(path / f"{name}.npy", getattr(self, name))
+        with open(path / "vocab.json", "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "vocab": self.vocab}, f, ensure_ascii=False)
+        with open(path / "ids.json", "w", encoding="utf-8") as f:
+            json.dump(self.ids, f)
+
+    @classmethod
+    def load(cls, path: Path) -> "SparseIndex":
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r")
+                  for name in ("indptr", "post_docs", "post_tf", "idf", "norm")}
+        with open(path / "vocab.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if (path / "ids.json").exists():
+            with open(path / "ids.json", "r", encoding="utf-8") as f:
+                ids = json.load(f)
+        else:
+            # 본문까지 함께 저장하던 예전 형식 (docs.jsonl)
+            with open(path / "docs.jsonl", "r", encoding="utf-8") as f:
+                ids = [json.loads(line)["metadata"]["chunk_id"] for line in f]
+        return cls(meta["vocab"], ids=ids, k1=meta["k1"], b=meta.get("b", 0.75), **arrays)
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for t, qtf in Counter(tokenize(query)).items():
+            tid = self.vocab.get(t)
+            if tid is None:
+                continue
+            lo, hi = self.indptr[tid], self.indptr[tid + 1]
+            docs = self.post_docs[lo:hi]
+            tf = self.post_tf[lo:hi].astype(np.float32)
+            # 한 postings 안에서 문서 id는 중복되지 않으므로 fancy index 덧셈으로 충분
+            scores[docs] += qtf * self.idf[tid] * tf * (self.k1 + 1) / (tf + self.norm[docs])
+        return scores
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """상위 k개 (문서 위치, 점수). allowed를 주면 그 위치 안에서만 고른다 (index/partitions.py)."""
+        scores = self.scores(query)
+        pos = np.arange(len(scores)) if allowed is None else allowed
+        sub = scores[pos]
+        k = min(k, len(sub))
+        if k == 0:
+            return []
+        top = np.argpartition(-sub, k - 1)[:k]
+        top = top[np.argsort(-sub[top])]
+        return [(int(pos[i]), float(sub[i])) for i in top if sub[i] > 0]
+
+
+class SparseRetriever(BaseRetriever):
+    index: Any
+    lookup: Any  # chunk_id 목록 -> Document 목록 (FaissStore.get_documents)
+    k: int = 12
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.lookup([self.index.ids[i] for i, _ in self.index.search(query, self.k)])
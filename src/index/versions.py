@@ -0,0 +1,110 @@
+"""버전별 인덱스 폴더: faiss_index/v<N>/ + 현재 버전을 가리키는 CURRENT 파일.
+
+쓰는 쪽은 숨은 임시 폴더에 다 쓴 뒤 v<N>으로 이름을 바꾸고 CURRENT를 원자적으로 교체한다.
+읽는 쪽은 CURRENT가 가리키는 폴더만 열기 때문에 반쯤 쓴 인덱스를 보지 않고, 이미 연 버전은
+그대로 쓸 수 있다. 오래된 버전은 gc()로 지우되 이 프로세스에서 쓰는 버전(pin)은 남긴다.
+"""
+import errno
+import os
+import re
+import shutil
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+CURRENT_FILE = "CURRENT"
+_VERSION_RE = re.compile(r"^v(\d+)$")
+
+_pins: Counter = Counter()  # (폴더, 버전) -> 이 프로세스에서 사용 중인 수
+_pins_lock = threading.Lock()
+
+
+def version_dir(root: Path, version: int) -> Path:
+    return root / f"v{version}"
+
+
+def list_versions(root: Path) -> List[int]:
+    if not root.exists():
+        return []
+    return sorted(int(m.group(1)) for p in root.iterdir() if p.is_dir() and (m := _VERSION_RE.match(p.name)))
+
+
+def current_version(root: Path) -> Optional[int]:
+    try:
+        raw = (root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    m = _VERSION_RE.match(raw)
+    return int(m.group(1)) if m and version_dir(root, int(m.group(1))).is_dir() else None
+
+
+def current_dir(root: Path) -> Path:
+    """읽을 폴더. CURRENT가 없으면 버전 도입 전처럼 root 자체."""
+    version = current_version(root)
+    return root if version is None else version_dir(root, version)
+
+
+def _set_current(root: Path, version: int):
+    tmp = root / f".{CURRENT_FILE}.{os.getpid()}.tmp"
+    tmp.write_text(f"v{version}\n", encoding="utf-8")
+    os.replace(tmp, root / CURRENT_FILE)
+
+
+def commit(root: Path, staged: Path) -> int:
+    """다 쓴 임시 폴더를 다음 버전으로 올리고 CURRENT를 바꾼다. 새 버전 번호를 돌려준다."""
+    root.mkdir(parents=True, exist_ok=True)
+    while True:
+        version = max(list_versions(root) + [current_version(root) or 0]) + 1
+        try:
+            os.rename(staged, version_dir(root, version))
+            break
+        except OSError as e:
+            # 다른 프로세스가 같은 번호를 먼저 가져갔으면 (비어 있지 않은 폴더로의 rename 실패) 다음 번호로.
+            # 그 밖의 오류(권한, 디스크 등)는 다시 해도 같으므로 올린다
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST) or not staged.exists():
+                raise
+    _set_current(root, version)
+    return version
+
+
+def staging_dir(root: Path) -> Path:
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / f".staging-{os.getpid()}-{threading.get_ident()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    return tmp
+
+
+def pin(root: Path, version: Optional[int]):
+    if version is not None:
+        with _pins_lock:
+            _pins[(str(root), version)] += 1
+
+
+def unpin(root: Path, version: Optional[int]):
+    if version is not None:
+        with _pins_lock:
+            key = (str(root), version)
+            _pins[key] -= 1
+            if _pins[key] <= 0:
+                del _pins[key]
+
+
+def gc(root: Path, keep: int, protect: Iterable[int] = ()) -> List[int]:
+    """최신 keep개와 CURRENT, 이 프로세스가 쓰는 버전을 빼고 지운다. 지운 버전 목록을 돌려준다.
+
+    다른 프로세스가 아직 열고 있을 수 있는 버전은 keep으로 여유를 둔다 (이미 메모리에 올린 인덱스는
+    폴더가 지워져도 계속 쓸 수 있다).
+    """
+    versions = list_versions(root)
+    with _pins_lock:
+        pinned = {v for (r, v) in _pins if r == str(root)}
+    latest = versions[-keep:] if keep > 0 else []
+    safe = set(latest) | pinned | set(protect) | {current_version(root)}
+    removed = []
+    for v in versions:
+        if v not in safe:
+            shutil.rmtree(version_dir(root, v), ignore_errors=True)
+            removed.append(v)
+    return removed
@@ -0,0 +1,133 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Collection, Dict, List, Optional, Sequence
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from core.types import Answer
+
+
+@dataclass
+class _Entry:
+    query: str
+    answer: Answer
+    created: float
+    chunks: Dict[str, str]  # chunk_id -> 캐시 당시 내용 해시
+    sources: Optional[Sequence[str]]  # 이 질의가 검색하는 원천 (라우터 결과, None이면 전체)
+
+
+class SemanticAnswerCache:
+    """재작성된 질의의 임베딩으로 과거 답변을 찾아 돌려주는 캐시.
+
+    유사도가 threshold 이상이고, TTL 안이며, 답변에 쓰인 청크가 그대로일 때만 적중으로 본다.
+    인덱스가 전체 재빌드되면(store.generation 변경) 모두 버리고, 부분 갱신으로 어떤 원천에 청크가
+    추가되면 그 원천을 검색하는 질의의 답변을 버린다 (새 공지가 답을 바꿀 수 있으므로).
+    route(query, vec)는 질의가 검색할 원천을 돌려준다 (없으면 모든 원천으로 본다).
+    """
+
+    def __init__(self, store, threshold: float, ttl: float, max_entries: int,
+                 route: Optional[Callable[[str, np.ndarray], Sequence[str]]] = None):
+        self.store = store
+        self.route = route
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.index: faiss.IndexIDMap2 | None = None
+        self.entries: Dict[int, _Entry] = {}
+        self._next_id = 0
+        self._generation = store.generation
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _vec(self, query: str) -> np.ndarray:
+        v = np.asarray([self.store.emb.embed_query(query)], dtype=np.float32)
+        faiss.normalize_L2(v)
+        return v
+
+    def _remove(self, ids: List[int]):
+        if not ids:
+            return
+        self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+        for i in ids:
+            self.entries.pop(i, None)
+
+    def _valid(self, e: _Entry) -> bool:
+        if time.time() - e.created > self.ttl:
+            return False
+        manifest = self.store.manifest
+        return all(manifest.get(cid) == h for cid, h in e.chunks.items())
+
+    def invalidate(self):
+        with self._lock:
+            self.index = None
+            self.entries.clear()
+            self._generation = self.store.generation
+
+    def rebind(self, store, added_sources: Collection[str] = ()):
+        """부분 갱신된 인덱스로 교체한다. added_sources는 이번 버전에서 청크가 추가·변경된 원천.
+
+        그 원천을 검색하는 질의의 답변은 버리고, 나머지는 쓰인 청크가 그대로인 동안 _valid에서 살아남는다.
+        """
+        with self._lock:
+            self.store = store
+            if added_sources:
+                stale = [eid for eid, e in self.entries.items()
+                         if e.sources is None or set(e.sources) & set(added_sources)]
+                self._remove(stale)
+        if self._generation != store.generation:
+            self.invalidate()
+
+    def get(self, query: str) -> Optional[Answer]:
+        if self._generation != self.store.generation:
+            self.invalidate()
+        vec = self._vec(query)
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                self.misses += 1
+                return None
+            scores, ids = self.index.search(vec, 1)
+            eid = int(ids[0][0])
+            entry = self.entries.get(eid)
+            if entry is None or scores[0][0] < self.threshold:
+                self.misses += 1
+                return None
+            if not self._valid(entry):
+                self._remove([eid])
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.answer
+
+    def put(self, query: str, answer: Answer, docs: List[Document]):
+        manifest = self.store.manifest
+        chunks = {}
+        for d in docs:
+            cid = d.metadata.get("chunk_id")
+            if cid not in manifest:
+                # 출처를 검증할 수 없는 답변은 캐시하지 않음
+                return
+            chunks[cid] = manifest[cid]
+        vec = self._vec(query)
+        sources = tuple(self.route(query, vec)) if self.route else None
+        with self._lock:
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(vec.shape[1]))
+            eid = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(vec, np.asarray([eid], dtype=np.int64))
+            self.entries[eid] = _Entry(query, answer, time.time(), chunks, sources)
+            # 가장 오래된 항목부터 제거
+            overflow = len(self.entries) - self.max_entries
+            if overflow > 0:
+                self._remove(list(self.entries)[:overflow])
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self.entries),
+        }
@@ -0,0 +1,95 @@
+"""검색 결과를 토큰 예산 안의 프롬프트 컨텍스트로 만든다.
+
+청크를 문장으로 나누고, 여러 청크에 반복되는 문장(섹션 제목·연락처 블록 등)은 한 번만 담는다.
+문장 점수는 청크 순위(재정렬 결과)에 질의와 겹치는 bigram 비율을 더한 값이고, 점수 순으로
+예산(CONTEXT_MAX_TOKENS)이 찰 때까지 고른 뒤 청크별로 원래 문장 순서대로 다시 묶는다.
+"""
+import re
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from data.chunker import _HEADING, _SENTENCE, doc_header
+from index.sparse_index import tokenize
+
+_SPACE = re.compile(r"\s+")
+
+
+def approx_tokens(text: str) -> int:
+    # 토크나이저가 없을 때의 어림값 (한글은 대략 2자에 1토큰보다 조금 많음)
+    return len(text) // 2 + 1
+
+
+def split_sentences(body: str) -> List[Tuple[str, str]]:
+    """(섹션 제목, 문장) 목록. 제목 줄은 따로 두고 뒤따르는 문장들에 붙인다."""
+    out, heading = [], ""
+    for line in body.split("\n"):
+        line = line.strip()
+        if not line or line == "\xa0":
+            continue
+        if _HEADING.match(line):
+            heading = line
+            continue
+        out.extend((heading, s.strip()) for s in _SENTENCE.split(line) if s.strip())
+    return out
+
+
+class ContextPacker:
+    def __init__(self, max_tokens: int, token_len: Optional[Callable[[str], int]] = None):
+        self.max_tokens = max_tokens
+        self.token_len = token_len or approx_tokens
+
+    @staticmethod
+    def _label(i: int, d: Document, header: str) -> str:
+        # 머리글의 [작성일]/[분류] 줄도 함께 (제목은 이미 첫 줄에 있음)
+        lines = [f"[{i}] {d.metadata.get('title', '')} | {d.metadata.get('url', '')}"]
+        lines.extend(ln for ln in header.split("\n") if ln and not ln.startswith("[제목]"))
+        return "\n".join(lines)
+
+    def pack(self, question: str, docs: List[Document]) -> str:
+        q_terms = set(tokenize(question))
+        seen = set()
+        split = [doc_header(d) for d in docs]
+        labels = [self._label(rank + 1, d, split[rank][0]) for rank, d in enumerate(docs)]
+        candidates = []  # (점수, 순위, 문장 위치, 제목, 문장)
+        for rank, (_, body) in enumerate(split):
+            for pos, (heading, sent) in enumerate(split_sentences(body)):
+                key = _SPACE.sub("", sent)
+                if key in seen:
+                    continue
+                seen.add(key)
+                overlap = len(q_terms & set(tokenize(sent))) / len(q_terms) if q_terms else 0.0
+                candidates.append((1.0 / (rank + 1) + overlap, rank, pos, heading, sent))
+        candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+
+        used = 0
+        chosen: Dict[int, list] = defaultdict(list)
+        headings: Dict[int, set] = defaultdict(set)
+        for _, rank, pos, heading, sent in candidates:
+            cost = self.token_len(sent)
+            if rank not in chosen:
+                cost += self.token_len(labels[rank])
+            if heading and heading not in headings[rank]:
+                cost += self.token_len(heading)
+            if used + cost > self.max_tokens:
+                continue
+            used += cost
+            chosen[rank].append((pos, heading, sent))
+            if heading:
+                headings[rank].add(heading)
+
+        # 번호는 출처 목록과 맞도록 원래 순위를 쓴다 (담긴 문장이 없는 청크는 빠짐)
+        parts = []
+        for rank in sorted(chosen):
+            lines, current, buf = [labels[rank]], "", []
+            for _, heading, sent in sorted(chosen[rank]):
+                if heading != current:
+                    if buf:
+                        lines.append(" ".join(buf))
+                        buf = []
+                    lines.append(heading)
+                    current = heading
+                buf.append(sent)
+            if buf:
+                lines.append(" ".join(buf))
+            parts.append("\n".join(lines))
+        return "\n\n".join(parts)
@@ -1,28 +1,40 @@
-from typing import List
+import asyncio
+import contextvars
+import time
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.documents import Document
-from core.types import Answer, Source, Message
+from core.types import Answer, Source, Message, StreamEvent
 from core.config import settings
+from core.metrics import cache_result, count_tokens, record, span
 from models.llm_provider import get_llm
+from rag.context import ContextPacker
+from rag.memory import ConversationMemory
 from rag.prompt import SYSTEM, TEMPLATE
 
 class ChatEngine:
-    def __init__(self, retriever):
+    def __init__(self, retriever, answer_cache=None, executor: Optional[Executor] = None,
+                 token_len: Optional[Callable[[str], int]] = None):
         self.retriever = retriever
+        self.answer_cache = answer_cache
+        # 비동기 경로에서 임베딩/재정렬(CPU)을 돌릴 스레드 풀 (None이면 이벤트 루프 기본 풀)
+        self.executor = executor
         self.llm = get_llm()
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", SYSTEM),
             ("human", TEMPLATE),
         ])
+        # token_len: 컨텍스트 예산을 셀 토크나이저 (None이면 글자 수 어림)
+        self.packer = ContextPacker(settings.CONTEXT_MAX_TOKENS, token_len)
+        self.memory = ConversationMemory(self.llm, keep=settings.HISTORY_KEEP_MESSAGES,
+                                         fold=settings.SUMMARY_FOLD_MESSAGES, max_chars=settings.SUMMARY_MAX_CHARS)
 
-    def _format_context(self, docs: List[Document]) -> str:
-        parts = []
-        for i, d in enumerate(docs, 1):
-            title = d.metadata.get("title", "")
-            url = d.metadata.get("url", "")
-            snippet = d.page_content[:500].replace("\n", " ")
-            parts.append(f"[{i}] {title} | {url}\n{snippet}")
-        return "\n\n".join(parts)
+    def _format_context(self, question: str, docs: List[Document]) -> str:
+        with span("context.pack") as s:
+            context = self.packer.pack(question, docs)
+            s["chars"] = len(context)
+        return context
 
     def _docs_to_sources(self, docs: List[Document]) -> List[Source]:
         out = []
@@ -45,17 +57,140 @@ class ChatEngine:
                 break
         return f"{last_user} 관련: {question}" if last_user else question
 
-    def ask(self, question: str, history: List[Message]) -> Answer:
-        q = self.rewrite(question, history)
-        # 1) 후보 수집 → 2) 재정렬된 상위 n 반환
-        candidates = self.retriever.invoke(q)  # List[Document] 반환
-        context_str = self._format_context(candidates)
-
-        chain_input = {
-            "history": "\n".join([f"{m['role']}: {m['content']}" for m in history[-8:]]),
+    def _chain_input(self, question: str, history: List[Message], docs: List[Document],
+                     summary: str = "", summarized: int = 0) -> dict:
+        # summary/summarized: 호출한 쪽이 들고 있는 대화 요약과 거기 합친 메시지 수 (rag/memory.py)
+        return {
+            "history": self.memory.render(summary, history, summarized),
             "question": question,
-            "context": context_str,
+            "context": self._format_context(question, docs),
         }
+
+    def summarize(self, history: List[Message], summary: str = "", summarized: int = 0) -> Tuple[str, int]:
+        """오래된 메시지를 요약에 합친다. (새 요약, 새 summarized) — 합칠 차례가 아니면 그대로."""
+        return self.memory.update(summary, history, summarized)
+
+    async def asummarize(self, history: List[Message], summary: str = "", summarized: int = 0) -> Tuple[str, int]:
+        return await self.memory.aupdate(summary, history, summarized)
+
+    def _cache_get(self, q: str) -> Optional[Answer]:
+        with span("answer_cache.get"):
+            cached = self.answer_cache.get(q)
+        cache_result("answer", cached is not None)
+        return cached
+
+    def _retrieve(self, q: str, retriever=None) -> List[Document]:
+        # 1) 후보 수집 → 2) 재정렬된 상위 n 반환
+        with span("retrieve") as s:
+            docs = (retriever or self.retriever).invoke(q)  # List[Document] 반환
+            s["n"] = len(docs)
+        return docs
+
+    def ask(self, question: str, history: List[Message], retriever=None,
+            summary: str = "", summarized: int = 0) -> Answer:
+        # retriever: 요청이 붙잡은 인덱스 버전의 검색기 (없으면 self.retriever)
+        with span("ask"):
+            q = self.rewrite(question, history)
+            if self.answer_cache:
+                cached = self._cache_get(q)
+                if cached:
+                    return cached
+            candidates = self._retrieve(q, retriever)
+            resp = self.prompt | self.llm
+            with span("llm"):
+                msg = resp.invoke(self._chain_input(question, history, candidates, summary, summarized))
+            count_tokens(getattr(msg, "usage_metadata", None))
+            answer = Answer(text=msg.content, sources=self._docs_to_sources(candidates))
+            if self.answer_cache:
+                self.answer_cache.put(q, answer, candidates)
+            return answer
+
+    def _prepare(self, question: str, history: List[Message], retriever=None):
+        # 스트리밍 전 단계 (재작성 → 캐시 → 검색)를 한 trace로: (q, 캐시된 답 또는 None, 후보)
+        with span("ask_stream.prepare"):
+            q = self.rewrite(question, history)
+            if self.answer_cache:
+                cached = self._cache_get(q)
+                if cached:
+                    return q, cached, []
+            return q, None, self._retrieve(q, retriever)
+
+    def ask_stream(self, question: str, history: List[Message], retriever=None,
+                   summary: str = "", summarized: int = 0) -> Iterator[StreamEvent]:
+        # 검색 결과(출처)를 먼저 내보내고, 이어서 LLM 토큰을 순서대로 내보낸다
+        q, cached, candidates = self._prepare(question, history, retriever)
+        if cached:
+            yield StreamEvent("sources", sources=cached.sources)
+            yield StreamEvent("token", text=cached.text)
+            return
+        sources = self._docs_to_sources(candidates)
+        yield StreamEvent("sources", sources=sources)
+
+        parts, usage = [], {}
         resp = self.prompt | self.llm
-        text = (resp.invoke(chain_input)).content
-        return Answer(text=text, sources=self._docs_to_sources(candidates))
+        # yield를 사이에 두므로 span 대신 직접 잰다 (소비자가 기다린 시간도 포함됨)
+        t0 = time.perf_counter()
+        for chunk in resp.stream(self._chain_input(question, history, candidates, summary, summarized)):
+            _add_usage(usage, chunk)
+            if chunk.content:
+                parts.append(chunk.content)
+                yield StreamEvent("token", text=chunk.content)
+        record("llm.stream", time.perf_counter() - t0, chunks=len(parts))
+        count_tokens(usage)
+        answer = Answer(text="".join(parts), sources=sources)
+        if self.answer_cache:
+            self.answer_cache.put(q, answer, candidates)
+
+    def _cpu(self, fn, *args):
+        # 컨텍스트를 복사해 넘겨야 스레드 안의 span이 요청의 trace에 붙는다
+        ctx = contextvars.copy_context()
+        return asyncio.get_running_loop().run_in_executor(self.executor, ctx.run, fn, *args)
+
+    async def aask(self, question: str, history: List[Message], retriever=None,
+                   summary: str = "", summarized: int = 0) -> Answer:
+        # 검색·재정렬·캐시 조회는 스레드 풀에서, LLM 호출은 비동기 클라이언트로 (이벤트 루프를 막지 않음)
+        with span("ask"):
+            q = self.rewrite(question, history)
+            if self.answer_cache:
+                cached = await self._cpu(self._cache_get, q)
+                if cached:
+                    return cached
+            candidates = await self._cpu(self._retrieve, q, retriever)
+            resp = self.prompt | self.llm
+            with span("llm"):
+                msg = await resp.ainvoke(self._chain_input(question, history, candidates, summary, summarized))
+            count_tokens(getattr(msg, "usage_metadata", None))
+            answer = Answer(text=msg.content, sources=self._docs_to_sources(candidates))
+            if self.answer_cache:
+                await self._cpu(self.answer_cache.put, q, answer, candidates)
+            return answer
+
+    async def aask_stream(self, question: str, history: List[Message], retriever=None,
+                          summary: str = "", summarized: int = 0) -> AsyncIterator[StreamEvent]:
+        q, cached, candidates = await self._cpu(self._prepare, question, history, retriever)
+        if cached:
+            yield StreamEvent("sources", sources=cached.sources)
+            yield StreamEvent("token", text=cached.text)
+            return
+        sources = self._docs_to_sources(candidates)
+        yield StreamEvent("sources", sources=sources)
+
+        parts, usage = [], {}
+        resp = self.prompt | self.llm
+        t0 = time.perf_counter()
+        async for chunk in resp.astream(self._chain_input(question, history, candidates, summary, summarized)):
+            _add_usage(usage, chunk)
+            if chunk.content:
+                parts.append(chunk.content)
+                yield StreamEvent("token", text=chunk.content)
+        record("llm.stream", time.perf_counter() - t0, chunks=len(parts))
+        count_tokens(usage)
+        if self.answer_cache:
+            await self._cpu(self.answer_cache.put, q, Answer(text="".join(parts), sources=sources), candidates)
+
+
+def _add_usage(total: dict, chunk):
+    # 스트리밍 청크마다 붙어 오는 usage_metadata를 합친다
+    for k, v in (getattr(chunk, "usage_metadata", None) or {}).items():
+        if isinstance(v, int):
+            total[k] = total.get(k, 0) + v
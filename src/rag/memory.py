@@ -0,0 +1,69 @@
+"""대화 기록: 최근 몇 개 메시지는 그대로, 그보다 오래된 대화는 점진적으로 갱신하는 요약 하나로.
+
+호출하는 쪽(UI 세션, API 클라이언트)이 (summary, summarized)를 들고 있는다. summarized는
+history 앞쪽에서 이미 요약에 합친 메시지 수다. 요약은 안 합친 메시지가 keep + fold개 이상
+쌓였을 때만 fold개 이상을 한 번에 합치므로 LLM 호출은 몇 턴에 한 번이다.
+"""
+from typing import List, Tuple
+from langchain.prompts import ChatPromptTemplate
+from core.metrics import count_tokens, span
+from core.types import Message
+from rag.prompt import SUMMARY_TEMPLATE
+
+
+def format_messages(messages: List[Message]) -> str:
+    return "\n".join(f"{'사용자' if m['role'] == 'user' else '어시스턴트'}: {m['content']}" for m in messages)
+
+
+class ConversationMemory:
+    def __init__(self, llm, keep: int, fold: int, max_chars: int):
+        self.keep = keep  # 요약하지 않고 그대로 두는 최근 메시지 수
+        self.fold = fold  # 한 번에 요약에 합치는 최소 메시지 수
+        self.max_chars = max_chars
+        self.chain = ChatPromptTemplate.from_messages([("human", SUMMARY_TEMPLATE)]) | llm
+
+    def render(self, summary: str, history: List[Message], summarized: int = 0) -> str:
+        """프롬프트의 [이전대화 요약] 자리에 넣을 문자열.
+
+        요약이 밀려 있어도(갱신 실패, 요약을 안 쓰는 클라이언트) 원문은 keep + fold개까지만 넣는다.
+        """
+        recent = history[summarized:][-(self.keep + self.fold):]
+        parts = [f"(요약) {summary}"] if summary else []
+        if recent:
+            parts.append(format_messages(recent))
+        return "\n".join(parts)
+
+    def pending(self, history: List[Message], summarized: int) -> List[Message]:
+        # 요약에 합칠 차례가 된 메시지들 (없으면 빈 목록)
+        older = history[summarized:len(history) - self.keep]
+        return older if len(older) >= self.fold else []
+
+    def _input(self, summary: str, messages: List[Message]) -> dict:
+        return {"summary": summary or "(없음)", "dialogue": format_messages(messages), "max_chars": self.max_chars}
+
+    def update(self, summary: str, history: List[Message], summarized: int = 0) -> Tuple[str, int]:
+        """(새 요약, 새 summarized). 합칠 것이 없거나 LLM 호출이 실패하면 그대로 돌려준다."""
+        messages = self.pending(history, summarized)
+        if not messages:
+            return summary, summarized
+        try:
+            with span("summary", messages=len(messages)):
+                msg = self.chain.invoke(self._input(summary, messages))
+        except Exception as e:
+            print(f"[memory] 대화 요약 실패: {e}")
+            return summary, summarized
+        count_tokens(getattr(msg, "usage_metadata", None))
+        return msg.content.strip(), summarized + len(messages)
+
+    async def aupdate(self, summary: str, history: List[Message], summarized: int = 0) -> Tuple[str, int]:
+        messages = self.pending(history, summarized)
+        if not messages:
+            return summary, summarized
+        try:
+            with span("summary", messages=len(messages)):
+                msg = await self.chain.ainvoke(self._input(summary, messages))
+        except Exception as e:
+            print(f"[memory] 대화 요약 실패: {e}")
+            return summary, summarized
+        count_tokens(getattr(msg, "usage_metadata", None))
+        return msg.content.strip(), summarized + len(messages)
@@ -24,3 +24,18 @@ TEMPLATE = (
     3) 마지막에 근거 출처 목록을 작성 (예: - [도서관 이용안내](https://...))
     """
 )
+
+SUMMARY_TEMPLATE = (
+    """
+    [지금까지의 대화 요약]
+    {summary}
+
+    [새로 이어진 대화]
+    {dialogue}
+
+    위 요약에 새 대화를 합쳐 {max_chars}자 이내의 요약 하나로 다시 쓰세요.
+    - 사용자가 물은 것과 답변에서 확인된 사실(시간, 장소, 절차, 연락처)만 남깁니다.
+    - 이후 질문이 가리킬 수 있는 대상(시설명, 자료명, 서비스명)은 빼지 않습니다.
+    - 요약 본문만 출력합니다.
+    """
+)
@@ -1,16 +1,265 @@
-from langchain.retrievers import EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
-from typing import List
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
-from index.faiss_store import FaissStore
+from langchain_core.retrievers import BaseRetriever
+from core.config import settings
+from core.metrics import metrics, observe_candidates, span
+from index.date_index import DatePositions, to_day
+from index.faiss_store import FaissStore, filtered_search
+from index.partitions import Partitions
+from retrieval.recency import Window, query_window, recency_factor
+from retrieval.router import BOTH, QueryRouter, Route
+
+metrics.counter("rag_route_total", "질의 라우팅 결과 (route=faq|notice|both, reason=explicit|classifier|off)")
+
+
+def rrf_fuse(id_lists: Sequence[Sequence[str]], weights: Sequence[float], c: int,
+             boost: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> List[str]:
+    """가중 RRF: score(id) = Σ w_i / (c + rank_i). 여러 리스트에 나온 id는 하나로 합쳐진다.
+
+    boost는 정렬된 고유 id 배열을 받아 점수에 곱할 배율을 돌려준다 (최신성 등).
+    """
+    ids, contrib = [], []
+    for lst, w in zip(id_lists, weights):
+        if len(lst) == 0:
+            continue
+        ids.append(np.asarray(lst))
+        contrib.append(w / (c + np.arange(1, len(lst) + 1, dtype=np.float64)))
+    if not ids:
+        return []
+    uniq, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+    scores = np.bincount(inverse, weights=np.concatenate(contrib), minlength=len(uniq))
+    if boost is not None:
+        scores = scores * boost(uniq)
+    # 점수가 같으면 id 순으로 고정 (재현 가능한 순서)
+    order = np.lexsort((uniq, -scores))
+    return [str(x) for x in uniq[order]]
+
+
+class HybridRetriever(BaseRetriever):
+    store: Any
+    executor: Any
+    weights: Tuple[float, float] = (0.4, 0.6)
+    sparse_k: int = 12
+    dense_k: int = 12
+    rrf_k: int = 60
+    k: int = 20
+    # 원천/분류별 부분 인덱스와 라우터 — 없으면 전체 검색. 희소 인덱스는 FAISS와 위치가 같아 함께 쓴다
+    parts: Any = None  # Partitions
+    router: Any = None  # QueryRouter
+    # 위치별 작성일과 chunk_id별 작성일 — 기간 필터와 최신성 가중
+    positions: Any = None  # DatePositions
+    dates: Any = None  # DateIndex
+    recency_weight: float = 0.0
+    half_life_days: float = 180.0
+
+    def _embed(self, query: str) -> np.ndarray:
+        with span("retrieve.embed_query"):
+            return np.asarray([self.store.emb.embed_query(query)], dtype=np.float32)
+
+    def route(self, query: str, vec: Optional[np.ndarray] = None) -> Route:
+        if self.router is None:
+            return BOTH
+        with span("retrieve.route") as s:
+            route = self.router.route(query, vec)
+            s.update(route=route.name, reason=route.reason, p_notice=round(route.p_notice, 3))
+        metrics.inc("rag_route_total", route=route.name, reason=route.reason)
+        return route
+
+    def window(self, query: str) -> Optional[Window]:
+        if not settings.RECENCY_WINDOW or self.dates is None:
+            return None
+        return query_window(query, date.today(), settings.RECENCY_WINDOW_SLACK_DAYS, settings.RECENCY_RECENT_DAYS)
+
+    @staticmethod
+    def _allowed(parts: Optional[Partitions], dates: Optional[DatePositions], route: Route,
+                 window: Optional[Window], k: int) -> Optional[np.ndarray]:
+        # 원천/분류 조건과 기간 조건의 교집합 (날짜 없는 청크는 기간 조건을 통과).
+        # 라우팅이 틀렸을 수 있으므로 k개도 못 채우는 조건은 버린다 (후보가 모자라느니 걸러지지 않은 편이 낫다)
+        allowed = parts.select(route.filters()) if parts else None
+        if allowed is not None and len(allowed) < k:
+            allowed = None
+        if window is not None and dates is not None:
+            in_window = dates.window(*window)
+            # 기간 안에 공지가 하나도 없으면 기간 조건은 버린다 (빈 결과보다 오래된 공지가 낫다)
+            if len(in_window):
+                pos = np.union1d(in_window, dates.undated)
+                narrowed = pos if allowed is None else np.intersect1d(allowed, pos, assume_unique=True)
+                if len(narrowed) >= k:
+                    allowed = narrowed
+        return allowed
+
+    def _sparse_ids(self, query: str, route: Route = BOTH, window: Optional[Window] = None) -> List[str]:
+        with span("retrieve.sparse", k=self.sparse_k) as s:
+            sparse = self.store.load_sparse()
+            allowed = self._allowed(self.parts, self.positions, route, window, self.sparse_k)
+            ids = [sparse.ids[i] for i, _ in sparse.search(query, self.sparse_k, allowed)]
+            s["n"] = len(ids)
+        observe_candidates("sparse", len(ids))
+        return ids
+
+    def _dense_ids(self, query: str, vec: Optional[np.ndarray] = None, route: Route = BOTH,
+                   window: Optional[Window] = None) -> List[str]:
+        with span("retrieve.dense", k=self.dense_k) as s:
+            vs = self.store.load()
+            if vec is None:
+                vec = self._embed(query)
+            allowed = self._allowed(self.parts, self.positions, route, window, self.dense_k)
+            with span("retrieve.faiss", filtered=allowed is not None):
+                _, idx = filtered_search(vs.index, vec, self.dense_k, allowed)
+            ids = [vs.index_to_docstore_id[i] for i in idx[0] if i != -1]
+            s["n"] = len(ids)
+        observe_candidates("dense", len(ids))
+        return ids
+
+    def search_lists(self, query: str) -> List[List[str]]:
+        # 라우팅에 질의 벡터가 필요하면 먼저 임베딩하고, 그 벡터로 밀집 검색까지 한다
+        # 희소/밀집 검색은 동시에 실행 (각 스레드가 호출한 쪽의 trace에 붙도록 컨텍스트를 복사)
+        vec = self._embed(query) if self.router is not None and self.router.needs_vector(query) else None
+        route = self.route(query, vec)
+        window = self.window(query)
+        sparse = self.executor.submit(contextvars.copy_context().run, self._sparse_ids, query, route, window)
+        dense = self.executor.submit(contextvars.copy_context().run, self._dense_ids, query, vec, route, window)
+        return [sparse.result(), dense.result()]
+
+    def _recency(self, ids: np.ndarray) -> np.ndarray:
+        return recency_factor(self.dates.lookup(ids), to_day(date.today()), self.half_life_days, self.recency_weight)
+
+    def fuse(self, id_lists: List[List[str]]) -> List[Document]:
+        with span("retrieve.fuse") as s:
+            boost = self._recency if self.dates is not None and self.recency_weight > 0 else None
+            ids = rrf_fuse(id_lists, self.weights, self.rrf_k, boost)[: self.k]
+            docs = self.store.get_documents(ids)
+            s["n"] = len(docs)
+        observe_candidates("fused", len(docs))
+        return docs
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.fuse(self.search_lists(query))
+
+
+def _position_delta(before: List[str], after: List[str]) -> Optional[Tuple[np.ndarray, List[str]]]:
+    """after를 before에서 몇 위치를 빼고 끝에 청크를 붙인 것으로 본 (뺀 위치, 붙인 chunk_id).
+
+    FAISS 부분 갱신(삭제 후 끝에 추가)으로 만든 버전이면 붙인 것이 바뀐 청크뿐이다. 내용이 바뀐
+    청크는 같은 id로 끝에 다시 붙으므로 원래 위치는 뺀 위치로 잡힌다. 다시 조립한 인덱스처럼
+    절반 넘게 바뀌었으면 None (처음부터 만드는 편이 낫다).
+    """
+    if not before:
+        return None
+    where = {cid: i for i, cid in enumerate(before)}
+    kept, nxt = [], 0
+    for j, cid in enumerate(after):
+        i = where.get(cid)
+        if i is None or i < nxt:
+            tail = after[j:]
+            break
+        kept.append(i)
+        nxt = i + 1
+    else:
+        tail = []
+    if len(tail) * 2 > len(after):
+        return None
+    removed = np.setdiff1d(np.arange(len(before), dtype=np.int64), np.asarray(kept, dtype=np.int64),
+                           assume_unique=True)
+    return removed, tail
+
+
+def _label_shift(before: Dict[str, int], n_before: int, after: Dict[str, int], n_after: int) -> float:
+    # 라벨(원천·분류)별 청크 비율이 가장 크게 움직인 양. 라벨이 생기거나 없어지면 1
+    if before.keys() != after.keys():
+        return 1.0
+    return max((abs(before[k] / max(n_before, 1) - after[k] / max(n_after, 1)) for k in before), default=0.0)
+
 
 class HybridRetrieverFactory:
-    def __init__(self, base_docs: List[Document], store: FaissStore):
-        self.base_docs = base_docs
+    def __init__(self, store: FaissStore):
         self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=settings.HYBRID_WORKERS, thread_name_prefix="hybrid")
+        # 직전 버전에서 만든 것들. 다음 버전이 부분 갱신이면 바뀐 청크만 반영해 다시 쓴다
+        self._ids: List[str] = []
+        self._parts: Optional[Partitions] = None
+        self._positions: Optional[DatePositions] = None
+        self._router: Optional[QueryRouter] = None
+        self._fit_labels: Tuple[Dict[str, int], int] = ({}, 0)
+        self._fit_params: dict = {}
+
+    @property
+    def router(self) -> Optional[QueryRouter]:
+        """마지막으로 만든 검색기의 라우터."""
+        return self._router
+
+    @staticmethod
+    def _router_params() -> dict:
+        return dict(
+            notice_threshold=settings.ROUTER_NOTICE_THRESHOLD,
+            faq_threshold=settings.ROUTER_FAQ_THRESHOLD,
+            keyword_weight=settings.ROUTER_KEYWORD_WEIGHT,
+            top_categories=settings.ROUTER_TOP_CATEGORIES,
+        )
+
+    def _fit_router(self, parts: Partitions) -> QueryRouter:
+        with span("index.router"):
+            docs = self.store.ordered_chunks()
+            self._fit_labels = (parts.sizes(), parts.n)
+            self._fit_params = self._router_params()
+            return QueryRouter.fit(
+                self.store.vectors(),
+                [d.metadata.get("source_type", "") for d in docs],
+                [d.metadata.get("category", "") for d in docs],
+                **self._fit_params,
+            )
+
+    def _refresh(self):
+        # 이 store 버전에 맞춰 부분 인덱스·작성일 위치·라우터를 갖춘다.
+        # 직전 버전의 부분 갱신이면 바뀐 청크만 반영하고, 라우터는 라벨 비율이 크게 움직였을 때만 다시 학습
+        ids = self.store.position_ids()
+        dates = self.store.load_dates()
+        delta = _position_delta(self._ids, ids) if self._positions is not None else None
+        with span("index.partitions", incremental=delta is not None):
+            if delta is None:
+                parts = Partitions(self.store.ordered_chunks()) if settings.ROUTER_ENABLED else None
+                # 작성일 문자열은 색인할 때 이미 읽어 두었으므로 id 조회만
+                positions = DatePositions(dates.lookup(ids))
+            else:
+                removed, tail = delta
+                parts = None
+                if settings.ROUTER_ENABLED and self._parts is not None:
+                    parts = self._parts.apply(removed, self.store.get_documents(tail))
+                elif settings.ROUTER_ENABLED:
+                    parts = Partitions(self.store.ordered_chunks())
+                positions = self._positions.apply(removed, dates.lookup(tail))
+        router = None
+        if parts is not None:
+            router = self._router
+            if (router is None or self._fit_params != self._router_params()
+                    or _label_shift(*self._fit_labels, parts.sizes(), parts.n) > settings.ROUTER_REFIT_DRIFT):
+                router = self._fit_router(parts)
+        self._ids, self._parts, self._positions, self._router = ids, parts, positions, router
 
     def create(self):
-        bm25 = BM25Retriever.from_documents(self.base_docs)
-        bm25.k = 12
-        faiss = self.store.mmr_retriever(k=12, fetch_k=60)
-        return EnsembleRetriever(retrievers=[bm25, faiss], weights=[0.4, 0.6])
+        # 희소/밀집 모두 같은 청크 단위·같은 위치를 검색한다
+        self.store.load()
+        self.store.load_sparse()
+        self._refresh()
+        return HybridRetriever(
+            store=self.store,
+            executor=self.executor,
+            weights=settings.HYBRID_WEIGHTS,
+            sparse_k=settings.SPARSE_K,
+            dense_k=settings.DENSE_K,
+            rrf_k=settings.RRF_K,
+            k=settings.TOP_K_CANDIDATES,
+            parts=self._parts,
+            router=self._router,
+            positions=self._positions,
+            dates=self.store.load_dates(),
+            recency_weight=settings.RECENCY_WEIGHT,
+            half_life_days=settings.RECENCY_HALF_LIFE_DAYS,
+        )
@@ -0,0 +1,103 @@
+"""공지 최신성: 질의의 기간 표현 → 작성일 범위, 작성일 → 결합 점수 배율.
+
+기간은 "오늘", "이번 주", "다음 달", "최근", "2024년", "3월", "10월 20일" 같은 표현만 읽는다.
+공지는 보통 해당 기간보다 먼저 올라오므로 시작일을 RECENCY_WINDOW_SLACK_DAYS만큼 앞당긴다.
+"""
+import calendar
+import re
+from datetime import date, timedelta
+from typing import Optional, Tuple
+import numpy as np
+from index.date_index import NO_DATE, to_day
+
+Window = Tuple[int, int]  # (시작, 끝) — 1970-01-01부터 일 수, 양끝 포함
+
+_MONTH_DAY = re.compile(r"(\d{1,2})\s*월\s*(\d{1,2})\s*일")
+_YEAR = re.compile(r"(\d{4})\s*년")
+_MONTH = re.compile(r"(\d{1,2})\s*월")
+# 연도 없는 월이 이만큼 안쪽의 앞날이면 다가올 달로, 아니면 지나간 달로 본다 (예고 공지)
+_AHEAD_MONTHS = 2
+
+
+def _month(year: int, month: int) -> Tuple[date, date]:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _week(d: date) -> Tuple[date, date]:
+    monday = d - timedelta(days=d.weekday())
+    return monday, monday + timedelta(days=6)
+
+
+def _shift_month(d: date, n: int) -> Tuple[int, int]:
+    k = d.year * 12 + d.month - 1 + n
+    return k // 12, k % 12 + 1
+
+
+def _guess_year(month: int, today: date) -> int:
+    # 연말·연초를 넘나들도록 달 차이를 12로 나눈 나머지로 센다 (12월 15일의 "1월" → 내년 1월)
+    ahead = (month - today.month) % 12
+    n = ahead if ahead <= _AHEAD_MONTHS else ahead - 12
+    return _shift_month(today, n)[0]
+
+
+def _period(query: str, today: date, recent_days: int) -> Optional[Tuple[date, date]]:
+    q = re.sub(r"\s+", " ", query)
+    if m := _MONTH_DAY.search(q):
+        month, day = int(m.group(1)), int(m.group(2))
+        # 연도가 없으면 오늘에서 가까운 해 (_guess_year)
+        y = _YEAR.search(q)
+        year = int(y.group(1)) if y else _guess_year(month, today)
+        try:
+            d = date(year, month, day)
+        except ValueError:
+            return None
+        return d, d
+    if re.search(r"오늘|금일", q):
+        return today, today
+    if "내일" in q:
+        return today + timedelta(days=1), today + timedelta(days=1)
+    if re.search(r"이번 ?주|금주", q):
+        return _week(today)
+    if re.search(r"다음 ?주", q):
+        return _week(today + timedelta(days=7))
+    if re.search(r"지난 ?주", q):
+        return _week(today - timedelta(days=7))
+    if re.search(r"이번 ?달|이달|금월", q):
+        return _month(today.year, today.month)
+    if re.search(r"다음 ?달", q):
+        return _month(*_shift_month(today, 1))
+    if re.search(r"지난 ?달", q):
+        return _month(*_shift_month(today, -1))
+    if re.search(r"최근|요즘", q):
+        return today - timedelta(days=recent_days), today
+    if m := _YEAR.search(q):
+        year = int(m.group(1))
+        month = _MONTH.search(q, m.end())
+        if month and 1 <= int(month.group(1)) <= 12:
+            return _month(year, int(month.group(1)))
+        return date(year, 1, 1), date(year, 12, 31)
+    if re.search(r"올해|금년", q):
+        return date(today.year, 1, 1), date(today.year, 12, 31)
+    if re.search(r"작년|지난 ?해", q):
+        return date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+    if m := _MONTH.search(q):
+        month = int(m.group(1))
+        if 1 <= month <= 12:
+            return _month(_guess_year(month, today), month)
+    return None
+
+
+def query_window(query: str, today: date, slack_days: int, recent_days: int) -> Optional[Window]:
+    """질의가 가리키는 작성일 범위. 기간 표현이 없으면 None."""
+    period = _period(query, today, recent_days)
+    if period is None:
+        return None
+    start, end = period
+    return to_day(start) - slack_days, to_day(end)
+
+
+def recency_factor(days: np.ndarray, today: int, half_life: float, weight: float) -> np.ndarray:
+    """결합 점수에 곱할 배율: 1 - weight + weight * 0.5^(나이/반감기). 날짜 없는 청크(FAQ)는 1."""
+    age = np.maximum(today - days.astype(np.float64), 0.0)
+    factor = 1.0 - weight + weight * np.exp2(-age / half_life)
+    return np.where(days == NO_DATE, 1.0, factor)
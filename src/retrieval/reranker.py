@@ -1,15 +1,156 @@
-from langchain_community.cross_encoders import HuggingFaceCrossEncoder
-from langchain.retrievers.document_compressors import CrossEncoderReranker
-from langchain.retrievers import ContextualCompressionRetriever
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sentence_transformers import CrossEncoder
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from core.config import settings
+from core.metrics import cache_result, metrics, observe_candidates, span
+
+
+def chunk_key(doc: Document) -> str:
+    cid = doc.metadata.get("chunk_id")
+    if cid:
+        return cid
+    return hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()[:16]
+
+
+class CachedCrossEncoder:
+    """(정규화한 질의, 청크 id) → 점수 LRU 캐시를 둔 cross-encoder."""
+
+    def __init__(self, model_name: str, batch_size: int, max_length: int, cache_size: int, model=None):
+        self.model = model or CrossEncoder(model_name, max_length=max_length)
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0  # 희소/밀집 상위가 일치해 재정렬을 건너뛴 질의 수
+
+    def score(self, query: str, docs: List[Document]) -> List[float]:
+        q = " ".join(query.split()).lower()
+        keys = [(q, chunk_key(d)) for d in docs]
+        scores: Dict[Tuple[str, str], float] = {}
+        with self._lock:
+            for k in keys:
+                if k in self._cache:
+                    self._cache.move_to_end(k)
+                    scores[k] = self._cache[k]
+        todo = [(k, d) for k, d in zip(keys, docs) if k not in scores]
+        # 같은 청크가 중복으로 들어오면 한 번만 계산
+        todo = list({k: d for k, d in todo}.items())
+        if todo:
+            pairs = [(query, d.page_content) for _, d in todo]
+            preds = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            with self._lock:
+                for (k, _), s in zip(todo, preds):
+                    scores[k] = float(s)
+                    self._cache[k] = float(s)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        with self._lock:
+            self.hits += len(keys) - len(todo)
+            self.misses += len(todo)
+        cache_result("rerank", True, len(keys) - len(todo))
+        cache_result("rerank", False, len(todo))
+        return [scores[k] for k in keys]
+
+    def fork(self, stale_chunks: Optional[Iterable[str]] = None) -> "CachedCrossEncoder":
+        """새 인덱스 버전용 캐시. 모델은 공유하고, 지워지거나 바뀐 청크를 뺀 점수만 옮긴다 (None이면 빈 캐시).
+
+        이전 버전으로 진행 중인 요청은 원래 캐시에 쓰므로 새 캐시에 옛 점수가 섞이지 않는다.
+        """
+        other = CachedCrossEncoder("", self.batch_size, 0, self.cache_size, model=self.model)
+        with self._lock:
+            if stale_chunks is not None:
+                drop = set(stale_chunks)
+                other._cache = OrderedDict((k, v) for k, v in self._cache.items() if k[1] not in drop)
+            other.hits, other.misses, other.skipped = self.hits, self.misses, self.skipped
+        return other
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped_queries": self.skipped,
+            "entries": len(self._cache),
+        }
+
+
+class RerankRetriever(BaseRetriever):
+    base_retriever: BaseRetriever
+    scorer: Any
+    top_n: int = 4
+    agree_top_n: int = 0
+
+    def _candidate_lists(self, query: str, run_manager) -> Tuple[List[Document], Optional[List[List[str]]]]:
+        base = self.base_retriever
+        if hasattr(base, "search_lists"):
+            # 하이브리드 검색은 희소/밀집 id 목록을 받아 직접 합쳐야 일치 여부를 볼 수 있다
+            lists = base.search_lists(query)
+            return base.fuse(lists), lists
+        return base.invoke(query, config={"callbacks": run_manager.get_child()}), None
+
+    def _agree(self, lists: Optional[List[List[str]]]) -> bool:
+        n = self.agree_top_n
+        if n <= 0 or not lists or len(lists) < 2:
+            return False
+        tops = [set(l[:n]) for l in lists]
+        return len(tops[0]) == n and all(t == tops[0] for t in tops[1:])
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        candidates, lists = self._candidate_lists(query, run_manager)
+        if not candidates:
+            return []
+        if self._agree(lists):
+            with self.scorer._lock:
+                self.scorer.skipped += 1
+            metrics.inc("rag_rerank_skipped_total")
+            return candidates[: self.top_n]
+        with span("rerank", n=len(candidates)):
+            scores = self.scorer.score(query, candidates)
+        ranked = sorted(zip(candidates, scores), key=lambda x: x[1], reverse=True)[: self.top_n]
+        observe_candidates("reranked", len(ranked))
+        # docstore 원본을 건드리지 않도록 복사본에 점수를 단다
+        return [
+            Document(page_content=d.page_content, metadata={**d.metadata, "rerank_score": s})
+            for d, s in ranked
+        ]
+
 
 class CrossEncoderWrapper:
     def __init__(self, base_retriever, top_n: int):
-        xenc = HuggingFaceCrossEncoder(model_name="BAAI/bge-reranker-v2-m3")
-        compressor = CrossEncoderReranker(model=xenc, top_n=top_n)
-        self.retriever = ContextualCompressionRetriever(
+        self.scorer = CachedCrossEncoder(
+            settings.RERANK_MODEL,
+            batch_size=settings.RERANK_BATCH_SIZE,
+            max_length=settings.RERANK_MAX_LENGTH,
+            cache_size=settings.RERANK_CACHE_SIZE,
+        )
+        self.retriever = RerankRetriever(
             base_retriever=base_retriever,
-            base_compressor=compressor,
+            scorer=self.scorer,
+            top_n=top_n,
+            agree_top_n=settings.RERANK_AGREE_TOP_N,
         )
 
     def get(self):
         return self.retriever
+
+    def rebind(self, base_retriever, stale_chunks: Optional[Iterable[str]] = None):
+        # 새 인덱스의 검색기로 바꾼다. 이전 retriever(와 그 캐시)는 진행 중인 요청이 끝날 때까지 그대로 쓰인다
+        self.scorer = self.scorer.fork(stale_chunks)
+        self.retriever = RerankRetriever(
+            base_retriever=base_retriever,
+            scorer=self.scorer,
+            top_n=self.retriever.top_n,
+            agree_top_n=self.retriever.agree_top_n,
+        )
+        return self.retriever
+
+    def stats(self) -> Dict[str, int]:
+        return self.scorer.stats()
@@ -0,0 +1,124 @@
+"""질의 라우터: FAQ만 / 공지만 / 둘 다 중 어디를 검색할지 정한다.
+
+현재 인덱스의 청크 벡터(원천별 라벨)로 학습한 로지스틱 회귀가 p(공지)를 내고, 질의의 단서 단어가
+로짓을 앞뒤로 민다. "공지"처럼 원천을 직접 가리키는 말이 있으면 분류기 없이 정한다.
+HybridRetrieverFactory.create()가 인덱스를 처음 볼 때와, 부분 갱신으로 원천·분류 비율이
+ROUTER_REFIT_DRIFT 넘게 움직였을 때만 다시 학습한다 (수천 청크에 수십 ms).
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+
+FAQ, NOTICE = "faq", "notice"
+
+# 원천을 직접 가리키는 말
+_EXPLICIT = {
+    NOTICE: re.compile(r"공지|알림글|게시글"),
+    FAQ: re.compile(r"FAQ|자주\s*묻는", re.IGNORECASE),
+}
+# 단서: 날짜·일정·일시적 변경은 공지 쪽, 방법·위치·규정은 FAQ 쪽
+_NOTICE_CUES = re.compile(r"휴관|임시|행사|특강|모집|변경|연장|중단|점검|개최|이벤트|설문|공모|선정|마감|"
+                          r"이번\s*주|다음\s*주|이번\s*달|오늘|내일|올해|최근|\d{4}년|\d{1,2}월\s*\d{1,2}일")
+_FAQ_CUES = re.compile(r"방법|어떻게|어디|위치|연락처|전화|규정|자격|절차|신청서|몇\s*권|며칠|연체|반납|대출|이용\s*안내")
+
+
+@dataclass
+class Route:
+    sources: Tuple[str, ...]
+    categories: Tuple[str, ...] = ()
+    p_notice: float = 0.5
+    reason: str = "classifier"  # "explicit" | "classifier" | "off"
+
+    @property
+    def name(self) -> str:
+        return "both" if len(self.sources) > 1 else self.sources[0]
+
+    def filters(self) -> Dict[str, Tuple[str, ...]]:
+        # 둘 다면 원천 조건은 빼고, 분류 조건은 category가 있는 문서(FAQ)에만 걸린다
+        out = {}
+        if len(self.sources) == 1:
+            out["source_type"] = self.sources
+        if self.categories:
+            out["category"] = self.categories
+        return out
+
+
+BOTH = Route((FAQ, NOTICE), reason="off")
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12)
+
+
+def fit_logistic(X: np.ndarray, y: np.ndarray, l2: float = 1e-3, iters: int = 300, lr: float = 1.0):
+    """클래스 균형 가중치를 준 L2 로지스틱 회귀 (배치 경사 하강). (w, b)."""
+    n, d = X.shape
+    pos = max(y.sum(), 1)
+    weight = np.where(y == 1, n / (2 * pos), n / (2 * max(n - pos, 1)))
+    w, b = np.zeros(d, dtype=np.float64), 0.0
+    for _ in range(iters):
+        p = 1.0 / (1.0 + np.exp(-(X @ w + b)))
+        g = weight * (p - y)
+        w -= lr * (X.T @ g / n + l2 * w)
+        b -= lr * g.mean()
+    return w, b
+
+
+class QueryRouter:
+    def __init__(self, w: Optional[np.ndarray], b: float, centroids: Dict[str, np.ndarray],
+                 notice_threshold: float, faq_threshold: float, keyword_weight: float, top_categories: int):
+        self.w, self.b = w, b
+        self.centroids = centroids  # FAQ 분류 -> 정규화한 평균 벡터
+        self.notice_threshold = notice_threshold
+        self.faq_threshold = faq_threshold
+        self.keyword_weight = keyword_weight
+        self.top_categories = top_categories
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, sources: Sequence[str], categories: Sequence[str], **kw) -> "QueryRouter":
+        """vectors: 청크 벡터, sources/categories: 같은 순서의 source_type/category."""
+        X = _normalize(np.asarray(vectors, dtype=np.float64))
+        src = np.asarray(sources)
+        y = (src == NOTICE).astype(np.float64)
+        # 한쪽 원천만 있으면 분류할 것이 없다
+        w, b = fit_logistic(X, y) if 0 < y.sum() < len(y) else (None, 0.0)
+        cats = np.asarray(categories)
+        centroids = {str(c): _normalize(X[(src == FAQ) & (cats == c)].mean(axis=0))
+                     for c in sorted(set(cats[src == FAQ])) if c}
+        return cls(w, b, centroids, **kw)
+
+    def needs_vector(self, query: str) -> bool:
+        # 원천을 직접 가리키고 분류 라우팅도 끄면 질의 임베딩 없이 정해진다
+        if self.top_categories and self.centroids:
+            return True
+        return self.w is not None and not self._explicit(query)
+
+    @staticmethod
+    def _explicit(query: str) -> Optional[str]:
+        hits = [s for s, pat in _EXPLICIT.items() if pat.search(query)]
+        return hits[0] if len(hits) == 1 else None
+
+    def route(self, query: str, vec: Optional[np.ndarray] = None) -> Route:
+        explicit = self._explicit(query)
+        q = _normalize(np.asarray(vec, dtype=np.float64).ravel()) if vec is not None else None
+        if explicit:
+            sources, p, reason = (explicit,), float(explicit == NOTICE), "explicit"
+        elif self.w is None or q is None:
+            sources, p, reason = (FAQ, NOTICE), 0.5, "off"
+        else:
+            cues = len(_NOTICE_CUES.findall(query)) - len(_FAQ_CUES.findall(query))
+            p = float(1.0 / (1.0 + np.exp(-(q @ self.w + self.b + self.keyword_weight * cues))))
+            if p >= self.notice_threshold:
+                sources = (NOTICE,)
+            elif p <= self.faq_threshold:
+                sources = (FAQ,)
+            else:
+                sources = (FAQ, NOTICE)
+            reason = "classifier"
+        categories = ()
+        if FAQ in sources and self.top_categories and q is not None and len(self.centroids) > self.top_categories:
+            names = list(self.centroids)
+            sims = np.stack([self.centroids[c] for c in names]) @ q
+            categories = tuple(names[i] for i in np.argsort(-sims)[: self.top_categories])
+        return Route(sources, categories, p, reason)
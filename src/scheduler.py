@@ -1,13 +1,41 @@
+from datetime import datetime
+from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.schedulers.blocking import BlockingScheduler
-from src.config_loader import load_config
-import subprocess
+from core.config import settings
+from services.refresh import get_refresh
 
-cfg = load_config("scheduler")
-sched = BlockingScheduler()
 
-@sched.scheduled_job("interval", minutes=cfg["notice_page"]["interval_minutes"])
-def update_notices():
-    subprocess.run(["poetry", "run", "crawl-detail"])  # or scripts/crawl_detail.py
+# 새 공지가 없으면 목록 1쪽 요청 한 번으로 끝나므로 몇 분 간격으로 돌려도 된다
+def refresh_job():
+    report = get_refresh().run()
+    stages = {name: s["seconds"] for name, s in report.get("stages", {}).items()}
+    print(f"[scheduler] 갱신 {report.get('seconds', 0):.2f}s 단계={stages} 건너뜀={report.get('skipped')}")
+    if "index" in report.get("stages", {}):
+        print(f"[scheduler] 인덱스: {report['stages']['index']}")
 
-def main():
+
+def _add_job(sched, run_now: bool):
+    # 실행이 겹치면 건너뛴다 (크롤이 주기보다 오래 걸리는 경우)
+    sched.add_job(refresh_job, "interval", minutes=settings.NOTICE_REFRESH_MINUTES, id="refresh",
+                  max_instances=1, coalesce=True, **({"next_run_time": datetime.now()} if run_now else {}))
+    return sched
+
+
+def start_background() -> BackgroundScheduler:
+    """같은 프로세스의 ChatService에 새 인덱스를 바로 넘겨 주는 백그라운드 갱신 (services.warmup에서 시작).
+
+    ChatService가 시작할 때 이미 인덱스를 맞췄으므로 첫 실행은 한 주기 뒤.
+    """
+    sched = _add_job(BackgroundScheduler(daemon=True), run_now=False)
     sched.start()
+    return sched
+
+
+def main():
+    # 따로 띄우면 디스크에 새 버전만 올린다. API 워커의 ChatService는 index-watch 스레드가
+    # INDEX_WATCH_SECONDS마다 CURRENT를 보고 불러와 바꿔 낀다
+    _add_job(BlockingScheduler(), run_now=True).start()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,337 @@
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, List, Tuple
 from core.config import settings
-from core.types import Answer, Message
-from data.json_loader import JsonLoader
+from core.metrics import metrics
+from core.types import Answer, Message, StreamEvent
+from data.chunker import tokenizer_length
+from data.ingest import IngestPipeline
+from index import versions
 from index.faiss_store import FaissStore
 from retrieval.hybrid import HybridRetrieverFactory
 from retrieval.reranker import CrossEncoderWrapper
+from retrieval.router import BOTH
 from rag.engine import ChatEngine
+from rag.answer_cache import SemanticAnswerCache
+
+class ServiceBusy(RuntimeError):
+    """동시 처리 한도가 찼고 대기 시간(ASYNC_QUEUE_TIMEOUT) 안에 자리가 나지 않음."""
+
+
+# 이 프로세스에서 살아 있는 ChatService들 (갱신 작업이 새 인덱스를 넘겨 준다)
+_live: "weakref.WeakSet[ChatService]" = weakref.WeakSet()
+
+
+def live_services() -> List["ChatService"]:
+    return list(_live)
+
+
+# 이 프로세스의 갱신 작업이 새 버전을 만들어 publish()로 직접 넘겨 주는 중인 수
+_publishing = 0
+_publishing_lock = threading.Lock()
+
+
+@contextmanager
+def publishing():
+    """이 안에서 올린 버전은 갱신 작업이 fork()한 사본으로 넘겨 주므로, 감시 스레드가 CURRENT를 보고
+    같은 버전을 디스크에서 한 벌 더 읽지 않는다."""
+    global _publishing
+    with _publishing_lock:
+        _publishing += 1
+    try:
+        yield
+    finally:
+        with _publishing_lock:
+            _publishing -= 1
+
+
+class _IndexHandle:
+    """인덱스 한 버전의 검색 경로 (FAISS·희소 인덱스·재정렬 캐시).
+
+    refs는 이 버전을 쓰는 요청 수 + 현재 버전이면 1. 0이 되면 버전 고정(pin)을 풀어 GC 대상이 된다.
+    """
+
+    def __init__(self, store: FaissStore, retriever, scorer):
+        self.store = store
+        self.retriever = retriever
+        self.scorer = scorer
+        self.version = store.version
+        self.refs = 1
+        versions.pin(settings.index_path(), self.version)
+
 
 class ChatService:
     def __init__(self):
-        self._docs = JsonLoader(settings.DATA_JSON).load()
+        # 단계별 로딩 시간(초) — 워밍업 리포트용
+        self.timings: dict = {}
+        t = time.perf_counter()
         self._store = FaissStore()
-        if not settings.index_path().exists():
-            self._store.build(self._docs)
-        base_retriever = HybridRetrieverFactory(self._docs, self._store).create()
-        reranked = CrossEncoderWrapper(base_retriever, top_n=settings.TOP_N_RERANKED).get()
-        self.engine = ChatEngine(reranked)
-
-    def answer(self, question: str, history: list[Message]) -> Answer:
-        return self.engine.ask(question, history)
+        t = self._lap("embedder", t)
+        # 원천 JSON을 스트리밍으로 읽어 바뀐 청크만 재임베딩 (인덱스가 없으면 전체 빌드)
+        self._pipeline = IngestPipeline.from_settings()
+        self._store.sync(self._pipeline.iter_documents())
+        t = self._lap("index", t)
+        self._hybrid = HybridRetrieverFactory(self._store)
+        base_retriever = self._hybrid.create()
+        t = self._lap("retriever", t)
+        self._reranker = CrossEncoderWrapper(base_retriever, top_n=settings.TOP_N_RERANKED)
+        self._handle = _IndexHandle(self._store, self._reranker.get(), self._reranker.scorer)
+        self._handle_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        # 옛 버전 폴더 정리(rmtree)는 요청 경로·이벤트 루프 밖의 이 스레드에서만
+        self._gc_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-gc")
+        self._gc_queued = threading.Event()
+        t = self._lap("reranker", t)
+        self._answer_cache = None
+        if settings.ANSWER_CACHE_ENABLED:
+            self._answer_cache = SemanticAnswerCache(
+                self._store,
+                threshold=settings.ANSWER_CACHE_THRESHOLD,
+                ttl=settings.ANSWER_CACHE_TTL,
+                max_entries=settings.ANSWER_CACHE_MAX,
+                route=self._route_sources,
+            )
+        # 비동기 요청의 임베딩/재정렬은 이 풀에서만 돈다 (요청 수만큼 스레드가 늘지 않도록)
+        self._cpu_pool = ThreadPoolExecutor(max_workers=settings.ASYNC_CPU_WORKERS, thread_name_prefix="rag-cpu")
+        self.engine = ChatEngine(self._reranker.get(), answer_cache=self._answer_cache, executor=self._cpu_pool,
+                                 token_len=tokenizer_length(self._store.emb))
+        self._lap("llm", t)
+        # asyncio.Semaphore는 이벤트 루프에 묶이므로 루프마다 하나
+        self._gates: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+        self._metrics_lock = threading.Lock()
+        self._async = {"in_flight": 0, "queue_depth": 0, "max_queue_depth": 0,
+                       "completed": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+        self.published = 0
+        self.retired = 0
+        _live.add(self)
+        # 다른 프로세스(scheduler 등)가 올린 새 버전을 백그라운드에서 불러와 바꿔 낀다
+        self._closed = threading.Event()
+        if settings.INDEX_WATCH_SECONDS > 0:
+            threading.Thread(target=self._watch, name="index-watch", daemon=True).start()
+
+    def _lap(self, name: str, t0: float) -> float:
+        now = time.perf_counter()
+        self.timings[name] = round(now - t0, 3)
+        return now
+
+    @property
+    def store(self) -> FaissStore:
+        return self._store
+
+    def _acquire(self) -> _IndexHandle:
+        # 요청이 끝날 때까지 그 요청이 시작한 버전을 붙잡아 둔다 (_release와 짝)
+        with self._handle_lock:
+            handle = self._handle
+            handle.refs += 1
+        return handle
+
+    @contextmanager
+    def _lease(self) -> Iterator[_IndexHandle]:
+        handle = self._acquire()
+        try:
+            yield handle
+        finally:
+            self._release(handle)
+
+    def _release(self, handle: _IndexHandle):
+        with self._handle_lock:
+            handle.refs -= 1
+            done = handle.refs == 0
+        if done:
+            versions.unpin(settings.index_path(), handle.version)
+            self.retired += 1
+            if not self._gc_queued.is_set():
+                self._gc_queued.set()
+                self._gc_pool.submit(self._gc)
+
+    def _gc(self):
+        self._gc_queued.clear()
+        try:
+            versions.gc(settings.index_path(), settings.INDEX_KEEP_VERSIONS)
+        except Exception as e:
+            print(f"[chat_service] 옛 인덱스 정리 실패: {e}")
+
+    def publish(self, store: FaissStore) -> bool:
+        """새 인덱스로 검색 경로를 바꿔 끼운다 (재시작 없이). 이미 같거나 더 새 버전이면 False.
+
+        진행 중인 요청은 시작할 때 잡은 버전으로 끝나고, 다음 요청부터 새 버전을 본다.
+        재정렬 캐시는 두 버전의 매니페스트를 비교해 바뀌지 않은 청크의 점수만 옮긴다.
+        store는 다른 곳에서 고치지 않는 사본이어야 한다 (FaissStore.fork 또는 새로 load한 것).
+        """
+        with self._swap_lock:
+            old = self._handle
+            if old.version is not None and (store.version is None or store.version <= old.version):
+                return False
+            before, after = old.store.manifest, store.manifest
+            stale = [cid for cid, h in before.items() if after.get(cid) != h]
+            self._hybrid.store = store
+            retriever = self._reranker.rebind(self._hybrid.create(), stale)
+            handle = _IndexHandle(store, retriever, self._reranker.scorer)
+            if self._answer_cache:
+                added = [cid for cid, h in after.items() if before.get(cid) != h]
+                sources = {d.metadata.get("source_type", "") for d in store.get_documents(added)}
+                self._answer_cache.rebind(store, sources)
+            with self._handle_lock:
+                self._handle = handle
+            self._store = store
+            self.engine.retriever = retriever
+            self.published += 1
+        self._release(old)
+        return True
+
+    def _route_sources(self, query: str, vec) -> tuple:
+        # 답변 캐시용: 이 질의가 검색할 원천 (라우터가 없으면 전체)
+        router = self._hybrid.router
+        return router.route(query, vec).sources if router is not None else BOTH.sources
+
+    def reload_if_changed(self) -> bool:
+        """CURRENT가 더 새 버전을 가리키면 불러와 바꿔 낀다 (로딩은 호출한 스레드에서)."""
+        if _publishing:
+            # 같은 프로세스의 갱신 작업이 곧 넘겨 줄 버전
+            return False
+        latest = versions.current_version(settings.index_path())
+        current = self._handle.version
+        if latest is None or (current is not None and latest <= current):
+            return False
+        store = FaissStore(emb=self._store.emb)
+        store.load()
+        store.load_sparse()
+        return self.publish(store)
+
+    def _watch(self):
+        while not self._closed.wait(settings.INDEX_WATCH_SECONDS):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"[chat_service] 새 인덱스 불러오기 실패: {e}")
+
+    def close(self):
+        self._closed.set()
+
+    def answer(self, question: str, history: list[Message], summary: str = "", summarized: int = 0) -> Answer:
+        with self._lease() as index:
+            return self.engine.ask(question, history, retriever=index.retriever,
+                                   summary=summary, summarized=summarized)
+
+    def answer_stream(self, question: str, history: list[Message],
+                      summary: str = "", summarized: int = 0) -> Iterator[StreamEvent]:
+        with self._lease() as index:
+            yield from self.engine.ask_stream(question, history, retriever=index.retriever,
+                                              summary=summary, summarized=summarized)
+
+    def summarize(self, history: list[Message], summary: str = "", summarized: int = 0) -> Tuple[str, int]:
+        """대화 요약 갱신 (rag/memory.py). 답변과 따로 불러도 되고, 답변과 동시에 돌려도 된다."""
+        return self.engine.summarize(history, summary, summarized)
+
+    async def asummarize(self, history: list[Message], summary: str = "", summarized: int = 0) -> Tuple[str, int]:
+        return await self.engine.asummarize(history, summary, summarized)
+
+    def _gate(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        gate = self._gates.get(loop)
+        if gate is None:
+            gate = self._gates[loop] = asyncio.Semaphore(settings.ASYNC_MAX_CONCURRENCY)
+        return gate
+
+    def _count(self, key: str, delta: int = 1):
+        with self._metrics_lock:
+            self._async[key] += delta
+            if key == "queue_depth":
+                self._async["max_queue_depth"] = max(self._async["max_queue_depth"], self._async["queue_depth"])
+
+    async def _admit(self) -> asyncio.Semaphore:
+        # 한도가 차 있으면 대기열에서 기다리다 ASYNC_QUEUE_TIMEOUT을 넘기면 ServiceBusy
+        gate = self._gate()
+        queued = gate.locked()
+        if queued:
+            self._count("queue_depth")
+        try:
+            await asyncio.wait_for(gate.acquire(), timeout=settings.ASYNC_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._count("rejected")
+            raise ServiceBusy("요청이 많아 잠시 후 다시 시도해 주세요.") from None
+        finally:
+            if queued:
+                self._count("queue_depth", -1)
+        self._count("in_flight")
+        return gate
+
+    def _done(self, gate: asyncio.Semaphore, outcome: str):
+        self._count("in_flight", -1)
+        self._count(outcome)
+        gate.release()
+
+    async def aanswer(self, question: str, history: list[Message], summary: str = "", summarized: int = 0) -> Answer:
+        gate = await self._admit()
+        outcome = "errors"
+        try:
+            with self._lease() as index:
+                answer = await asyncio.wait_for(
+                    self.engine.aask(question, history, retriever=index.retriever,
+                                     summary=summary, summarized=summarized),
+                    timeout=settings.ASYNC_REQUEST_TIMEOUT)
+            outcome = "completed"
+            return answer
+        except asyncio.TimeoutError:
+            outcome = "timeouts"
+            raise
+        finally:
+            self._done(gate, outcome)
+
+    async def aanswer_stream(self, question: str, history: list[Message],
+                             summary: str = "", summarized: int = 0) -> AsyncIterator[StreamEvent]:
+        # 스트림이 끝날 때까지 자리를 잡고, 다음 조각을 기다리는 시간까지 포함해 전체 제한 시간을 건다
+        gate = await self._admit()
+        outcome = "errors"
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.ASYNC_REQUEST_TIMEOUT
+        index = self._acquire()
+        events = self.engine.aask_stream(question, history, retriever=index.retriever,
+                                         summary=summary, summarized=summarized).__aiter__()
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                yield event
+            outcome = "completed"
+        except asyncio.TimeoutError:
+            outcome = "timeouts"
+            raise
+        finally:
+            await events.aclose()
+            self._release(index)
+            self._done(gate, outcome)
+
+    def async_stats(self) -> dict:
+        with self._metrics_lock:
+            return dict(self._async, limit=settings.ASYNC_MAX_CONCURRENCY)
+
+    def index_stats(self) -> dict:
+        handle = self._handle
+        return {
+            "version": handle.version,
+            "chunks": handle.store.vs.index.ntotal if handle.store.vs else 0,
+            "published": self.published,
+            "retired": self.retired,
+            "versions_on_disk": versions.list_versions(settings.index_path()),
+        }
+
+    def stats(self) -> dict:
+        out = {
+            "reranker": self._reranker.stats(),
+            "embeddings": self._store.emb.stats(),
+            "index_build": self._store.embed_stats,
+            "async": self.async_stats(),
+            "index": self.index_stats(),
+            "metrics": metrics.snapshot(),
+        }
+        if self._answer_cache:
+            out["answer_cache"] = self._answer_cache.stats()
+        return out
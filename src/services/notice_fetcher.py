@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from core.config import settings
+from services.notice_parser import BASE_URL, parse_notice_detail, parse_notice_list
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; SogangNoticeBot/1.0)"}
+
+
+class RateLimiter:
+    """요청 시작 간격을 1/rate 초 이상으로 유지 (여러 스레드가 공유)."""
+
+    def __init__(self, rate_per_sec: float):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class NoticeFetcher:
+    """연결을 재사용하는 Session + 제한된 동시성으로 공지 상세를 가져온다.
+
+    URL별 ETag/Last-Modified와 파싱 결과를 state_path에 저장해 두고,
+    다음 크롤 때 조건부 요청을 보내 304면 저장된 결과를 그대로 쓴다.
+    """
+
+    def __init__(self, base_url: str = BASE_URL, max_workers: int = 8, rate_per_sec: float = 10.0,
+                 state_path: str = "database/crawl_cache.json", timeout: float = 10):
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.state_path = Path(state_path) if state_path else None
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.limiter = RateLimiter(rate_per_sec)
+        self.cache: Dict[str, dict] = self._load_state()
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> Dict[str, dict]:
+        if self.state_path and self.state_path.exists():
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        # 같은 파일을 쓰는 다른 프로세스/스레드와 임시 파일이 겹치지 않도록
+        tmp = self.state_path.with_name(f".{self.state_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+    def prune(self, keep_ids) -> int:
+        """keep_ids에 없는 공지(보존 기간 밖으로 나간 공지)의 캐시 항목을 뺀다. 뺀 개수."""
+        with self._lock:
+            stale = [url for url in self.cache if notice_id(url) not in keep_ids]
+            for url in stale:
+                del self.cache[url]
+        return len(stale)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        self.limiter.wait()
+        return self.session.get(url, timeout=self.timeout, **kwargs)
+
+    def fetch_detail(self, url: str) -> dict:
+        entry = self.cache.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        r = self.get(url, headers=headers)
+        if r.status_code == 304:
+            if entry:
+                with self._lock:
+                    self.stats["not_modified"] += 1
+                return entry["detail"]
+            # 캐시 항목이 없는데 304 (다른 스레드가 prune했거나 프록시가 붙인 경우) → 검증자 없이 다시 받는다
+            r = self.get(url, headers={"Cache-Control": "no-cache"})
+            if r.status_code == 304:
+                # 빈 본문을 파싱해 캐시에 넣지 않도록 실패로 처리 (다음 크롤에서 다시)
+                raise requests.HTTPError(f"304 without a cached copy: {url}", response=r)
+        r.raise_for_status()
+        detail = parse_notice_detail(r.text, url, self.base_url)
+        with self._lock:
+            self.stats["fetched"] += 1
+            self.cache[url] = {
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "detail": detail,
+            }
+        return detail
+
+    def _fetch_or_error(self, url: str):
+        try:
+            return self.fetch_detail(url)
+        except Exception as e:
+            with self._lock:
+                self.stats["failed"] += 1
+            return e
+
+    def fetch_rows(self, state: "CrawlState", cutoff: str) -> Tuple[List[dict], List[dict]]:
+        """(새 공지 행, 1쪽에 있는 이미 본 공지 행)을 돌려준다.
+
+        목록을 1쪽부터 읽다가 이미 본 공지(또는 보존 기간 밖)를 만나면 멈추고, 1쪽 지문이
+        지난번과 같으면 요청 한 번으로 끝난다. 이미 본 공지는 수정됐을 수 있으므로 1쪽(최근·상단 고정)
+        것만 따로 돌려줘 호출하는 쪽이 조건부 요청으로 다시 확인하게 한다.
+        """
+        new_rows, recent = [], []
+        seen = set()
+        page = 1
+        while True:
+            r = self.get(f"{self.base_url}/bbs/list/1", params={"pn": page})
+            r.raise_for_status()
+            rows = parse_notice_list(r.text, self.base_url)
+            if not rows:
+                break
+            if page == 1:
+                recent_ids = set()
+                for row in rows:
+                    nid = notice_id(row["링크"])
+                    if nid <= state.max_id and row["작성일"] >= cutoff and nid not in recent_ids:
+                        recent_ids.add(nid)
+                        recent.append(row)
+            fp = _fingerprint(rows)
+            if state.pages.get(str(page)) == fp:
+                break
+            state.pages[str(page)] = fp
+
+            stop = False
+            for row in rows:
+                nid = notice_id(row["링크"])
+                pinned = not row["No."].isdigit()  # 상단 고정 공지는 번호 대신 '공지'
+                if row["작성일"] < cutoff and not pinned:
+                    stop = True
+                    break
+                if nid <= state.max_id:
+                    if not pinned:
+                        stop = True
+                        break
+                    continue
+                if nid not in seen:
+                    seen.add(nid)
+                    new_rows.append(row)
+            if stop:
+                break
+            page += 1
+        return new_rows, recent
+
+    def fetch_details(self, urls: List[str]) -> Dict[str, object]:
+        """url -> 상세 dict (실패하면 예외 객체). 입력 순서를 유지한다."""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="notice") as ex:
+            results = list(ex.map(self._fetch_or_error, urls))
+        self.save_state()
+        return dict(zip(urls, results))
+
+
+def notice_id(url: str) -> int:
+    # .../bbs/content/1_61013?pn=1& → 61013
+    m = re.search(r"/content/\d+_(\d+)", url)
+    return int(m.group(1)) if m else 0
+
+
+def _fingerprint(rows: List[dict]) -> str:
+    # 조회수는 계속 바뀌므로 제외
+    raw = "\n".join(f"{r['링크']}|{r['제목']}|{r['작성일']}" for r in rows)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    """마지막으로 본 최고 공지 번호와 목록 페이지 지문을 저장한다."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.max_id = 0
+        self.pages: Dict[str, str] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.max_id = data.get("max_id", 0)
+            self.pages = data.get("pages", {})
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"max_id": self.max_id, "pages": self.pages}, f)
+        os.replace(tmp, self.path)
+
+
+def update_notices_json(file_path: str = None, fetcher: NoticeFetcher = None,
+                        on_crawl: Callable[[List[dict], Dict[str, object], CrawlState, List[dict]], None] = None
+                        ) -> dict:
+    """notices.json에 새 공지를 추가하고, 1쪽의 이미 본 공지가 수정됐으면 고치고, 보존 기간이 지난 공지는 뺀다.
+
+    on_crawl(rows, details, state, recent)를 주면 같은 크롤 결과를 넘겨 준다 (공지 DB를 다시 크롤하지 않고 채우는 용도).
+    """
+    file_path = Path(file_path or settings.NOTICES_JSON)
+    fetcher = fetcher or NoticeFetcher(max_workers=settings.CRAWL_WORKERS, rate_per_sec=settings.CRAWL_RATE,
+                                       state_path=settings.CRAWL_CACHE)
+    cutoff = (date.today() - timedelta(days=settings.NOTICE_RETENTION_DAYS)).isoformat()
+
+    notices = []
+    if file_path.exists():
+        with open(file_path, "r", encoding="utf-8") as f:
+            notices = json.load(f)
+    state = CrawlState(settings.CRAWL_STATE)
+    if not state.max_id and notices:
+        # 상태 파일이 없으면 기존 스냅샷의 최고 번호부터 이어서 크롤
+        state.max_id = max(notice_id(n["source"]) for n in notices)
+
+    rows, recent = fetcher.fetch_rows(state, cutoff)
+    # 1쪽의 이미 본 공지는 조건부 요청으로 다시 받는다 (대개 304라 캐시된 상세를 그대로 씀)
+    urls = [r["링크"] for r in rows + recent]
+    details = fetcher.fetch_details(urls) if urls else {}
+    by_id = {notice_id(n["source"]): i for i, n in enumerate(notices)}
+    added, failed, updated = [], [], 0
+    for row in rows + recent:
+        nid = notice_id(row["링크"])
+        d = details[row["링크"]]
+        if isinstance(d, Exception):
+            print(f"상세 내용 가져오기 실패: {row['링크']}, 오류: {d}")
+            if nid > state.max_id:
+                failed.append(nid)
+            continue
+        entry = {
+            "source": row["링크"],
+            "title": row["제목"],
+            "author": row["작성자"],
+            "date": row["작성일"],
+            "content": d["body"],
+        }
+        if nid not in by_id:
+            by_id[nid] = None
+            added.append(entry)
+        elif by_id[nid] is not None:
+            old = notices[by_id[nid]]
+            if (old.get("title"), old.get("content")) != (entry["title"], entry["content"]):
+                notices[by_id[nid]] = entry
+                updated += 1
+
+    if failed:
+        # 실패한 공지는 다음 크롤에서 다시 보도록 그 아래 번호까지만 기록
+        state.max_id = max(state.max_id, min(failed) - 1)
+        state.pages.clear()
+    elif rows:
+        state.max_id = max(state.max_id, *(notice_id(r["링크"]) for r in rows))
+    if on_crawl is not None:
+        on_crawl(rows, details, state, recent)
+
+    kept = [n for n in notices if n.get("date", "") >= cutoff]
+    pruned = len(notices) - len(kept)
+    # 조건부 요청 캐시도 남은 공지만 (crawl_cache.json이 끝없이 커지지 않도록)
+    if fetcher.prune({notice_id(n["source"]) for n in added + kept}):
+        fetcher.save_state()
+    if added or updated or pruned:
+        tmp = file_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(added + kept, f, ensure_ascii=False, indent=4)
+        os.replace(tmp, file_path)
+    state.save()
+    return {"added": len(added), "updated": updated, "pruned": pruned, "total": len(added) + len(kept),
+            **fetcher.stats}
@@ -0,0 +1,126 @@
+import re
+from urllib.parse import urljoin
+from lxml import html as lxml_html
+
+BASE_URL = "https://library.sogang.ac.kr"
+NOTICE_URL = "https://library.sogang.ac.kr/bbs/list/1"
+
+_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+def _cls(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 본문 후보 (앞에서부터 처음 찾은 것): .boardContent → .board-view .board-txt → ... → #content
+_CONTENT_XPATHS = [
+    f"//*[{_cls('boardContent')}]",
+    f"//*[{_cls('board-view')}]//*[{_cls('board-txt')}]",
+    f"//*[{_cls('bbs_view')}]//*[{_cls('view_con')}]",
+    f"//*[{_cls('contents')}]",
+    "//article",
+    "//*[@id='content']",
+]
+# h3, h2, .title, .board-tit 중 문서 순서상 첫 번째
+_TITLE_XPATH = f"(//h3 | //h2 | //*[{_cls('title')}] | //*[{_cls('board-tit')}])[1]"
+_ADDFILES_XPATH = f"//ul[{_cls('addFiles')}]//a[@href]"
+
+
+def _parse(html: str):
+    # 빈 본문(빈 응답 등)이면 lxml이 ParserError를 내므로 빈 문서로 본다
+    if not html or not html.strip():
+        return lxml_html.document_fromstring("<html></html>", parser=_PARSER)
+    return lxml_html.document_fromstring(html.encode("utf-8"), parser=_PARSER)
+
+
+def _text(el) -> str:
+    # BeautifulSoup get_text(strip=True)와 같은 결과: 조각마다 strip 후 이어 붙임
+    return "".join(s.strip() for s in el.itertext())
+
+
+def parse_notice_list(html: str, base_url: str = BASE_URL) -> list:
+    """목록 페이지의 행을 dict 리스트로. 행이 없으면 빈 리스트."""
+    rows = []
+    for tr in _parse(html).xpath("//table//tbody//tr"):
+        cols = tr.xpath("./td")
+        if len(cols) < 5:
+            continue
+        title_cell = cols[1]
+        links = title_cell.xpath(".//a")
+        a = links[0] if links else None
+        href = a.get("href") if a is not None else None
+        rows.append({
+            "No.": _text(cols[0]),
+            "제목": _text(a) if a is not None else _text(title_cell),
+            "작성자": _text(cols[2]),
+            "작성일": _text(cols[3]),
+            "조회수": _text(cols[4]),
+            "링크": urljoin(base_url, href) if href is not None else f"{base_url}/bbs/list/1",
+        })
+    return rows
+
+
+# 사진, 텍스트 / 표는 안 됨.
+def parse_notice_detail(html: str, url: str, base_url: str = BASE_URL) -> dict:
+    """한 번 파싱해서 제목·본문·이미지·첨부(전체/addFiles 필터)를 모두 뽑는다. 원문 HTML은 돌려주지 않는다."""
+    tree = _parse(html)
+
+    content = None
+    for xp in _CONTENT_XPATHS:
+        found = tree.xpath(xp)
+        if found:
+            content = found[0]
+            break
+
+    body_parts = []
+    images = []
+    if content is not None:
+        for img in content.iter("img"):
+            img_url = urljoin(base_url, img.get("src"))
+            images.append(img_url)
+            body_parts.append(f"![이미지]({img_url})")
+
+        text_only = clean_notice_content(content)
+        if text_only:
+            body_parts.append(text_only)
+
+    body_text = "\n".join(body_parts)
+
+    seen = set()
+    attachments = []
+    for a in tree.iter("a"):
+        href = a.get("href")
+        if href is None or not any(k in href.lower() for k in ["download", "attach", "file", "files"]):
+            continue
+        att_url = urljoin(base_url, href)
+        if att_url not in seen:
+            seen.add(att_url)
+            attachments.append({"name": _text(a), "url": att_url})
+
+    # addFiles 안의 첨부파일만 (개인정보 관리 링크 제외)
+    addfiles_links = {urljoin(base_url, a.get("href")) for a in tree.xpath(_ADDFILES_XPATH)}
+    files = [
+        a for a in attachments
+        if a["url"] in addfiles_links and "개인정보/비밀번호 관리" not in a["name"]
+    ]
+
+    title = tree.xpath(_TITLE_XPATH)
+    title_el = title[0] if title else content
+    title_text = _text(title_el) if title_el is not None else ""
+
+    return {
+        "url": url,
+        "title": title_text,
+        "body": body_text,
+        "images": images,
+        "attachments": attachments,
+        "files": files,
+    }
+
+
+def clean_notice_content(content) -> str:
+    for br in content.iter("br"):
+        br.tail = "\n" + (br.tail or "")
+    text = content.text_content()
+    clean_text = re.sub(r'\n{3,}', '\n\n', text)
+    return clean_text.strip()
@@ -0,0 +1,274 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+import pandas as pd
+from core.config import settings
+from services.notice_fetcher import NoticeFetcher, notice_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notices (
+    id INTEGER PRIMARY KEY,
+    no TEXT, title TEXT, author TEXT, date TEXT, views TEXT,
+    url TEXT, body TEXT, files TEXT
+);
+CREATE INDEX IF NOT EXISTS notices_date ON notices(date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class _DbCrawlState:
+    # NoticeFetcher.fetch_rows가 쓰는 max_id/pages를 meta 테이블에 보관
+    def __init__(self, max_id: int, pages: Dict[str, str]):
+        self.max_id = max_id
+        self.pages = pages
+
+
+class NoticeRepository:
+    """UI가 읽는 공지 저장소 (SQLite, 여러 Streamlit 프로세스가 같은 파일을 공유).
+
+    읽기는 항상 로컬 DB에서 바로 반환하고, 마지막 갱신이 stale_seconds보다 오래됐으면
+    백그라운드 스레드로 갱신을 건다 (stale-while-revalidate). 갱신은 DB 임대(lease)로
+    한 번에 한 프로세스만 수행한다.
+    """
+
+    def __init__(self, db_path: str = None, stale_seconds: int = None, lease_seconds: int = 300):
+        self.db_path = Path(db_path or settings.NOTICE_DB)
+        self.stale_seconds = stale_seconds if stale_seconds is not None else settings.NOTICE_STALE_SECONDS
+        self.lease_seconds = lease_seconds
+        self._refreshing = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._db() as con:
+            con.executescript(SCHEMA)
+        if self._count() == 0:
+            self._seed_from_snapshot()
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.db_path, timeout=10)
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    @contextmanager
+    def _db(self):
+        # 트랜잭션 커밋 후 연결까지 닫는다
+        con = self._connect()
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _count(self) -> int:
+        with self._db() as con:
+            return con.execute("SELECT COUNT(*) FROM notices").fetchone()[0]
+
+    def _get_meta(self, con, key: str, default=None):
+        row = con.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, con, key: str, value):
+        con.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _seed_from_snapshot(self):
+        # 첫 실행: notices.json 스냅샷으로 바로 보여 준다. 스냅샷에는 첨부가 없으므로 이 공지들은
+        # "unfetched"에 적어 두고 갱신 때마다 NOTICE_BACKFILL_BATCH개씩 상세를 받아 채운다 (_backfill)
+        path = Path(settings.NOTICES_JSON)
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._db() as con:
+            con.executemany(
+                "INSERT OR IGNORE INTO notices(id, no, title, author, date, views, url, body, files) "
+                "VALUES (?, ?, ?, ?, ?, '', ?, ?, '[]')",
+                [(notice_id(n["source"]), str(notice_id(n["source"])), n.get("title", ""), n.get("author", ""),
+                  n.get("date", ""), n["source"], n.get("content", "")) for n in data],
+            )
+            # update_notices_json처럼 스냅샷의 최고 번호부터 이어서 크롤 (처음부터 전부 다시 받지 않도록)
+            if data:
+                ids = sorted({notice_id(n["source"]) for n in data}, reverse=True)
+                self._set_meta(con, "max_id", ids[0])
+                self._set_meta(con, "unfetched", ids)
+
+    def list_notices(self) -> pd.DataFrame:
+        self.revalidate()
+        with self._db() as con:
+            rows = con.execute(
+                "SELECT no, title, author, date, views, url FROM notices ORDER BY id DESC"
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["No.", "제목", "작성자", "작성일", "조회수", "링크"])
+
+    def get_detail(self, url: str) -> Optional[dict]:
+        with self._db() as con:
+            row = con.execute("SELECT title, body, files FROM notices WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        return {"url": url, "title": row[0], "body": row[1], "files": json.loads(row[2] or "[]")}
+
+    def last_refreshed(self) -> float:
+        with self._db() as con:
+            return self._get_meta(con, "refreshed_at", 0.0)
+
+    def revalidate(self):
+        if time.time() - self.last_refreshed() < self.stale_seconds:
+            return
+        if self._refreshing.locked():
+            return
+        threading.Thread(target=self._refresh_quietly, name="notice-refresh", daemon=True).start()
+
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"[notice_repository] 갱신 실패: {e}")
+
+    def _acquire_lease(self) -> bool:
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            if self._get_meta(con, "lease_until", 0.0) > time.time():
+                con.rollback()
+                return False
+            self._set_meta(con, "lease_until", time.time() + self.lease_seconds)
+            con.commit()
+            return True
+        finally:
+            con.close()
+
+    def _release_lease(self):
+        with self._db() as con:
+            self._set_meta(con, "lease_until", 0.0)
+
+    def _exclusive(self, fn, *args) -> dict:
+        # 한 번에 한 스레드/프로세스만 DB를 갱신한다. 갱신 중이면 건너뛴다
+        if not self._refreshing.acquire(blocking=False):
+            return {"skipped": True}
+        try:
+            if not self._acquire_lease():
+                return {"skipped": True}
+            try:
+                return fn(*args)
+            finally:
+                self._release_lease()
+        finally:
+            self._refreshing.release()
+
+    def refresh(self, fetcher: NoticeFetcher = None) -> dict:
+        """새 공지만 크롤해 DB에 반영한다. 다른 스레드/프로세스가 갱신 중이면 건너뛴다."""
+        return self._exclusive(self._refresh, fetcher)
+
+    def apply(self, rows: List[dict], details: Dict[str, object], state, recent: List[dict] = ()) -> dict:
+        """다른 곳(update_notices_json)에서 이미 크롤한 목록 행과 상세를 그대로 반영한다 (다시 크롤하지 않음).
+
+        state는 그 크롤의 max_id/pages로, 이 DB의 크롤 위치도 거기에 맞춘다. recent는 다시 확인한
+        1쪽의 이미 본 공지로, 바뀐 내용(제목·본문·첨부·조회수·고정 여부)을 덮어쓴다.
+        """
+        cutoff = (date.today() - timedelta(days=settings.NOTICE_RETENTION_DAYS)).isoformat()
+        crawled = _DbCrawlState(state.max_id, dict(state.pages))
+        return self._exclusive(lambda: self._save(rows, details, crawled, cutoff, recent)[0])
+
+    def _refresh(self, fetcher: NoticeFetcher = None) -> dict:
+        fetcher = fetcher or NoticeFetcher(max_workers=settings.CRAWL_WORKERS, rate_per_sec=settings.CRAWL_RATE,
+                                           state_path=settings.CRAWL_CACHE)
+        cutoff = (date.today() - timedelta(days=settings.NOTICE_RETENTION_DAYS)).isoformat()
+        with self._db() as con:
+            state = _DbCrawlState(self._get_meta(con, "max_id", 0), self._get_meta(con, "pages", {}))
+
+        rows, recent = fetcher.fetch_rows(state, cutoff)
+        urls = [r["링크"] for r in rows + recent]
+        details = fetcher.fetch_details(urls) if urls else {}
+        failed = [notice_id(r["링크"]) for r in rows if isinstance(details[r["링크"]], Exception)]
+        if failed:
+            state.max_id = max(state.max_id, min(failed) - 1)
+            state.pages.clear()
+        elif rows:
+            state.max_id = max(state.max_id, *(notice_id(r["링크"]) for r in rows))
+
+        result, ids = self._save(rows, details, state, cutoff, recent)
+        result["backfilled"] = self._backfill(fetcher)
+        if fetcher.prune(ids):
+            fetcher.save_state()
+        return {**result, **fetcher.stats}
+
+    def backfill(self, fetcher: NoticeFetcher) -> dict:
+        """스냅샷으로만 채운 공지의 상세(본문·첨부)를 NOTICE_BACKFILL_BATCH개까지 받아 채운다."""
+        return self._exclusive(lambda: {"backfilled": self._backfill(fetcher)})
+
+    def _backfill(self, fetcher: NoticeFetcher) -> int:
+        with self._db() as con:
+            pending = self._get_meta(con, "unfetched", [])
+            batch = pending[: settings.NOTICE_BACKFILL_BATCH]
+            marks = ",".join("?" * len(batch))
+            rows = con.execute(f"SELECT id, url FROM notices WHERE id IN ({marks})", batch).fetchall() if batch else []
+        if not pending:
+            return 0
+        details = fetcher.fetch_details([url for _, url in rows]) if rows else {}
+        done = []
+        for nid, url in rows:
+            d = details[url]
+            if not isinstance(d, Exception):
+                done.append((d["body"], json.dumps(d.get("files", []), ensure_ascii=False), nid))
+        # 받은 것과 이미 보존 기간 밖으로 지워진 것은 목록에서 빼고, 실패한 것은 맨 뒤로 보내 다음에 다시
+        failed = [nid for nid, url in rows if isinstance(details[url], Exception)]
+        with self._db() as con:
+            con.executemany("UPDATE notices SET body = ?, files = ? WHERE id = ?", done)
+            self._set_meta(con, "unfetched", pending[len(batch):] + failed)
+        return len(done)
+
+    def _save(self, rows: List[dict], details: Dict[str, object], state: _DbCrawlState, cutoff: str,
+              recent: List[dict] = ()):
+        # 상세를 가져온 행만 넣고 보존 기간 밖은 지운다. ({"added", "updated", "pruned"}, 남은 공지 번호)
+        ok = [r for r in rows if not isinstance(details[r["링크"]], Exception)]
+        rechecked = [r for r in recent if not isinstance(details[r["링크"]], Exception)]
+        with self._db() as con:
+            updated = self._changed(con, rechecked, details)
+            ok += rechecked
+            con.executemany(
+                "INSERT OR REPLACE INTO notices(id, no, title, author, date, views, url, body, files) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(notice_id(r["링크"]), r["No."], r["제목"], r["작성자"], r["작성일"], r["조회수"], r["링크"],
+                  details[r["링크"]]["body"], json.dumps(details[r["링크"]].get("files", []), ensure_ascii=False))
+                 for r in ok],
+            )
+            pruned = con.execute("DELETE FROM notices WHERE date < ?", (cutoff,)).rowcount
+            ids = {row[0] for row in con.execute("SELECT id FROM notices")}
+            saved = {notice_id(r["링크"]) for r in ok}
+            pending = self._get_meta(con, "unfetched", [])
+            if saved & set(pending):
+                self._set_meta(con, "unfetched", [nid for nid in pending if nid not in saved])
+            self._set_meta(con, "max_id", state.max_id)
+            self._set_meta(con, "pages", state.pages)
+            self._set_meta(con, "refreshed_at", time.time())
+        return {"added": len(ok) - len(rechecked), "updated": updated, "pruned": pruned}, ids
+
+    @staticmethod
+    def _changed(con, rows: List[dict], details: Dict[str, object]) -> int:
+        # 다시 받은 공지 중 제목·본문·첨부가 DB와 다른 수 (조회수만 바뀐 것은 세지 않음)
+        if not rows:
+            return 0
+        ids = [notice_id(r["링크"]) for r in rows]
+        stored = {row[0]: row[1:] for row in con.execute(
+            f"SELECT id, title, body, files FROM notices WHERE id IN ({','.join('?' * len(ids))})", ids)}
+        changed = 0
+        for nid, r in zip(ids, rows):
+            d = details[r["링크"]]
+            files = json.dumps(d.get("files", []), ensure_ascii=False)
+            if stored.get(nid) != (r["제목"], d["body"], files):
+                changed += 1
+        return changed
+
+
+_repo: Optional[NoticeRepository] = None
+_repo_lock = threading.Lock()
+
+
+def get_repository() -> NoticeRepository:
+    global _repo
+    with _repo_lock:
+        if _repo is None:
+            _repo = NoticeRepository()
+    return _repo
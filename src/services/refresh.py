@@ -0,0 +1,128 @@
+"""공지 갱신 파이프라인: 크롤 → 수집 → 인덱스 부분 갱신 → 실행 중인 ChatService에 교체.
+
+앞 단계가 바꾼 것이 없으면 뒤 단계는 건너뛴다. 크롤은 새 공지와 함께 목록 1쪽(최근·상단 고정)의
+이미 본 공지를 조건부 요청으로 다시 확인해 수정된 것을 updated로 보고한다 (그보다 오래된 공지의
+수정은 잡지 않음). 인덱스는 바뀐 공지만 다시 청킹·임베딩하므로 비용이 전체 말뭉치가 아니라
+새로/수정/삭제된 공지 수에 비례한다. 단계별 소요 시간은
+refresh.* span으로 남는다 (/metrics, rag.trace 로그).
+"""
+import threading
+import time
+from typing import List, Optional
+from core.config import settings
+from core.metrics import span
+from data.ingest import ADAPTERS, IngestPipeline
+from index import versions
+from index.faiss_store import FaissStore
+from services.chat_service import live_services, publishing
+from services.notice_fetcher import NoticeFetcher, update_notices_json
+from services.notice_repository import get_repository
+
+NOTICE_TYPE = "notice"
+
+
+class RefreshPipeline:
+    def __init__(self, store: Optional[FaissStore] = None):
+        # 갱신용 작업 사본. 서빙 중인 ChatService에는 매번 fork()한 사본을 넘긴다
+        self.store = store
+        self.runs = 0
+        self.last: dict = {}
+        self._lock = threading.Lock()
+
+    def _sources(self) -> tuple:
+        return tuple((name, path) for name, path in settings.INGEST_SOURCES
+                     if ADAPTERS[name].source_type == NOTICE_TYPE)
+
+    def _working_store(self) -> FaissStore:
+        if self.store is None:
+            # 같은 프로세스에 ChatService가 있으면 임베딩 모델을 새로 올리지 않고 빌려 쓴다
+            services = live_services()
+            self.store = FaissStore(emb=services[0].store.emb if services else None)
+        return self.store
+
+    def crawl(self) -> dict:
+        # 사이트는 한 번만 크롤하고, 같은 결과로 notices.json과 UI가 읽는 공지 DB를 함께 채운다
+        repo = get_repository()
+        fetcher = NoticeFetcher(max_workers=settings.CRAWL_WORKERS, rate_per_sec=settings.CRAWL_RATE,
+                                state_path=settings.CRAWL_CACHE)
+        applied = {}
+
+        def to_repository(rows, details, state, recent):
+            applied["repository"] = repo.apply(rows, details, state, recent)
+
+        stats = update_notices_json(settings.NOTICES_JSON, fetcher=fetcher, on_crawl=to_repository)
+        # 스냅샷으로만 채운 공지의 첨부는 색인과 상관없으므로 DB에만 조금씩 채운다
+        applied.setdefault("repository", {}).update(repo.backfill(fetcher))
+        stats.update(applied)
+        return stats
+
+    def ingest(self) -> List:
+        return list(IngestPipeline(self._sources()).iter_documents())
+
+    def index(self, docs: List) -> dict:
+        store = self._working_store()
+        if store.vs is not None and store.version != versions.current_version(settings.index_path()):
+            # 다른 프로세스가 새 버전을 올렸으면 그 버전 위에서 갱신한다
+            store = self.store = FaissStore(emb=store.emb)
+        if not store.can_update():
+            # 인덱스가 없거나 설정이 바뀐 경우: 전체 원천으로 동기화 (이번 한 번만)
+            result = store.sync(IngestPipeline.from_settings().iter_documents())
+            result["full"] = True
+            return result
+        return store.update_source(docs, NOTICE_TYPE)
+
+    def swap(self) -> dict:
+        services = live_services()
+        if services:
+            snapshot = self.store.fork()
+            for svc in services:
+                svc.publish(snapshot)
+        return {"services": len(services)}
+
+    def _stage(self, report: dict, name: str, fn, *args):
+        t = time.perf_counter()
+        with span(f"refresh.{name}"):
+            out = fn(*args)
+        info = out if isinstance(out, dict) else {"docs": len(out)}
+        report["stages"][name] = {**info, "seconds": round(time.perf_counter() - t, 3)}
+        return out
+
+    def run(self, force: bool = False) -> dict:
+        """한 번 갱신한다. force면 크롤 결과와 상관없이 인덱스를 원천과 맞춰 본다."""
+        if not self._lock.acquire(blocking=False):
+            return {"skipped": "running"}
+        try:
+            report = {"stages": {}, "skipped": []}
+            t = time.perf_counter()
+            with span("refresh"):
+                # 처음 한 번은 크롤 결과와 상관없이 맞춰 본다 (지난 실행이 인덱스 갱신 전에 멈췄을 수 있음)
+                check = force or self.runs == 0
+                crawl = self._stage(report, "crawl", self.crawl)
+                if not check and not (crawl.get("added") or crawl.get("updated") or crawl.get("pruned")):
+                    report["skipped"] = ["ingest", "index", "swap"]
+                else:
+                    with publishing():
+                        docs = self._stage(report, "ingest", self.ingest)
+                        result = self._stage(report, "index", self.index, docs)
+                        if result.get("added") or result.get("removed"):
+                            self._stage(report, "swap", self.swap)
+                        else:
+                            report["skipped"] = ["swap"]
+            report["seconds"] = round(time.perf_counter() - t, 3)
+            self.runs += 1
+            self.last = report
+            return report
+        finally:
+            self._lock.release()
+
+
+_refresh: Optional[RefreshPipeline] = None
+_refresh_lock = threading.Lock()
+
+
+def get_refresh() -> RefreshPipeline:
+    global _refresh
+    with _refresh_lock:
+        if _refresh is None:
+            _refresh = RefreshPipeline()
+    return _refresh
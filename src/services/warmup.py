@@ -0,0 +1,91 @@
+import threading
+import time
+from typing import Optional
+from core.config import settings
+from services.chat_service import ChatService
+
+# 콜드/웜 검색 지연 측정용 질의 (서로 달라야 재정렬 캐시에 걸리지 않는다)
+WARMUP_QUERIES = ("방학 중 도서관 이용 시간은?", "열람실 좌석 예약 방법")
+
+
+class Warmup:
+    """프로세스당 한 번 임베더·cross-encoder·인덱스를 백그라운드에서 올려 두는 진입점."""
+
+    def __init__(self):
+        self.state = "pending"  # pending → loading → ready | failed
+        self.error: Optional[str] = None
+        self.timings: dict = {}
+        self._service: Optional[ChatService] = None
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "Warmup":
+        with self._lock:
+            if self._thread is None:
+                self.state = "loading"
+                self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        t0 = time.perf_counter()
+        try:
+            svc = ChatService()
+            self.timings.update(svc.timings)
+            self.timings["load_total"] = round(time.perf_counter() - t0, 3)
+            # 첫 검색은 지연 초기화/커널 준비가 섞여 느리다 → 두 번째와 비교해 기록
+            for name, query in zip(("first_query", "warm_query"), WARMUP_QUERIES):
+                t = time.perf_counter()
+                svc.engine.retriever.invoke(query)
+                self.timings[name] = round(time.perf_counter() - t, 3)
+            self._service = svc
+            self.state = "ready"
+            if settings.REFRESH_IN_PROCESS:
+                # 새 공지를 주기적으로 색인해 이 프로세스의 ChatService에 바로 넘겨 준다
+                from scheduler import start_background
+                start_background()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = "failed"
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def wait(self, timeout: Optional[float] = None) -> ChatService:
+        self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError("모델 로딩이 아직 끝나지 않았습니다.")
+        if self._service is None:
+            raise RuntimeError(f"워밍업 실패: {self.error}")
+        return self._service
+
+    def status(self) -> dict:
+        return {"state": self.state, "error": self.error, "timings": dict(self.timings)}
+
+
+_warmup: Optional[Warmup] = None
+_warmup_lock = threading.Lock()
+
+
+def get_warmup() -> Warmup:
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = Warmup().start()
+    return _warmup
+
+
+def main():
+    # PYTHONPATH=src python -m services.warmup → 콜드 스타트 vs 웜 지연 리포트
+    w = get_warmup()
+    w.wait()
+    for k, v in w.status()["timings"].items():
+        print(f"{k:>12}: {v:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+import numpy as np
+from langchain_core.documents import Document
+from core.types import Answer
+from rag.answer_cache import SemanticAnswerCache
+
+QUERIES = ["대출 방법", "휴관 공지", "열람실 운영"]
+
+
+class _Emb:
+    # 질의마다 서로 직교하는 벡터
+    def embed_query(self, text):
+        v = np.zeros(len(QUERIES), dtype=np.float32)
+        v[QUERIES.index(text)] = 1.0
+        return v.tolist()
+
+
+def store(manifest, generation=0):
+    return SimpleNamespace(emb=_Emb(), manifest=dict(manifest), generation=generation)
+
+
+ROUTES = {"대출 방법": ("faq",), "휴관 공지": ("notice",), "열람실 운영": ("faq", "notice")}
+
+
+def cache(s, route=lambda q, v: ROUTES[q], ttl=3600):
+    return SemanticAnswerCache(s, threshold=0.9, ttl=ttl, max_entries=10, route=route)
+
+
+def fill(c):
+    for q in QUERIES:
+        c.put(q, Answer(text=q, sources=[]), [Document(page_content="", metadata={"chunk_id": "a"})])
+
+
+def test_hit_while_chunks_unchanged():
+    s = store({"a": "h1"})
+    c = cache(s)
+    fill(c)
+    assert c.get("대출 방법").text == "대출 방법"
+    c.rebind(store({"a": "h2"}))
+    assert c.get("대출 방법") is None
+
+
+def test_added_notice_drops_answers_that_search_notices():
+    c = cache(store({"a": "h1"}))
+    fill(c)
+    c.rebind(store({"a": "h1", "n": "h"}), {"notice"})
+    assert c.get("대출 방법") is not None
+    assert c.get("휴관 공지") is None
+    assert c.get("열람실 운영") is None
+
+
+def test_without_router_every_answer_is_dropped():
+    c = cache(store({"a": "h1"}), route=None)
+    fill(c)
+    c.rebind(store({"a": "h1", "n": "h"}), {"notice"})
+    assert c.stats()["entries"] == 0
+
+
+def test_rebind_without_additions_keeps_answers():
+    c = cache(store({"a": "h1"}))
+    fill(c)
+    c.rebind(store({"a": "h1"}))
+    assert c.stats()["entries"] == 3
+
+
+def test_expired_and_unverifiable_answers():
+    c = cache(store({"a": "h1"}), ttl=-1)
+    fill(c)
+    assert c.get("대출 방법") is None
+    c = cache(store({"a": "h1"}))
+    c.put("대출 방법", Answer(text="x", sources=[]), [Document(page_content="", metadata={"chunk_id": "없음"})])
+    assert c.stats()["entries"] == 0
+
+
+def test_full_rebuild_drops_everything():
+    c = cache(store({"a": "h1"}))
+    fill(c)
+    c.rebind(store({"a": "h1"}, generation=1))
+    assert c.stats()["entries"] == 0
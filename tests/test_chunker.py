@@ -0,0 +1,80 @@
+import sys
+import types
+import pytest
+from langchain_core.documents import Document
+from data.chunker import StructuredChunker, doc_header, split_sections, tokenizer_length
+
+
+class _Tokenizer:
+    # 공백 단위 토큰 (특수 토큰 없음)
+    def encode(self, text, add_special_tokens=True):
+        return text.split()
+
+
+class _SentenceTransformer:
+    def __init__(self, model_name, cache_folder=None, **kw):
+        self.tokenizer = _Tokenizer()
+
+
+@pytest.fixture
+def hf_embeddings(monkeypatch):
+    # 실제 HuggingFaceEmbeddings에 모델 대신 가벼운 SentenceTransformer를 넣는다
+    monkeypatch.setitem(sys.modules, "sentence_transformers",
+                        types.SimpleNamespace(SentenceTransformer=_SentenceTransformer))
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name="stub-model")
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+def test_tokenizer_length_from_real_embeddings_class(hf_embeddings):
+    length = tokenizer_length(hf_embeddings)
+    assert length("도서관 대출 방법 안내") == 4
+
+
+def test_tokenizer_length_through_cache_wrapper(hf_embeddings):
+    wrapper = types.SimpleNamespace(inner=hf_embeddings)
+    assert tokenizer_length(wrapper)("a b c") == 3
+
+
+def test_doc_header_from_body_and_metadata():
+    doc = Document(page_content="[제목] 휴관\n[작성일] 2026-10-01\n\n본문", metadata={})
+    assert doc_header(doc) == ("[제목] 휴관\n[작성일] 2026-10-01", "본문")
+    doc = Document(page_content="본문", metadata={"title": "대출", "category": "이용", "subcategory": "대출"})
+    assert doc_header(doc) == ("[제목] 대출\n[분류] 이용>대출", "본문")
+
+
+def test_split_sections_attaches_untitled_blocks():
+    body = "[기능]\n가 나\n\n다 라\n\n[연락처 정보]\n전화"
+    assert split_sections(body) == [("[기능]", ["가 나", "다 라"]), ("[연락처 정보]", ["전화"])]
+
+
+def test_chunks_stay_within_budget_and_repeat_header():
+    header = "[제목] 긴 공지\n[작성일] 2026-10-01"
+    body = "\n\n".join(" ".join(f"w{p}_{i}." for i in range(15)) for p in range(6))
+    doc = Document(page_content=f"{header}\n\n{body}", metadata={})
+    chunker = StructuredChunker(max_tokens=40, token_len=words)
+    chunks = chunker.split_text(doc)
+    assert len(chunks) > 1
+    for c in chunks:
+        assert c.startswith(header + "\n\n")
+        assert words(c) <= 40
+    # 잘린 조각을 이으면 원문 단어가 순서대로 다 나온다
+    got = [w for c in chunks for w in c[len(header):].split()]
+    assert got == body.split()
+
+
+def test_oversized_sentence_split_by_characters():
+    doc = Document(page_content="[제목] t\n\n" + "가" * 50, metadata={})
+    chunker = StructuredChunker(max_tokens=12, token_len=lambda s: len(s) // 5 + 1)
+    chunks = chunker.split_text(doc)
+    assert "".join(c.split("\n\n", 1)[1] for c in chunks) == "가" * 50
+    assert all(len(c.split("\n\n", 1)[1]) // 5 + 1 <= 12 for c in chunks)
+
+
+def test_split_documents_copies_metadata():
+    doc = Document(page_content="[제목] t\n\n본문", metadata={"url": "u"})
+    [chunk] = StructuredChunker(100, words).split_documents([doc])
+    assert chunk.metadata == {"url": "u"} and chunk.metadata is not doc.metadata
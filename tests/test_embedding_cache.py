@@ -0,0 +1,89 @@
+import gc
+import json
+import weakref
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+import index.embedding_cache as ec
+from index.embedding_cache import KEYS_FILE, CachedEmbeddings
+
+
+class _Inner(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def _vec(self, text):
+        self.calls += 1
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+    def embed_documents(self, texts):
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vec(text)
+
+
+@pytest.fixture
+def make(tmp_path):
+    def _make(max_entries=3):
+        return CachedEmbeddings(_Inner(), "test/model", str(tmp_path), max_entries=max_entries)
+    return _make
+
+
+def keys_on_disk(emb):
+    path = emb.dir / KEYS_FILE
+    return [k for k, _ in json.loads(path.read_text())["rows"]] if path.exists() else []
+
+
+def test_hits_after_reopen(make):
+    emb = make()
+    vecs = emb.embed_documents(["가", "나다"])
+    again = make()
+    assert again.embed_documents(["가", "나다"]) == vecs
+    assert again.inner.calls == 0 and again.stats()["hits"] == 2
+
+
+def test_whitespace_normalized_key(make):
+    emb = make()
+    emb.embed_documents(["도서관  이용\n안내"])
+    emb.embed_documents(["도서관 이용 안내"])
+    assert emb.inner.calls == 1
+
+
+def test_lru_reuses_least_recently_used_row(make):
+    emb = make(max_entries=3)
+    emb.embed_documents(["a", "b", "c"])
+    emb.embed_documents(["a"])  # a를 최근으로
+    emb.embed_documents(["d"])  # b 자리를 쓴다
+    calls = emb.inner.calls
+    assert emb.lookup_documents(["a", "b", "c", "d"]).keys() == {0, 2, 3}
+    assert emb.inner.calls == calls
+
+
+def test_row_overwritten_by_other_process_is_a_miss(make):
+    first, second = make(max_entries=2), make(max_entries=2)
+    first.embed_documents(["a", "b"])
+    second.embed_documents(["c", "d"])  # 다른 인스턴스(프로세스)가 두 행을 모두 덮어씀
+    # first는 keys.json을 다시 읽기 전이라 a, b의 행을 기억하지만 태그가 달라 미스로 본다
+    assert first.lookup_documents(["a", "b"]) == {}
+    calls = first.inner.calls
+    np.testing.assert_allclose(first.embed_documents(["a"])[0], _Inner().embed_query("a"))
+    assert first.inner.calls == calls + 1
+
+
+def test_query_does_not_write_keys_on_request_path(make, monkeypatch):
+    started = []
+    monkeypatch.setattr(ec, "_ensure_flusher", lambda: started.append(1))
+    emb = make(max_entries=100)
+    for i in range(40):
+        emb.embed_query(f"질의 {i}")
+    assert keys_on_disk(emb) == [] and started
+    ec._flush_all()
+    assert len(keys_on_disk(emb)) == 40
+    assert make(max_entries=100).embed_query("질의 3") == emb.embed_query("질의 3")
+
+
+def test_instances_are_not_pinned_until_exit(make):
+    ref = weakref.ref(make())
+    gc.collect()
+    assert ref() is None
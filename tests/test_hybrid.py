@@ -0,0 +1,87 @@
+import numpy as np
+from langchain_core.documents import Document
+from index.date_index import NO_DATE, DatePositions
+from index.partitions import Partitions
+from retrieval.hybrid import _label_shift, _position_delta, rrf_fuse
+
+
+def doc(source_type: str, category: str = "") -> Document:
+    meta = {"source_type": source_type}
+    if category:
+        meta["category"] = category
+    return Document(page_content="", metadata=meta)
+
+
+def test_position_delta_removed_and_appended():
+    before = ["a", "b", "c", "d", "e", "f"]
+    # c는 지워지고 e는 내용이 바뀌어 끝에 다시 붙고 g는 새 청크
+    after = ["a", "b", "d", "f", "e", "g"]
+    removed, tail = _position_delta(before, after)
+    assert removed.tolist() == [2, 4]
+    assert tail == ["e", "g"]
+
+
+def test_position_delta_gives_up_on_rebuilt_order():
+    before = ["a", "b", "c", "d"]
+    assert _position_delta(before, ["d", "c", "b", "a"]) is None
+    assert _position_delta([], ["a"]) is None
+
+
+def test_partitions_apply_matches_fresh_build():
+    docs = [doc("faq", "대출"), doc("notice"), doc("faq", "이용"), doc("notice"), doc("faq", "대출")]
+    added = [doc("notice"), doc("faq", "자료검색")]
+    removed = np.array([1, 4], dtype=np.int64)
+    patched = Partitions(docs).apply(removed, added)
+    fresh = Partitions([docs[0], docs[2], docs[3]] + added)
+    assert patched.n == fresh.n
+    assert patched.groups.keys() == fresh.groups.keys()
+    for key, pos in fresh.groups.items():
+        assert patched.groups[key].tolist() == pos.tolist()
+    for field, pos in fresh.missing.items():
+        assert patched.missing[field].tolist() == pos.tolist()
+
+
+def test_date_positions_apply_matches_fresh_build():
+    days = np.array([30, NO_DATE, 10, 20, 10, NO_DATE], dtype=np.int32)
+    added = np.array([15, NO_DATE, 10], dtype=np.int32)
+    removed = np.array([0, 4], dtype=np.int64)
+    patched = DatePositions(days).apply(removed, added)
+    fresh = DatePositions(np.concatenate([np.delete(days, removed), added]))
+    assert patched.days.tolist() == fresh.days.tolist()
+    assert patched.undated.tolist() == fresh.undated.tolist()
+    for start, end in [(0, 100), (10, 10), (11, 20), (31, 40)]:
+        assert patched.window(start, end).tolist() == fresh.window(start, end).tolist()
+
+
+def test_label_shift():
+    before = {"source_type=faq": 90, "source_type=notice": 10}
+    assert _label_shift(before, 100, {"source_type=faq": 90, "source_type=notice": 12}, 102) < 0.02
+    assert _label_shift(before, 100, {"source_type=faq": 90, "source_type=notice": 60}, 150) > 0.3
+    assert _label_shift(before, 100, {"source_type=faq": 90}, 90) == 1.0
+
+
+def test_rrf_merges_ids_across_lists():
+    # b는 두 리스트 모두 2위라 한 리스트 1위인 a, c보다 앞선다
+    fused = rrf_fuse([["a", "b"], ["c", "b"]], [1.0, 1.0], c=1)
+    assert fused == ["b", "a", "c"]
+
+
+def test_rrf_weights():
+    assert rrf_fuse([["a"], ["b"]], [0.4, 0.6], c=60) == ["b", "a"]
+    assert rrf_fuse([["a"], ["b"]], [0.6, 0.4], c=60) == ["a", "b"]
+
+
+def test_rrf_ties_broken_by_id():
+    assert rrf_fuse([["z", "y"], ["y", "z"]], [1.0, 1.0], c=60) == ["y", "z"]
+
+
+def test_rrf_boost_reorders():
+    def boost(ids):
+        return np.where(ids == "b", 3.0, 1.0)
+
+    assert rrf_fuse([["a", "b"]], [1.0], c=1, boost=boost) == ["b", "a"]
+
+
+def test_rrf_empty_lists():
+    assert rrf_fuse([[], []], [0.4, 0.6], c=60) == []
+    assert rrf_fuse([[], ["a", "b"]], [0.4, 0.6], c=60) == ["a", "b"]
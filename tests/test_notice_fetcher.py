@@ -0,0 +1,226 @@
+import json
+from datetime import date, timedelta
+import pytest
+from core.config import settings
+from services.notice_fetcher import CrawlState, NoticeFetcher, update_notices_json
+
+BASE = "https://lib.test"
+TODAY = date.today().isoformat()
+
+
+def _url(nid: int) -> str:
+    return f"{BASE}/bbs/content/1_{nid}"
+
+
+def list_html(rows) -> str:
+    # rows: (번호 또는 '공지', 공지 번호, 제목, 작성일)
+    trs = "".join(
+        f"<tr><td>{no}</td><td><a href='/bbs/content/1_{nid}'>{title}</a></td>"
+        f"<td>도서관</td><td>{day}</td><td>1</td></tr>"
+        for no, nid, title, day in rows
+    )
+    return f"<html><body><table><tbody>{trs}</tbody></table></body></html>"
+
+
+def detail_html(body: str) -> str:
+    return f"<html><body><h3>제목</h3><div class='boardContent'>{body}</div></body></html>"
+
+
+class _Response:
+    def __init__(self, status_code=200, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeSite:
+    """목록 페이지와 상세 페이지를 돌려주는 가짜 Session. 상세는 본문 해시를 ETag로 쓴다."""
+
+    def __init__(self, pages, bodies):
+        self.pages = pages
+        self.bodies = bodies
+        self.calls = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        headers = headers or {}
+        self.calls.append((url, params, dict(headers)))
+        if url.endswith("/bbs/list/1"):
+            return _Response(text=list_html(self.pages.get(params["pn"], [])))
+        body = self.bodies[int(url.rsplit("_", 1)[1])]
+        etag = f'"{hash(body)}"'
+        if headers.get("If-None-Match") == etag:
+            return _Response(304)
+        return _Response(text=detail_html(body), headers={"ETag": etag})
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CRAWL_STATE", str(tmp_path / "state.json"))
+    return tmp_path
+
+
+def make_fetcher(site, tmp_path) -> NoticeFetcher:
+    fetcher = NoticeFetcher(base_url=BASE, rate_per_sec=0, state_path=str(tmp_path / "cache.json"))
+    fetcher.session = site
+    return fetcher
+
+
+def test_fetch_rows_stops_at_known_and_returns_recent(tmp_path):
+    site = FakeSite({1: [("공지", 5, "고정", TODAY), ("12", 12, "새 글", TODAY), ("11", 11, "본 글", TODAY)],
+                     2: [("10", 10, "더 오래된 글", TODAY)]}, {})
+    state = CrawlState(str(tmp_path / "state.json"))
+    state.max_id = 11
+    new, recent = make_fetcher(site, tmp_path).fetch_rows(state, "2000-01-01")
+    assert [r["제목"] for r in new] == ["새 글"]
+    assert [r["제목"] for r in recent] == ["고정", "본 글"]
+    # 본 글에서 멈추므로 2쪽은 요청하지 않는다
+    assert [p for _, p, _ in site.calls] == [{"pn": 1}]
+
+
+def test_fetch_rows_unchanged_first_page_still_returns_recent(tmp_path):
+    site = FakeSite({1: [("11", 11, "본 글", TODAY)]}, {})
+    state = CrawlState(str(tmp_path / "state.json"))
+    state.max_id = 11
+    fetcher = make_fetcher(site, tmp_path)
+    fetcher.fetch_rows(state, "2000-01-01")
+    new, recent = fetcher.fetch_rows(state, "2000-01-01")
+    assert new == [] and [r["제목"] for r in recent] == ["본 글"]
+
+
+def test_fetch_rows_skips_recent_outside_retention(tmp_path):
+    old = (date.today() - timedelta(days=400)).isoformat()
+    site = FakeSite({1: [("공지", 3, "오래된 고정", old), ("11", 11, "본 글", TODAY)]}, {})
+    state = CrawlState(str(tmp_path / "state.json"))
+    state.max_id = 11
+    _, recent = make_fetcher(site, tmp_path).fetch_rows(state, (date.today() - timedelta(days=30)).isoformat())
+    assert [r["제목"] for r in recent] == ["본 글"]
+
+
+def test_update_notices_json_reports_edited_notice(paths):
+    notices = paths / "notices.json"
+    site = FakeSite({1: [("11", 11, "본 글", TODAY)]}, {11: "처음 본문"})
+    fetcher = make_fetcher(site, paths)
+
+    first = update_notices_json(str(notices), fetcher=fetcher)
+    assert (first["added"], first["updated"]) == (1, 0)
+
+    # 그대로면 조건부 요청이 304로 끝나고 바뀐 것이 없다
+    again = update_notices_json(str(notices), fetcher=fetcher)
+    assert (again["added"], again["updated"]) == (0, 0)
+    assert fetcher.stats["not_modified"] == 1
+
+    site.bodies[11] = "고친 본문"
+    edited = update_notices_json(str(notices), fetcher=fetcher)
+    assert (edited["added"], edited["updated"]) == (0, 1)
+    saved = json.loads(notices.read_text(encoding="utf-8"))
+    assert [n["content"] for n in saved] == ["고친 본문"]
+
+
+def test_update_notices_json_passes_recent_to_on_crawl(paths):
+    site = FakeSite({1: [("12", 12, "새 글", TODAY), ("11", 11, "본 글", TODAY)]}, {11: "a", 12: "b"})
+    state = CrawlState(settings.CRAWL_STATE)
+    state.max_id = 11
+    state.save()
+    seen = {}
+
+    def on_crawl(rows, details, crawl_state, recent):
+        seen.update(rows=[r["제목"] for r in rows], recent=[r["제목"] for r in recent],
+                    max_id=crawl_state.max_id, details=sorted(details))
+
+    update_notices_json(str(paths / "notices.json"), fetcher=make_fetcher(site, paths), on_crawl=on_crawl)
+    assert seen == {"rows": ["새 글"], "recent": ["본 글"], "max_id": 12, "details": [_url(11), _url(12)]}
+
+
+class _Stuck304(FakeSite):
+    # 검증자 없이 보내도 처음 한 번은 304를 주는 서버/프록시
+    def __init__(self, bodies, stuck=1):
+        super().__init__({}, bodies)
+        self.stuck = stuck
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        if "/content/" in url and self.stuck:
+            self.stuck -= 1
+            self.calls.append((url, params, dict(headers or {})))
+            return _Response(304)
+        return super().get(url, params, headers, timeout)
+
+
+def test_304_without_cache_entry_refetches_without_validators(tmp_path):
+    site = _Stuck304({7: "본문"})
+    fetcher = make_fetcher(site, tmp_path)
+    detail = fetcher.fetch_detail(_url(7))
+    assert detail["body"] == "본문"
+    assert [h for _, _, h in site.calls] == [{}, {"Cache-Control": "no-cache"}]
+    assert _url(7) in fetcher.cache
+
+
+def test_repeated_304_without_cache_entry_is_a_failure(tmp_path):
+    fetcher = make_fetcher(_Stuck304({7: "본문"}, stuck=2), tmp_path)
+    result = fetcher.fetch_details([_url(7)])[_url(7)]
+    assert isinstance(result, Exception)
+    assert fetcher.stats["failed"] == 1 and _url(7) not in fetcher.cache
+
+
+def test_crawl_state_round_trip(tmp_path):
+    path = tmp_path / "sub" / "state.json"
+    state = CrawlState(str(path))
+    assert (state.max_id, state.pages) == (0, {})
+    state.max_id = 42
+    state.pages["1"] = "abc"
+    state.save()
+    loaded = CrawlState(str(path))
+    assert (loaded.max_id, loaded.pages) == (42, {"1": "abc"})
+    # 임시 파일은 남지 않는다
+    assert [p.name for p in path.parent.iterdir()] == ["state.json"]
+
+
+def test_unchanged_page_fingerprint_skips_walk(tmp_path):
+    site = FakeSite({1: [("12", 12, "새 글", TODAY)], 2: [("11", 11, "다음 쪽", TODAY)]}, {})
+    state = CrawlState(str(tmp_path / "state.json"))
+    fetcher = make_fetcher(site, tmp_path)
+    new, _ = fetcher.fetch_rows(state, "2000-01-01")
+    assert [r["제목"] for r in new] == ["새 글", "다음 쪽"]
+    site.calls.clear()
+    # 1쪽 지문이 같으면 요청 한 번으로 끝난다
+    new, _ = fetcher.fetch_rows(state, "2000-01-01")
+    assert new == [] and [p for _, p, _ in site.calls] == [{"pn": 1}]
+
+
+class _Failing(FakeSite):
+    def __init__(self, pages, bodies, broken):
+        super().__init__(pages, bodies)
+        self.broken = set(broken)
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        if "/content/" in url and int(url.rsplit("_", 1)[1]) in self.broken:
+            return _Response(500)
+        return super().get(url, params, headers, timeout)
+
+
+def test_failed_detail_rolls_back_max_id(paths):
+    notices = paths / "notices.json"
+    site = _Failing({1: [("13", 13, "셋째", TODAY), ("12", 12, "둘째", TODAY), ("11", 11, "첫째", TODAY)]},
+                    {11: "a", 12: "b", 13: "c"}, broken={12})
+    state = CrawlState(settings.CRAWL_STATE)
+    state.max_id = 11
+    state.save()
+    notices.write_text(json.dumps([{"source": _url(11), "title": "첫째", "date": TODAY, "content": "a"}]),
+                       encoding="utf-8")
+    fetcher = make_fetcher(site, paths)
+
+    first = update_notices_json(str(notices), fetcher=fetcher)
+    assert first["added"] == 1
+    state = CrawlState(settings.CRAWL_STATE)
+    # 실패한 12 아래까지만 기록하고 지문도 지워 다음 크롤에서 1쪽을 다시 본다
+    assert (state.max_id, state.pages) == (11, {})
+
+    site.broken.clear()
+    second = update_notices_json(str(notices), fetcher=fetcher)
+    assert second["added"] == 1
+    assert CrawlState(settings.CRAWL_STATE).max_id == 13
+    saved = json.loads(notices.read_text(encoding="utf-8"))
+    assert sorted(n["title"] for n in saved) == ["둘째", "셋째", "첫째"]
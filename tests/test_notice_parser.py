@@ -0,0 +1,24 @@
+import pytest
+from services.notice_parser import parse_notice_detail, parse_notice_list
+
+DETAIL = """<html><body>
+<h3>휴관 안내</h3>
+<div class="boardContent">10월 20일 휴관합니다.<br>문의: 내선 1234<img src="/upload/a.png"></div>
+<ul class="addFiles"><li><a href="/attach/download/1">안내문.pdf</a></li></ul>
+<a href="/member/file/privacy">개인정보/비밀번호 관리</a>
+</body></html>"""
+
+
+def test_parse_detail_body_images_and_files():
+    d = parse_notice_detail(DETAIL, "https://lib.test/bbs/content/1_1", "https://lib.test")
+    assert d["title"] == "휴관 안내"
+    assert d["body"] == "![이미지](https://lib.test/upload/a.png)\n10월 20일 휴관합니다.\n문의: 내선 1234"
+    assert d["files"] == [{"name": "안내문.pdf", "url": "https://lib.test/attach/download/1"}]
+    assert len(d["attachments"]) == 2
+
+
+@pytest.mark.parametrize("html", ["", "   \n"])
+def test_empty_body_parses_to_empty_result(html):
+    d = parse_notice_detail(html, "u")
+    assert (d["title"], d["body"], d["files"], d["attachments"]) == ("", "", [], [])
+    assert parse_notice_list(html) == []
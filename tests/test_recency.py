@@ -0,0 +1,57 @@
+from datetime import date
+import pytest
+from retrieval.recency import _period, query_window
+from index.date_index import to_day
+
+RECENT = 30
+
+
+@pytest.mark.parametrize("today, query, expected", [
+    # 연말에 묻는 다가올 연초
+    (date(2026, 12, 15), "1월 휴관 공지", (date(2027, 1, 1), date(2027, 1, 31))),
+    (date(2026, 11, 20), "1월 휴관 공지", (date(2027, 1, 1), date(2027, 1, 31))),
+    # 연초에 묻는 지난 연말
+    (date(2027, 1, 10), "12월 휴관 공지", (date(2026, 12, 1), date(2026, 12, 31))),
+    (date(2027, 2, 5), "11월 행사", (date(2026, 11, 1), date(2026, 11, 30))),
+    # 같은 해 안
+    (date(2026, 6, 10), "6월 일정", (date(2026, 6, 1), date(2026, 6, 30))),
+    (date(2026, 6, 10), "8월 일정", (date(2026, 8, 1), date(2026, 8, 31))),
+    (date(2026, 6, 10), "9월 일정", (date(2025, 9, 1), date(2025, 9, 30))),
+    (date(2026, 6, 10), "3월 일정", (date(2026, 3, 1), date(2026, 3, 31))),
+])
+def test_month_without_year(today, query, expected):
+    assert _period(query, today, RECENT) == expected
+
+
+@pytest.mark.parametrize("today, query, expected", [
+    (date(2026, 12, 15), "1월 2일 휴관", date(2027, 1, 2)),
+    (date(2027, 1, 3), "12월 30일 휴관", date(2026, 12, 30)),
+    (date(2026, 10, 18), "10월 20일 특강", date(2026, 10, 20)),
+    (date(2026, 10, 18), "2024년 10월 20일 특강", date(2024, 10, 20)),
+])
+def test_month_day(today, query, expected):
+    assert _period(query, today, RECENT) == (expected, expected)
+
+
+def test_invalid_day():
+    assert _period("2월 30일 휴관", date(2026, 1, 10), RECENT) is None
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("오늘 열람실 운영", (date(2026, 10, 18), date(2026, 10, 18))),
+    ("이번 주 휴관", (date(2026, 10, 12), date(2026, 10, 18))),
+    ("다음 주 행사", (date(2026, 10, 19), date(2026, 10, 25))),
+    ("다음 달 공지", (date(2026, 11, 1), date(2026, 11, 30))),
+    ("최근 공지", (date(2026, 9, 18), date(2026, 10, 18))),
+    ("2025년 3월 공지", (date(2025, 3, 1), date(2025, 3, 31))),
+    ("작년 공지", (date(2025, 1, 1), date(2025, 12, 31))),
+    ("대출 방법", None),
+])
+def test_relative_periods(query, expected):
+    assert _period(query, date(2026, 10, 18), RECENT) == expected
+
+
+def test_window_slack():
+    today = date(2026, 12, 15)
+    start, end = query_window("1월 휴관", today, slack_days=14, recent_days=RECENT)
+    assert (start, end) == (to_day(date(2027, 1, 1)) - 14, to_day(date(2027, 1, 31)))
@@ -0,0 +1,110 @@
+import json
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from index.sparse_index import SparseIndex, SparseRetriever, tokenize
+
+TEXTS = [
+    "도서관 휴관 안내",
+    "열람실 좌석 예약 방법",
+    "도서 대출 연장 방법",
+    "특별 휴관 일정 변경",
+    "wifi 접속 안내",
+]
+
+
+def chunk(cid: str, text: str) -> Document:
+    return Document(page_content=text, metadata={"chunk_id": cid})
+
+
+def corpus(texts=TEXTS, prefix="c"):
+    return [chunk(f"{prefix}{i}", t) for i, t in enumerate(texts)]
+
+
+QUERIES = ["휴관 안내", "대출 방법", "wifi", "좌석 예약", "없는단어"]
+
+
+def assert_same_scores(a: SparseIndex, b: SparseIndex):
+    assert a.ids == b.ids
+    for q in QUERIES:
+        np.testing.assert_allclose(a.scores(q), b.scores(q), rtol=1e-5, atol=1e-6)
+
+
+def test_tokenize_korean_bigrams_and_words():
+    assert tokenize("도서관이 WiFi 2층") == ["도서", "서관", "관이", "wifi", "2", "층"]
+
+
+def test_search_ranks_matching_chunk_first():
+    index = SparseIndex.build(corpus())
+    top = index.search("휴관", k=2)
+    assert [index.ids[i] for i, _ in top] == ["c0", "c3"]
+    assert index.search("없는단어", k=3) == []
+
+
+def test_search_within_allowed_positions():
+    index = SparseIndex.build(corpus())
+    top = index.search("휴관", k=5, allowed=np.array([1, 3], dtype=np.int64))
+    assert [i for i, _ in top] == [3]
+
+
+def test_update_matches_full_build():
+    docs = corpus()
+    index = SparseIndex.build(docs)
+    added = [chunk("c1", "열람실 좌석 예약 변경 안내"), chunk("n1", "신규 전자책 서비스 안내")]
+    updated = index.update(["c1", "c4"], added)
+    expected = SparseIndex.build([docs[0], docs[2], docs[3]] + added)
+    assert_same_scores(updated, expected)
+    # 원래 색인은 그대로 (서빙 중인 사본과 공유)
+    assert_same_scores(index, SparseIndex.build(docs))
+
+
+def test_update_compacts_vocabulary_of_removed_chunks():
+    index = SparseIndex.build(corpus())
+    updated = index.update([f"c{i}" for i in range(5)], [chunk("n0", "전자책 안내")])
+    assert set(updated.vocab) == set(tokenize("전자책 안내"))
+    assert [updated.ids[i] for i, _ in updated.search("전자책", k=1)] == ["n0"]
+
+
+def test_reorder_moves_positions_without_changing_scores():
+    docs = corpus()
+    index = SparseIndex.build(docs)
+    order = ["c3", "c0", "c4", "c2", "c1"]
+    moved = index.reorder(order)
+    assert moved.ids == order
+    by_id = {d.metadata["chunk_id"]: d for d in docs}
+    assert_same_scores(moved, SparseIndex.build([by_id[c] for c in order]))
+
+
+@pytest.mark.parametrize("k1, b", [(1.5, 0.75), (1.2, 0.3)])
+def test_update_keeps_bm25_parameters(k1, b):
+    index = SparseIndex.build(corpus(), k1=k1, b=b).update(["c0"], [])
+    assert (index.k1, index.b) == (k1, b)
+    assert_same_scores(index, SparseIndex.build(corpus()[1:], k1=k1, b=b))
+
+
+def test_save_load_round_trip_keeps_only_ids(tmp_path):
+    index = SparseIndex.build(corpus(), k1=1.2, b=0.5)
+    index.save(tmp_path)
+    assert not (tmp_path / "docs.jsonl").exists()
+    assert "열람실" not in (tmp_path / "ids.json").read_text(encoding="utf-8")
+    loaded = SparseIndex.load(tmp_path)
+    assert (loaded.k1, loaded.b) == (1.2, 0.5)
+    assert_same_scores(loaded, index)
+    # mmap으로 읽은 색인도 부분 갱신할 수 있다
+    assert_same_scores(loaded.update(["c2"], []), index.update(["c2"], []))
+
+
+def test_load_legacy_docs_jsonl(tmp_path):
+    index = SparseIndex.build(corpus())
+    index.save(tmp_path)
+    (tmp_path / "ids.json").unlink()
+    with open(tmp_path / "docs.jsonl", "w", encoding="utf-8") as f:
+        for d in corpus():
+            f.write(json.dumps({"page_content": d.page_content, "metadata": d.metadata}, ensure_ascii=False) + "\n")
+    assert SparseIndex.load(tmp_path).ids == index.ids
+
+
+def test_retriever_resolves_documents_by_id():
+    docs = {d.metadata["chunk_id"]: d for d in corpus()}
+    retriever = SparseRetriever(index=SparseIndex.build(corpus()), lookup=lambda ids: [docs[i] for i in ids], k=1)
+    assert [d.page_content for d in retriever.invoke("대출 연장")] == ["도서 대출 연장 방법"]
@@ -0,0 +1,86 @@
+import pytest
+from index import versions
+
+
+def stage(root, name="index.faiss", text="x"):
+    tmp = versions.staging_dir(root)
+    (tmp / name).write_text(text)
+    return tmp
+
+
+def test_commit_moves_staging_and_switches_current(tmp_path):
+    assert versions.current_version(tmp_path) is None
+    assert versions.current_dir(tmp_path) == tmp_path
+    v1 = versions.commit(tmp_path, stage(tmp_path, text="1"))
+    v2 = versions.commit(tmp_path, stage(tmp_path, text="2"))
+    assert (v1, v2) == (1, 2)
+    assert versions.current_dir(tmp_path) == tmp_path / "v2"
+    assert (tmp_path / "v2" / "index.faiss").read_text() == "2"
+    assert versions.list_versions(tmp_path) == [1, 2]
+    # 임시 폴더는 남지 않는다
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".")] == []
+
+
+def test_commit_skips_number_taken_by_another_writer(tmp_path):
+    versions.commit(tmp_path, stage(tmp_path))
+    # 다른 프로세스가 v2를 먼저 만들었지만 CURRENT는 아직 안 바꾼 상태
+    (tmp_path / "v2").mkdir()
+    (tmp_path / "v2" / "index.faiss").write_text("other")
+    assert versions.commit(tmp_path, stage(tmp_path)) == 3
+    assert (tmp_path / "v2" / "index.faiss").read_text() == "other"
+
+
+def test_current_ignores_missing_or_bad_target(tmp_path):
+    (tmp_path / versions.CURRENT_FILE).write_text("v9\n")
+    assert versions.current_version(tmp_path) is None
+    (tmp_path / versions.CURRENT_FILE).write_text("garbage")
+    assert versions.current_version(tmp_path) is None
+
+
+def test_gc_keeps_latest_current_and_pinned(tmp_path):
+    for _ in range(5):
+        versions.commit(tmp_path, stage(tmp_path))
+    versions.pin(tmp_path, 1)
+    try:
+        removed = versions.gc(tmp_path, keep=2, protect=[3])
+    finally:
+        versions.unpin(tmp_path, 1)
+    assert removed == [2]
+    assert versions.list_versions(tmp_path) == [1, 3, 4, 5]
+    # 핀을 풀면 지울 수 있다
+    assert versions.gc(tmp_path, keep=1) == [1, 3, 4]
+    assert versions.list_versions(tmp_path) == [5]
+
+
+def test_gc_never_removes_current_even_if_old(tmp_path):
+    for _ in range(3):
+        versions.commit(tmp_path, stage(tmp_path))
+    versions._set_current(tmp_path, 1)
+    assert versions.gc(tmp_path, keep=1) == [2]
+    assert versions.current_version(tmp_path) == 1
+
+
+@pytest.mark.parametrize("count", [1, 3])
+def test_pins_are_counted(tmp_path, count):
+    versions.commit(tmp_path, stage(tmp_path))
+    versions.commit(tmp_path, stage(tmp_path))
+    for _ in range(count):
+        versions.pin(tmp_path, 1)
+    for _ in range(count - 1):
+        versions.unpin(tmp_path, 1)
+    assert versions.gc(tmp_path, keep=0) == []
+    versions.unpin(tmp_path, 1)
+    assert versions.gc(tmp_path, keep=0) == [1]
+
+
+def test_pins_are_per_root(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    for root in (a, b):
+        versions.commit(root, stage(root))
+        versions.commit(root, stage(root))
+    versions.pin(a, 1)
+    try:
+        assert versions.gc(b, keep=0) == [1]
+        assert versions.gc(a, keep=0) == []
+    finally:
+        versions.unpin(a, 1)